@@ -0,0 +1,12 @@
+"""Coleta, arquivo e análise dos dados do dashboard de enchentes (a interface fica em pages/enchentes.py).
+
+Módulos, na ordem do fluxo de dados:
+
+- `fontes`: busca concorrente às páginas, feeds, NewsAPI e Open-Meteo (com `rede` e `saude`)
+- `arquivo`: notícias em SQLite/FTS5, agrupadas por `deduplicacao` e roteadas por `regioes`
+- `metricas`, `chuva`, `risco`, `ocorrencias`: indicadores extraídos a cada atualização
+- `historico`: série das métricas em disco
+- `atualizacao`: agrega tudo em snapshots imutáveis, em segundo plano (`compartilhamento` entre réplicas)
+- `api`: /api/v1 e exportação; `instrumentacao`: /metrics
+- `servicos`: as instâncias únicas por processo
+"""
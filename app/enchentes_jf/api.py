@@ -0,0 +1,364 @@
+"""API somente leitura (/api/v1, JSON, CSV e Parquet) e exportação do snapshot em arquivos"""
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+from types import MappingProxyType
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import numpy as np
+
+from . import servicos
+from .arquivo import BUSCA_ORDENS, DATA_DIR
+from .atualizacao import BackgroundRefresher
+from .compartilhamento import snapshot_backend_from_env
+from .datas import TZ_LOCAL
+from .historico import TIMELINE_RESOLUCOES
+from .instrumentacao import MetricsRequestHandler, start_metrics_server
+from .regioes import REGIAO_PADRAO
+
+API_LIMIT_PADRAO = 50
+API_LIMIT_MAX = 200            # itens por página em JSON
+API_EXPORTACAO_MAX = 100_000   # linhas por arquivo CSV/Parquet
+API_CACHE_ENTRADAS = 512       # respostas prontas (corpo, gzip e ETag) reaproveitadas entre clientes
+API_GZIP_MINIMO = 1024         # bytes; respostas menores vão sem compressão
+API_MAX_AGE = 15               # segundos que clientes e proxies podem reusar uma resposta
+FORMATOS_API = {
+    "json": "application/json; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+class ApiError(Exception):
+    """Pedido inválido: vira uma resposta JSON com o status indicado"""
+    
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+ApiResponse = namedtuple("ApiResponse", "status tipo body gzip etag headers")
+
+def _api_response(body, tipo, status=200, headers=()):
+    """Resposta pronta para servir: a compressão e o ETag são calculados uma só vez"""
+    comprimido = None
+    if tipo != FORMATOS_API["parquet"] and len(body) >= API_GZIP_MINIMO:
+        comprimido = zlib.compress(body, 6, wbits=31)  # wbits=31: formato gzip
+    # ETag fraco (vale para as duas codificações) derivado do conteúdo: igual em todas as réplicas
+    etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+    return ApiResponse(status, tipo, body, comprimido, etag, tuple(headers))
+
+def _api_default(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, MappingProxyType):
+        return dict(valor)
+    if isinstance(valor, np.generic):
+        return valor.item()
+    raise TypeError(f"{type(valor).__name__} não serializável")
+
+def _json_response(documento, status=200, headers=()):
+    body = json.dumps(documento, ensure_ascii=False, default=_api_default).encode("utf-8")
+    return _api_response(body, FORMATOS_API["json"], status, headers)
+
+def _thaw(value):
+    """Inverso de `_freeze`: dicts e listas comuns para o pandas/pyarrow"""
+    if isinstance(value, (dict, MappingProxyType)):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(v) for v in value]
+    return value
+
+def _int_param(params, nome, padrao, maximo):
+    try:
+        valor = int(params.get(nome, padrao))
+    except ValueError:
+        raise ApiError(400, f"'{nome}' deve ser um número inteiro")
+    if valor < 0:
+        raise ApiError(400, f"'{nome}' não pode ser negativo")
+    return min(valor, maximo)
+
+def _time_param(params, nome):
+    """Timestamp Unix ou data/hora ISO (horário local se não tiver fuso)"""
+    valor = params.get(nome)
+    if not valor:
+        return None
+    try:
+        numero = float(valor)
+    except ValueError:
+        numero = None
+    if numero is not None:
+        # nan, inf e anos fora do calendário passam pelo float, mas quebrariam a consulta adiante
+        try:
+            datetime.fromtimestamp(numero, timezone.utc)
+        except (ValueError, OverflowError, OSError):
+            raise ApiError(400, f"'{nome}' fora do intervalo de datas válido")
+        return numero
+    try:
+        quando = datetime.fromisoformat(valor)
+    except ValueError:
+        raise ApiError(400, f"'{nome}' deve ser um timestamp ou uma data ISO (2024-02-25T10:00)")
+    return (quando if quando.tzinfo else quando.replace(tzinfo=TZ_LOCAL)).timestamp()
+
+def _page(df, limit, offset):
+    """Página de uma tabela completa: (linhas, total, se há mais)"""
+    return df.iloc[offset:offset + limit], len(df), offset + limit < len(df)
+
+def api_regions(snapshot, params):
+    return {
+        "atualizado_em": snapshot.last_update,
+        "regioes": [{"regiao": r.regiao, "nome": r.nome, "noticias": len(r.noticias), "bairros": len(r.bairros)}
+                    for r in snapshot.regioes.values()],
+    }
+
+def api_region(snapshot, params, regiao):
+    """Resumo da região: métricas (e origem), tempo, chuva e estado das fontes"""
+    dados = snapshot.regioes[regiao]
+    return {
+        "regiao": dados.regiao,
+        "nome": dados.nome,
+        "atualizado_em": dados.last_update,
+        "metrics": dados.metrics,
+        "metrics_origem": dados.metrics_origem,
+        "weather": dados.weather,
+        "chuva": dados.chuva,
+        "sources": dados.sources,
+        "ocorrencias": len(dados.ocorrencias),
+    }
+
+def api_region_news(snapshot, params, regiao, limit, offset):
+    """Feed atual da região (o mesmo do snapshot)"""
+    import pandas as pd  # as tabelas importam o pandas na primeira requisição, não ao subir o servidor
+    return _page(pd.DataFrame(_thaw(snapshot.regioes[regiao].noticias)), limit, offset)
+
+def api_region_bairros(snapshot, params, regiao, limit, offset):
+    """Bairros em ordem de risco"""
+    import pandas as pd
+    return _page(pd.DataFrame(_thaw(snapshot.regioes[regiao].bairros)), limit, offset)
+
+def api_region_timeline(snapshot, params, regiao, limit, offset):
+    """Histórico das métricas em `resolucao` (bruto, 5min, hora ou dia) a partir de `desde`"""
+    nivel = params.get("resolucao", "hora")
+    if nivel not in ("bruto", *TIMELINE_RESOLUCOES):
+        raise ApiError(400, f"'resolucao' deve ser uma de: bruto, {', '.join(TIMELINE_RESOLUCOES)}")
+    df = servicos.metrics_timeline.read(regiao, nivel, desde=_time_param(params, "desde")).reset_index()
+    return _page(df, limit, offset)
+
+def api_archive(snapshot, params, limit, offset):
+    """Arquivo inteiro de notícias: mesmos filtros da busca da página (`q`, `regiao`, `fonte`, `desde`, `ate`)"""
+    regiao = params.get("regiao")
+    if regiao is not None and regiao not in snapshot.regioes:
+        raise ApiError(404, f"região desconhecida: {regiao}")
+    ordem = params.get("ordem", "recentes")
+    if ordem not in BUSCA_ORDENS.values():
+        raise ApiError(400, f"'ordem' deve ser uma de: {', '.join(BUSCA_ORDENS.values())}")
+    pagina, ha_mais = servicos.news_store.search(
+        params.get("q", ""), fontes=[f for f in params.get("fonte", "").split(",") if f],
+        bairro=params.get("bairro"), desde=_time_param(params, "desde"), ate=_time_param(params, "ate"),
+        regiao=regiao, ordem=ordem, limit=limit, offset=offset
+    )
+    import pandas as pd
+    return pd.DataFrame(pagina, columns=["fonte", "titulo", "resumo", "tipo", "url", "horario"]), None, ha_mais
+
+# modelo da rota -> (função, se é tabela paginada/exportável); `{regiao}` vem do caminho
+API_ROTAS = {
+    "/api/v1/regioes": (api_regions, False),
+    "/api/v1/regioes/{regiao}": (api_region, False),
+    "/api/v1/regioes/{regiao}/noticias": (api_region_news, True),
+    "/api/v1/regioes/{regiao}/bairros": (api_region_bairros, True),
+    "/api/v1/regioes/{regiao}/historico": (api_region_timeline, True),
+    "/api/v1/noticias": (api_archive, True),
+}
+_API_ROTAS_RE = [(re.compile(re.sub(r"\{(\w+)\}", r"(?P<\1>[\\w-]+)", modelo)), func, tabela)
+                 for modelo, (func, tabela) in API_ROTAS.items()]
+
+def encode_table(df, formato):
+    """DataFrame em CSV ou Parquet (listas viram "a; b" no CSV)"""
+    if formato == "parquet":
+        if not PARQUET_AVAILABLE:
+            raise ApiError(501, "exportação Parquet requer o pacote pyarrow")
+        return df.to_parquet(index=False)
+    df = df.apply(lambda col: col.map(lambda v: "; ".join(map(str, v)) if isinstance(v, list) else v)
+                  if col.dtype == object else col)
+    return df.to_csv(index=False).encode("utf-8")
+
+def _export_name(caminho):
+    """/api/v1/regioes/juiz-de-fora/bairros -> juiz-de-fora-bairros"""
+    return caminho.removeprefix("/api/v1/").removeprefix("regioes/").replace("/", "-")
+
+def api_response(snapshot, caminho, params):
+    """Resposta de uma rota da API para o snapshot dado (sem estado: pode ser reaproveitada)"""
+    caminho, ponto, extensao = caminho.rstrip("/").rpartition(".")
+    if not ponto or "/" in extensao:
+        caminho, extensao = caminho + ponto + extensao, None
+    formato = extensao or params.get("formato", "json")
+    if formato not in FORMATOS_API:
+        raise ApiError(400, f"'formato' deve ser um de: {', '.join(FORMATOS_API)}")
+    
+    if caminho == "/api/v1":
+        return _json_response({"rotas": list(API_ROTAS),
+                               "formatos": [f for f in FORMATOS_API if f != "parquet" or PARQUET_AVAILABLE]})
+    for padrao, func, tabela in _API_ROTAS_RE:
+        encontrado = padrao.fullmatch(caminho)
+        if encontrado:
+            break
+    else:
+        raise ApiError(404, f"rota desconhecida: {caminho}")
+    argumentos = encontrado.groupdict()
+    if argumentos.get("regiao", REGIAO_PADRAO) not in snapshot.regioes:
+        raise ApiError(404, f"região desconhecida: {argumentos['regiao']}")
+    
+    if not tabela:
+        if formato != "json":
+            raise ApiError(400, "CSV e Parquet só valem para tabelas (notícias, bairros, histórico)")
+        return _json_response(func(snapshot, params, **argumentos))
+    
+    maximo = API_LIMIT_MAX if formato == "json" else API_EXPORTACAO_MAX
+    limit = _int_param(params, "limit", API_LIMIT_PADRAO if formato == "json" else maximo, maximo)
+    offset = _int_param(params, "offset", 0, sys.maxsize)
+    df, total, ha_mais = func(snapshot, params, limit=limit, offset=offset, **argumentos)
+    proximo = f"{caminho}{'.' + extensao if extensao else ''}?{urlencode(dict(params, offset=offset + limit))}" if ha_mais else None
+    headers = [("Link", f'<{proximo}>; rel="next"')] if proximo else []
+    
+    if formato == "json":
+        itens = json.loads(df.to_json(orient="records", date_format="iso", force_ascii=False))
+        return _json_response({"atualizado_em": snapshot.last_update, "offset": offset, "limit": limit,
+                               "total": total, "proximo": proximo, "itens": itens}, headers=headers)
+    if total is not None:
+        headers.append(("X-Total-Count", str(total)))
+    headers.append(("Content-Disposition", f'attachment; filename="{_export_name(caminho)}.{formato}"'))
+    return _api_response(encode_table(df, formato), FORMATOS_API[formato], headers=headers)
+
+class ResponseCache:
+    """Respostas prontas por (versão do snapshot, caminho, parâmetros), em LRU.
+    
+    Milhares de clientes consultando a mesma rota entre duas atualizações custam
+    uma consulta e uma serialização; o resto é busca no dicionário.
+    """
+    
+    def __init__(self, tamanho=API_CACHE_ENTRADAS):
+        self.tamanho = tamanho
+        self._respostas = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, chave, build):
+        with self._lock:
+            if chave in self._respostas:
+                self._respostas.move_to_end(chave)
+                servicos.pipeline_metrics.inc("enchentes_api_respostas_total", resultado="cache")
+                return self._respostas[chave]
+        resposta = build()  # fora da trava: pedidos simultâneos da mesma chave no máximo repetem o trabalho
+        with self._lock:
+            self._respostas[chave] = resposta
+            while len(self._respostas) > self.tamanho:
+                self._respostas.popitem(last=False)
+        servicos.pipeline_metrics.inc("enchentes_api_respostas_total", resultado="gerada")
+        return resposta
+
+class ApiRequestHandler(MetricsRequestHandler):
+    """GET /api/v1/... sobre o último snapshot do atualizador (`server.refresher`), além de /metrics.
+    
+    Roda nas threads do próprio servidor HTTP: nenhuma requisição passa pelo
+    rerun do Streamlit. Tabelas aceitam `limit`/`offset` e `formato` (ou a
+    extensão .json/.csv/.parquet); respostas levam ETag (If-None-Match -> 304),
+    Cache-Control e gzip quando o cliente aceita.
+    """
+    
+    protocol_version = "HTTP/1.1"  # conexões persistentes para clientes que consultam em intervalos
+    # Cabeçalhos e corpo vão em escritas separadas: com Nagle, cada resposta numa
+    # conexão reaproveitada esperaria o ACK atrasado do cliente (~40 ms)
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        partes = urlsplit(self.path)
+        if not partes.path.startswith("/api/"):
+            return super().do_GET()
+        params = dict(parse_qsl(partes.query))
+        snapshot = self.server.refresher.latest()
+        chave = (snapshot.version, partes.path, tuple(sorted(params.items())))
+        try:
+            resposta = self.server.api_cache.get(chave, lambda: api_response(snapshot, partes.path, params))
+        except ApiError as e:
+            resposta = _json_response({"erro": e.mensagem}, e.status)
+        self._send_api(resposta)
+    
+    def _send_api(self, resposta):
+        headers = [("ETag", resposta.etag), ("Cache-Control", f"public, max-age={API_MAX_AGE}"),
+                   ("Vary", "Accept-Encoding")]
+        etags = {etag.strip() for etag in self.headers.get("If-None-Match", "").split(",")}
+        if resposta.status == 200 and (resposta.etag in etags or "*" in etags):
+            self.send_response(304)
+            for nome, valor in headers:
+                self.send_header(nome, valor)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        
+        body = resposta.body
+        if resposta.gzip is not None and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = resposta.gzip
+            headers.append(("Content-Encoding", "gzip"))
+        self.send_response(resposta.status)
+        self.send_header("Content-Type", resposta.tipo)
+        self.send_header("Content-Length", str(len(body)))
+        for nome, valor in headers + list(resposta.headers):
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_api_server(port, refresher):
+    """API somente leitura em thread própria (porta definida por ENCHENTES_API_PORT)"""
+    server = start_metrics_server(port, ApiRequestHandler)
+    server.refresher = refresher
+    server.api_cache = ResponseCache()
+    return server
+
+def export_snapshot(refresher, directory, formato="csv"):
+    """Grava as tabelas de cada região e o arquivo de notícias em `directory`; devolve os arquivos"""
+    os.makedirs(directory, exist_ok=True)
+    snapshot, arquivos = refresher.latest(), []
+    rotas = [f"/api/v1/regioes/{slug}/{tabela}" for slug in snapshot.regioes for tabela in ("noticias", "bairros", "historico")]
+    for rota in rotas + ["/api/v1/noticias"]:
+        resposta = api_response(snapshot, rota, {"formato": formato})
+        caminho = os.path.join(directory, f"{_export_name(rota)}.{formato}")
+        with open(caminho, "wb") as f:
+            f.write(resposta.body)
+        arquivos.append(caminho)
+    return arquivos
+
+def cli(argv=None):
+    """Uso fora do Streamlit: `serve` (API + /metrics) ou `export` (arquivos CSV/Parquet)"""
+    import argparse
+    parser = argparse.ArgumentParser(prog="enchentes.py", description="API e exportação do dashboard de enchentes")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    serve = comandos.add_parser("serve", help="atualiza em segundo plano e serve /api/v1 e /metrics")
+    serve.add_argument("--porta", type=int, default=int(os.getenv("ENCHENTES_API_PORT", 8502)))
+    export = comandos.add_parser("export", help="atualiza uma vez e grava as tabelas em arquivos")
+    export.add_argument("--saida", default=os.path.join(DATA_DIR, "exportacao"))
+    export.add_argument("--formato", choices=("csv", "parquet"), default="csv")
+    args = parser.parse_args(argv)
+    
+    refresher = BackgroundRefresher(backend=snapshot_backend_from_env())
+    if args.comando == "serve":
+        start_api_server(args.porta, refresher.start())
+        print(f"API em http://0.0.0.0:{args.porta}/api/v1 (Ctrl+C encerra)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            return
+    
+    if refresher.backend is not None:
+        refresher.sync()  # adota o snapshot das réplicas, se houver um recente
+    else:
+        refresher.refresh_now()
+    for caminho in export_snapshot(refresher, args.saida, args.formato):
+        print(caminho)
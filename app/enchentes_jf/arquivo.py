@@ -0,0 +1,376 @@
+"""Arquivo persistente de notícias (SQLite + FTS5), compartilhado pelas réplicas de um DATA_DIR"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from .datas import format_horario, parse_timestamp
+from .deduplicacao import NearDuplicateIndex
+from .regioes import REGIAO_PADRAO
+
+DATA_DIR = os.getenv(
+    "ENCHENTES_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data")
+)
+
+def news_key(noticia):
+    """Chave estável da notícia: hash do título normalizado (ou da URL, sem título)"""
+    titulo = re.sub(r"\s+", " ", noticia.get("titulo", "")).strip().rstrip(".").strip().casefold()
+    base = titulo or (noticia.get("url") or "").strip().rstrip("/").lower()
+    return hashlib.sha1(base.encode("utf-8")).hexdigest()
+
+@lru_cache(maxsize=None)
+def archive_id(directory=DATA_DIR):
+    """Identificador do DATA_DIR, criado no primeiro uso: processos com o mesmo valor dividem o arquivo"""
+    caminho = os.path.join(directory, "arquivo.id")
+    if not os.path.exists(caminho):
+        os.makedirs(directory, exist_ok=True)
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w") as f:
+            f.write(os.urandom(8).hex())
+        try:
+            os.link(temporario, caminho)  # não sobrescreve: outro processo pode ter chegado antes
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temporario)
+    with open(caminho) as f:
+        return f.read().strip()
+
+BUSCA_CANDIDATOS_RELEVANCIA = 500  # ocorrências mais recentes ordenadas por BM25
+BUSCA_ORDENS = {"Mais recentes": "recentes", "Relevância": "relevancia"}  # rótulo na página -> `ordem`
+
+class NewsStore:
+    """Arquivo SQLite de notícias com ingestão incremental.
+    
+    Cada notícia é gravada uma única vez (chave = `news_key`); o feed sai de uma
+    consulta indexada por data de publicação e sobrevive a reinícios do processo.
+    O índice em `publicado_em` mantém a ordem: inserir k notícias custa O(k log n)
+    e as N mais recentes saem de uma varredura curta do índice, sem reordenar nada.
+    Notícias novas passam pelo `NearDuplicateIndex` e recebem o grupo (`cluster_id`)
+    da mesma história publicada por outras fontes. A tabela `noticia_regioes` liga
+    cada notícia às regiões em que aparece; o feed de uma região é a mesma varredura
+    do índice por data, filtrada pela chave (regiao, id).
+    A busca usa um índice invertido FTS5 (`noticias_busca`) sobre título e resumo,
+    sem acentos e sem diferenciar maiúsculas, mantido por gatilho a cada inserção.
+    """
+    
+    COLUMNS = ("fonte", "titulo", "resumo", "tipo", "url", "horario")
+    
+    def __init__(self, path, dedup=None):
+        self.path = path
+        self.dedup = dedup or NearDuplicateIndex()
+        self._conn = None
+        self._lock = threading.Lock()
+        self._fontes = set()
+        self._dedup_lock = threading.RLock()  # índice LSH; sempre obtida antes de `_lock`
+        self._rowid = 0              # última notícia já levada ao índice LSH
+        self._versao = None          # PRAGMA data_version quando o índice LSH foi sincronizado
+        self._versao_fontes = None   # idem, para a lista de fontes
+    
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            tabelas = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS noticias (
+                    id TEXT PRIMARY KEY,
+                    fonte TEXT, titulo TEXT, resumo TEXT, tipo TEXT, url TEXT, horario TEXT,
+                    publicado_em REAL NOT NULL,
+                    inserido_em REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_noticias_publicado ON noticias (publicado_em DESC);
+                CREATE TABLE IF NOT EXISTS noticia_regioes (
+                    id TEXT NOT NULL,
+                    regiao TEXT NOT NULL,
+                    localizada INTEGER NOT NULL DEFAULT 1,
+                    PRIMARY KEY (regiao, id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_noticias_fonte ON noticias (fonte, publicado_em DESC);
+                CREATE VIRTUAL TABLE IF NOT EXISTS noticias_busca USING fts5(
+                    titulo, resumo, content='noticias', content_rowid='rowid',
+                    tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS noticias_busca_ai AFTER INSERT ON noticias BEGIN
+                    INSERT INTO noticias_busca (rowid, titulo, resumo) VALUES (new.rowid, new.titulo, new.resumo);
+                END;
+            """)
+            if "noticias_busca" not in tabelas:
+                # Indexa o que já estava arquivado antes da busca existir
+                conn.execute("INSERT INTO noticias_busca (noticias_busca) VALUES ('rebuild')")
+            if "noticia_regioes" not in tabelas:
+                # Arquivos anteriores ao registro de regiões só tinham Juiz de Fora
+                conn.execute("INSERT OR IGNORE INTO noticia_regioes (id, regiao) SELECT id, ? FROM noticias", (REGIAO_PADRAO,))
+            # Ligações gravadas antes da distinção contam como localizadas
+            if "localizada" not in {r["name"] for r in conn.execute("PRAGMA table_info(noticia_regioes)")}:
+                conn.execute("ALTER TABLE noticia_regioes ADD COLUMN localizada INTEGER NOT NULL DEFAULT 1")
+            # Arquivos criados antes do agrupamento de quase-duplicatas
+            colunas = {r["name"] for r in conn.execute("PRAGMA table_info(noticias)")}
+            if "cluster_id" not in colunas:
+                conn.execute("ALTER TABLE noticias ADD COLUMN cluster_id TEXT")
+                conn.execute("ALTER TABLE noticias ADD COLUMN assinatura BLOB")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_noticias_cluster ON noticias (cluster_id)")
+            conn.commit()
+            self._conn = conn
+            self._fontes = {r[0] for r in conn.execute("SELECT DISTINCT fonte FROM noticias") if r[0]}
+            self._versao_fontes = conn.execute("PRAGMA data_version").fetchone()[0]
+        return self._conn
+    
+    def warm(self, batch=5000):
+        """Leva ao índice LSH as notícias gravadas desde a última vez, por este ou por outro processo.
+        
+        Réplicas que dividem o DATA_DIR arquivam alternadamente (quem detém a trava
+        de atualização); o `data_version` do SQLite só muda quando outra conexão
+        grava, então sem novidade a conferência é uma leitura de página em cache.
+        O índice é montado fora da trava da conexão: o feed e a busca não esperam.
+        """
+        with self._dedup_lock:
+            with self._lock:
+                versao = self._connect().execute("PRAGMA data_version").fetchone()[0]
+            if versao == self._versao:
+                return
+            pendentes = []
+            while True:
+                with self._lock:
+                    rows = self._connect().execute(
+                        "SELECT rowid, id, fonte, titulo, resumo, cluster_id, assinatura FROM noticias "
+                        "WHERE rowid > ? ORDER BY rowid LIMIT ?", (self._rowid, batch)
+                    ).fetchall()
+                for row in rows:
+                    assinatura = np.frombuffer(row["assinatura"], dtype=np.uint32) if row["assinatura"] else None
+                    if row["cluster_id"] is None or (assinatura is not None and not self.dedup.is_current(assinatura)):
+                        pendentes.append(row)
+                        continue
+                    self.dedup.add(row["id"], assinatura, row["cluster_id"])
+                if rows:
+                    self._rowid = rows[-1]["rowid"]
+                if len(rows) < batch:
+                    break
+            if pendentes:
+                # Arquivos anteriores ao agrupamento ou à marca de regiões/números da
+                # assinatura: assinatura e grupo (re)calculados uma vez
+                atualizacoes = []
+                for row in pendentes:
+                    assinatura = self.dedup.signature(dict(row))
+                    cluster_id = self.dedup.add(row["id"], assinatura)
+                    atualizacoes.append((cluster_id, assinatura.tobytes() if assinatura is not None else None, row["id"]))
+                with self._lock, self._conn:
+                    self._conn.executemany("UPDATE noticias SET cluster_id = ?, assinatura = ? WHERE id = ?", atualizacoes)
+            self._versao = versao
+    
+    def add(self, noticias):
+        """Insere apenas as notícias ainda não arquivadas; devolve quantas eram novas.
+        
+        Notícias sem data (scraping) ficam com o horário em que foram vistas pela
+        primeira vez; datas no futuro são limitadas ao momento atual. As regiões
+        (`noticia["regioes"]`) são gravadas também para notícias já arquivadas, para
+        que uma região nova no registro receba as notícias que ainda circulam; uma
+        ligação não localizada (`noticia["localizada"]` falso) que depois aparece
+        citada é regravada e volta a ser entregue por `since`.
+        """
+        agora = time.time()
+        novas, regioes = {}, {}
+        for n in noticias:
+            if n.get("titulo"):
+                key = news_key(n)
+                novas.setdefault(key, n)
+                for r in n.get("regioes") or ():
+                    regioes[(key, r)] = max(regioes.get((key, r), 0), int(n.get("localizada", True)))
+        
+        with self._dedup_lock:
+            self.warm()  # notícias que outra réplica arquivou também entram no agrupamento
+            with self._lock:
+                conn = self._connect()
+                existentes = set()
+                ids = list(novas)
+                for i in range(0, len(ids), 500):
+                    lote = ids[i:i + 500]
+                    existentes.update(r[0] for r in conn.execute(
+                        f"SELECT id FROM noticias WHERE id IN ({','.join('?' * len(lote))})", lote
+                    ))
+                
+                pendentes = []
+                for key, n in novas.items():
+                    if key in existentes:
+                        continue
+                    publicado = parse_timestamp(n.get("publicado_em") or n.get("horario"))
+                    pendentes.append((min(publicado.timestamp(), agora) if publicado else agora, key, n))
+                # Gravadas em ordem de publicação: dentro do lote o rowid acompanha a data (a busca usa isso)
+                pendentes.sort(key=lambda p: p[0])
+                
+                rows = []
+                for ts, key, n in pendentes:
+                    campos = {c: n.get(c, "") for c in self.COLUMNS}
+                    campos["horario"] = format_horario(ts)
+                    assinatura = self.dedup.signature(n)
+                    cluster_id = self.dedup.add(key, assinatura)
+                    rows.append(
+                        (key,) + tuple(campos[c] for c in self.COLUMNS) +
+                        (ts, agora, cluster_id, assinatura.tobytes() if assinatura is not None else None)
+                    )
+                with conn:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO noticias (id, fonte, titulo, resumo, tipo, url, horario, "
+                        "publicado_em, inserido_em, cluster_id, assinatura) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+                    conn.executemany(
+                        "DELETE FROM noticia_regioes WHERE id = ? AND regiao = ? AND localizada = 0",
+                        sorted(ligacao for ligacao, localizada in regioes.items() if localizada)
+                    )
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO noticia_regioes (id, regiao, localizada) VALUES (?, ?, ?)",
+                        sorted((key, r, localizada) for (key, r), localizada in regioes.items())
+                    )
+                self._fontes.update(row[1] for row in rows if row[1])
+                return len(rows)
+    
+    def latest(self, limit=15, regiao=None):
+        """Uma notícia por grupo (a mais recente), com as demais fontes da mesma história"""
+        if regiao is None:
+            consulta, filtro = "SELECT {} FROM noticias n", ()
+        else:
+            consulta = "SELECT {} FROM noticias n JOIN noticia_regioes r ON r.id = n.id AND r.regiao = ?"
+            filtro = (regiao,)
+        consulta = consulta.format(
+            "n.fonte, n.titulo, n.resumo, n.tipo, n.url, n.horario, COALESCE(n.cluster_id, n.id) AS grupo"
+        ) + " ORDER BY n.publicado_em DESC, n.rowid ASC LIMIT ? OFFSET ?"
+        with self._lock:
+            conn = self._connect()
+            noticias, grupos = [], {}
+            offset, pagina = 0, limit * 4
+            while len(noticias) < limit:
+                rows = conn.execute(consulta, filtro + (pagina, offset)).fetchall()
+                for r in rows:
+                    if r["grupo"] not in grupos and len(noticias) < limit:
+                        grupos[r["grupo"]] = dict(r)
+                        noticias.append(grupos[r["grupo"]])
+                if len(rows) < pagina:
+                    break
+                offset += pagina
+            
+            if grupos:
+                for r in conn.execute(
+                    "SELECT cluster_id, GROUP_CONCAT(DISTINCT fonte) AS fontes, COUNT(*) AS total FROM noticias "
+                    f"WHERE cluster_id IN ({','.join('?' * len(grupos))}) GROUP BY cluster_id",
+                    list(grupos)
+                ):
+                    n = grupos[r["cluster_id"]]
+                    n["relacionadas"] = r["total"] - 1
+                    n["outras_fontes"] = [f for f in r["fontes"].split(",") if f != n["fonte"]]
+        for n in noticias:
+            del n["grupo"]
+        return noticias
+    
+    def search(self, consulta="", fontes=(), bairro=None, desde=None, ate=None, regiao=None,
+               ordem="recentes", limit=20, offset=0):
+        """Busca no arquivo inteiro; devolve (página de notícias, se há mais resultados).
+        
+        `consulta` aceita palavras (todas obrigatórias), "frases entre aspas" e
+        prefixos (`desliz*`); `bairro` exige a menção ao bairro; `desde`/`ate` são
+        timestamps de publicação. "recentes" ordena por data de publicação (não pela
+        ordem de chegada, que não vale para notícias antigas importadas depois);
+        "relevancia" ordena por BM25 as BUSCA_CANDIDATOS_RELEVANCIA ocorrências mais
+        recentes, em vez de pontuar todas as notícias que citam um termo comum.
+        """
+        expressao = " ".join(filter(None, (search_expression(consulta), search_expression(f'"{bairro}"' if bairro else ""))))
+        tabelas, condicoes, parametros = ["noticias n"], [], []
+        if expressao:
+            # CROSS JOIN fixa a ordem: o índice invertido é consultado uma vez e só
+            # as notícias encontradas passam pelos demais filtros
+            tabelas = ["noticias_busca b CROSS JOIN noticias n ON n.rowid = b.rowid"]
+            condicoes.append("noticias_busca MATCH ?")
+            parametros.append(expressao)
+        if regiao is not None:
+            tabelas.append("JOIN noticia_regioes r ON r.id = n.id AND r.regiao = ?")
+            parametros.insert(0, regiao)
+        if fontes:
+            condicoes.append(f"n.fonte IN ({','.join('?' * len(fontes))})")
+            parametros.extend(fontes)
+        if desde is not None:
+            condicoes.append("n.publicado_em >= ?")
+            parametros.append(desde)
+        if ate is not None:
+            condicoes.append("n.publicado_em < ?")
+            parametros.append(ate)
+        
+        origem = " ".join(tabelas) + (" WHERE " + " AND ".join(condicoes) if condicoes else "")
+        campos = "n.fonte, n.titulo, n.resumo, n.tipo, n.url, n.horario"
+        if expressao and ordem == "relevancia":
+            candidatos = (
+                f"SELECT b.rowid AS id_busca, bm25(noticias_busca) AS escore FROM {origem} "
+                f"ORDER BY n.publicado_em DESC, n.rowid ASC LIMIT {BUSCA_CANDIDATOS_RELEVANCIA}"
+            )
+            consulta = f"SELECT {campos} FROM ({candidatos}) c JOIN noticias n ON n.rowid = c.id_busca ORDER BY c.escore"
+        else:
+            # Sem texto, a ordem sai do índice idx_noticias_publicado; com texto, as
+            # ocorrências passam por uma ordenação limitada à página (LIMIT + OFFSET)
+            consulta = f"SELECT {campos} FROM {origem} ORDER BY n.publicado_em DESC, n.rowid ASC"
+        with self._lock:
+            rows = self._connect().execute(f"{consulta} LIMIT ? OFFSET ?", parametros + [limit + 1, offset]).fetchall()
+        return [dict(r) for r in rows[:limit]], len(rows) > limit
+    
+    def sources(self):
+        """Fontes presentes no arquivo (atualizadas a cada inserção, deste ou de outro processo)"""
+        with self._lock:
+            conn = self._connect()
+            versao = conn.execute("PRAGMA data_version").fetchone()[0]
+            if versao != self._versao_fontes:  # outro processo gravou no arquivo
+                self._fontes = {r[0] for r in conn.execute("SELECT DISTINCT fonte FROM noticias") if r[0]}
+                self._versao_fontes = versao
+            return sorted(self._fontes)
+    
+    def since(self, rowid=0, batch=5000, regiao=None):
+        """Notícias arquivadas depois de `rowid`, na ordem de chegada (para processamento incremental).
+        
+        Com `regiao`, o `rowid` é o da ligação notícia-região: uma notícia antiga que
+        passa a valer para a região também é entregue, com `localizada` dizendo se
+        ela cita a região (ou veio de uma fonte só dela) ou só circula no feed.
+        """
+        if regiao is None:
+            consulta, filtro = (
+                "SELECT rowid, id, fonte, titulo, resumo, url, publicado_em FROM noticias "
+                "WHERE rowid > ? ORDER BY rowid LIMIT ?"
+            ), ()
+        else:
+            consulta, filtro = (
+                "SELECT r.rowid AS rowid, r.localizada, n.id, n.fonte, n.titulo, n.resumo, n.url, n.publicado_em "
+                "FROM noticia_regioes r JOIN noticias n ON n.id = r.id "
+                "WHERE r.regiao = ? AND r.rowid > ? ORDER BY r.rowid LIMIT ?"
+            ), (regiao,)
+        while True:
+            with self._lock:
+                rows = self._connect().execute(consulta, filtro + (rowid, batch)).fetchall()
+            for r in rows:
+                yield dict(r)
+            if len(rows) < batch:
+                return
+            rowid = rows[-1]["rowid"]
+    
+    def count(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM noticias").fetchone()[0]
+
+def search_expression(texto):
+    """Converte a busca digitada em expressão FTS5 segura.
+    
+    Palavras viram termos obrigatórios, "frases entre aspas" exigem as palavras em
+    sequência e um `*` no fim pede prefixo (`alag*` casa alagamento, alagado...).
+    Pontuação e operadores do FTS5 digitados pelo usuário são descartados.
+    """
+    termos = []
+    for frase, palavra in re.findall(r'"([^"]*)"?|(\S+)', texto):
+        palavras = re.findall(r"\w+", frase or palavra)
+        if not palavras:
+            continue
+        termo = '"' + " ".join(palavras) + '"'
+        termos.append(termo + "*" if palavra.endswith("*") else termo)
+    return " ".join(termos)
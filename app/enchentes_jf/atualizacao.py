@@ -0,0 +1,397 @@
+"""Agregação dos resultados das fontes e atualização em segundo plano com snapshots imutáveis"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+from types import MappingProxyType
+
+from . import servicos
+from .arquivo import archive_id
+from .chuva import CHUVA_JANELAS
+from .compartilhamento import SNAPSHOT_LOCK_TTL, SNAPSHOT_SYNC_INTERVAL, SnapshotCacheError, snapshot_data, snapshot_payload
+from .datas import TZ_LOCAL
+from .fontes import build_fetch_tasks, run_fetch_tasks, tasks_for_region
+from .metricas import METRICAS
+from .ocorrencias import OccurrenceLayer
+from .regioes import REGIAO_PADRAO, REGIOES, route_news
+from .renderizacao import render_metrics_html, render_news_feed_html
+
+log = logging.getLogger(__name__)
+
+# =============================================================================
+# AGREGADOR DE DADOS
+# =============================================================================
+
+def merge_results(results):
+    """Combina os resultados das fontes com os dados base e distribui tudo pelas regiões.
+    
+    Cada fonte foi buscada e processada uma vez; aqui suas notícias são roteadas
+    para as regiões que citam (ou todas as que a fonte cobre) e arquivadas juntas.
+    """
+    all_news = [dict(n, regioes=[REGIAO_PADRAO]) for n in servicos.data_manager.noticias_base]
+    
+    weather = {}
+    for categoria, resultado, regioes in results.values():
+        if categoria == "weather" and resultado:
+            # Só as horas ainda não gravadas entram na série (respostas repetidas custam O(1))
+            with servicos.pipeline_metrics.stage("chuva"):
+                for slug, local in resultado.items():
+                    servicos.rainfall_store.extend(slug, *local["serie_horaria"])
+            weather = {slug: {k: v for k, v in local.items() if k != "serie_horaria"} for slug, local in resultado.items()}
+        elif resultado:
+            for n in resultado:
+                destinos, localizada = route_news(n, regioes)
+                all_news.append(dict(n, regioes=destinos, localizada=localizada))
+    
+    # Arquivar só o que é novo (duplicatas exatas e quase-duplicatas são agrupadas
+    # no arquivo); o feed vem do arquivo, já aquecido desde o início
+    with servicos.pipeline_metrics.stage("arquivar"):
+        servicos.news_store.add(all_news)
+    
+    # Extrair métricas (só das notícias novas no arquivo) ou usar fallback
+    with servicos.pipeline_metrics.stage("metricas"):
+        servicos.metrics_engine.ingest_store(servicos.news_store, REGIOES)
+    with servicos.pipeline_metrics.stage("ocorrencias"):
+        servicos.occurrence_store.ingest_store(servicos.news_store, REGIOES)
+    
+    # Risco de todos os bairros, de todas as regiões, em uma única passada
+    chuvas = {slug: servicos.rainfall_store.summary(slug) for slug in REGIOES}
+    with servicos.pipeline_metrics.stage("risco"):
+        bairros = servicos.risk_engine.score(chuvas)
+    
+    tasks = build_fetch_tasks()
+    agora = datetime.now(TZ_LOCAL)
+    regioes = {}
+    for slug in REGIOES:
+        engine = servicos.metrics_engine.engine(slug)
+        extracted = engine.values()
+        historico = servicos.data_manager.historical_data.get(slug, {})
+        metrics = {m: extracted.get(m) or historico.get(m) for m in METRICAS}
+        chuva = chuvas[slug]
+        ocorrencias = servicos.occurrence_store.layer(slug)
+        metrics.update({
+            "chuva_acumulada_mes": chuva["mes"] if chuva else historico.get("chuva_acumulada_mes"),
+            "chuva_48h": chuva["janelas"][48] if chuva else historico.get("chuva_48h"),
+            "ocorrencias": max(len(ocorrencias), historico.get("ocorrencias") or 0) or None,
+            "data_atualizacao": agora.strftime("%d/%m/%Y %H:%M")
+        })
+        with servicos.pipeline_metrics.stage("feed"):
+            noticias = servicos.news_store.latest(15, regiao=slug)
+        regioes[slug] = {
+            "noticias": noticias,
+            "metrics": metrics,
+            "metrics_origem": engine.provenance(),
+            "weather": weather.get(slug),
+            "chuva": chuva,
+            "bairros": bairros[slug],
+            "ocorrencias": ocorrencias,
+            "sources": servicos.source_health.statuses(task.nome for task in tasks_for_region(tasks, slug))
+        }
+    servicos.pipeline_metrics.set("enchentes_noticias_arquivadas", servicos.news_store.count())
+    
+    # Uma leitura por região no histórico (as resoluções agregadas se atualizam junto)
+    historico = {}
+    with servicos.pipeline_metrics.stage("historico"):
+        for slug, dados in regioes.items():
+            valores = {m: dados["metrics"][m] for m in METRICAS}
+            if dados["chuva"]:
+                valores.update({f"chuva_{j}h": dados["chuva"]["janelas"][j] for j in CHUVA_JANELAS})
+            if dados["weather"]:
+                valores.update(temperatura=dados["weather"].get("temperatura"), umidade=dados["weather"].get("umidade"))
+            servicos.metrics_timeline.append(slug, agora.timestamp(), valores)
+            historico[slug] = valores
+    
+    return {
+        "regioes": regioes,
+        "last_update": agora,
+        "sources": servicos.source_health.statuses(task.nome for task in tasks),
+        # O que foi gravado no DATA_DIR, para réplicas com arquivo próprio (replicate_archive)
+        "arquivo": {"origem": archive_id(), "noticias": all_news, "historico": historico}
+    }
+
+def replicate_archive(data):
+    """Grava no DATA_DIR local o que a réplica que atualizou gravou no dela.
+    
+    Réplicas no mesmo DATA_DIR já leem o arquivo e o histórico que ela escreveu;
+    as de outro host (snapshot no Redis) refazem a mesma ingestão a partir do
+    snapshot adotado, para que a busca, a API e o histórico não fiquem parados.
+    """
+    arquivo = data.get("arquivo")
+    if not arquivo or arquivo["origem"] == archive_id():
+        return
+    with servicos.pipeline_metrics.stage("arquivar"):
+        servicos.news_store.add(arquivo["noticias"])
+    with servicos.pipeline_metrics.stage("historico"):
+        for slug, valores in arquivo["historico"].items():
+            if slug in REGIOES:
+                servicos.metrics_timeline.append(slug, data["last_update"].timestamp(), valores)
+
+METRICAS_REFERENCIA = ("chuva_acumulada_mes", "chuva_48h", "ocorrencias", "data_atualizacao")
+
+def base_data():
+    """Dados base (boletins e números de referência) no formato de `merge_results`, sem tocar no arquivo.
+    
+    É o snapshot inicial: fica pronto em milissegundos na primeira visita à página,
+    e o aquecimento do arquivo (índice de quase-duplicatas, métricas, ocorrências)
+    fica para a primeira atualização, já na thread do atualizador.
+    """
+    tasks = build_fetch_tasks()
+    bairros = servicos.risk_engine.score({slug: None for slug in REGIOES})
+    regioes = {}
+    for slug in REGIOES:
+        historico = servicos.data_manager.historical_data.get(slug, {})
+        regioes[slug] = {
+            "noticias": [dict(n) for n in servicos.data_manager.noticias_base] if slug == REGIAO_PADRAO else [],
+            "metrics": {m: historico.get(m) for m in METRICAS + METRICAS_REFERENCIA},
+            "metrics_origem": {},
+            "weather": None,
+            "chuva": None,
+            "bairros": bairros[slug],
+            "ocorrencias": OccurrenceLayer(),
+            "sources": servicos.source_health.statuses(task.nome for task in tasks_for_region(tasks, slug))
+        }
+    return {
+        "regioes": regioes,
+        "last_update": datetime.now(TZ_LOCAL),
+        "sources": servicos.source_health.statuses(task.nome for task in tasks)
+    }
+
+def aggregate_all_data():
+    """Agrega dados de todas as fontes com fallback garantido"""
+    return merge_results(run_fetch_tasks(build_fetch_tasks()))
+
+# =============================================================================
+# ATUALIZAÇÃO EM SEGUNDO PLANO
+# =============================================================================
+
+REFRESH_INTERVAL = 300  # 5 minutos
+REFRESH_MIN_INTERVAL = 60  # pedidos manuais dentro desta janela viram uma única atualização
+
+def _freeze(value):
+    """Converte dicts/listas em estruturas somente leitura"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+@dataclass(frozen=True, eq=False)
+class RegionSnapshot:
+    """Dados de uma região dentro de um snapshot"""
+    regiao: str
+    nome: str
+    noticias: tuple
+    metrics: MappingProxyType
+    metrics_origem: MappingProxyType
+    weather: MappingProxyType
+    chuva: MappingProxyType
+    bairros: tuple
+    ocorrencias: OccurrenceLayer
+    last_update: datetime
+    sources: tuple
+
+    # HTML renderizado uma vez por snapshot e reaproveitado por todos os reruns/sessões
+    @cached_property
+    def feed_html(self):
+        return render_news_feed_html(self.noticias)
+    
+    @cached_property
+    def metrics_html(self):
+        return render_metrics_html(self)
+
+@dataclass(frozen=True, eq=False)
+class Snapshot:
+    """Retrato imutável dos dados agregados, publicado pelo atualizador"""
+    version: int
+    regioes: MappingProxyType
+    last_update: datetime
+    sources: tuple
+    
+    def regiao(self, slug):
+        """Dados da região (ou da região padrão, se ela saiu do registro)"""
+        return self.regioes.get(slug) or self.regioes[REGIAO_PADRAO]
+    
+    @classmethod
+    def from_data(cls, version, data):
+        regioes = {
+            slug: RegionSnapshot(
+                regiao=slug,
+                nome=REGIOES[slug]["nome"],
+                noticias=_freeze(dados["noticias"]),
+                metrics=_freeze(dados["metrics"]),
+                metrics_origem=_freeze(dados["metrics_origem"]),
+                weather=_freeze(dados["weather"]),
+                chuva=_freeze(dados["chuva"]),
+                bairros=_freeze(dados["bairros"]),
+                ocorrencias=dados["ocorrencias"],
+                last_update=data["last_update"],
+                sources=_freeze(dados["sources"])
+            )
+            for slug, dados in data["regioes"].items()
+        }
+        return cls(
+            version=version,
+            regioes=MappingProxyType(regioes),
+            last_update=data["last_update"],
+            sources=_freeze(data["sources"])
+        )
+
+class BackgroundRefresher:
+    """Atualiza os dados em uma thread própria e publica snapshots imutáveis.
+    
+    As páginas apenas leem `latest()`; nenhuma renderização espera pela rede.
+    Com um `backend` compartilhado, as réplicas conferem a versão publicada a cada
+    `sync_interval` segundos: só a que obtém a trava busca as fontes quando o
+    snapshot vence, e as demais adotam o que ela publicou. Só ela grava no arquivo
+    de notícias e no histórico; réplicas com outro DATA_DIR replicam a gravação a
+    partir do snapshot adotado (`replicate_archive`).
+    """
+    
+    def __init__(self, interval=REFRESH_INTERVAL, min_interval=REFRESH_MIN_INTERVAL,
+                 backend=None, sync_interval=SNAPSHOT_SYNC_INTERVAL):
+        self.interval = interval
+        self.min_interval = min_interval
+        self.backend = backend
+        self.sync_interval = sync_interval
+        self._shared_version = 0  # versão do cache compartilhado que o snapshot local reflete
+        # Dados base ficam disponíveis imediatamente, antes da primeira busca
+        self._snapshot = Snapshot.from_data(0, base_data())
+        self._last_refresh = None  # time.time() do início da última atualização
+        self.last_error = None     # (time.time(), "Tipo: mensagem") da última falha em segundo plano
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="enchentes-refresher", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def latest(self):
+        return self._snapshot
+    
+    @property
+    def version(self):
+        """Versão do último snapshot: leitura barata para quem só quer saber se algo mudou"""
+        return self._snapshot.version
+    
+    def next_refresh_at(self):
+        """Horário (time.time) mais cedo em que um pedido manual pode ser atendido"""
+        if self._last_refresh is None:
+            return time.time()
+        return max(time.time(), self._last_refresh + self.min_interval)
+    
+    def request_refresh(self):
+        """Antecipa a próxima atualização sem bloquear quem pediu.
+        
+        Pedidos de todas as sessões se juntam: dentro de `min_interval` segundos
+        desde a última atualização, N cliques resultam em uma única busca às fontes.
+        Devolve o horário previsto para ela.
+        """
+        atrasado = self._wake.is_set()
+        self._wake.set()
+        servicos.pipeline_metrics.inc("enchentes_pedidos_atualizacao_total", resultado="agrupado" if atrasado else "agendado")
+        return self.next_refresh_at()
+    
+    def refresh_now(self, compartilhar=True):
+        self._last_refresh = time.time()
+        with servicos.pipeline_metrics.stage("atualizacao"):
+            data = aggregate_all_data()
+        snapshot = self._publish(Snapshot.from_data(self._snapshot.version + 1, data))
+        if compartilhar and self.backend is not None:
+            with servicos.pipeline_metrics.stage("compartilhar"):
+                self.backend.publish(self._shared_version + 1, time.time(), snapshot_payload(data))
+            self._shared_version += 1
+            servicos.pipeline_metrics.inc("enchentes_snapshot_compartilhado_total", resultado="publicado")
+        return snapshot
+    
+    def _publish(self, snapshot):
+        with servicos.pipeline_metrics.stage("renderizar"):
+            for regiao in snapshot.regioes.values():
+                regiao.feed_html, regiao.metrics_html
+        # Troca de referência atômica: leitores veem o snapshot antigo ou o novo, nunca um parcial
+        self._snapshot = snapshot
+        servicos.pipeline_metrics.set("enchentes_snapshot_versao", snapshot.version)
+        return snapshot
+    
+    def _adopt(self):
+        """Troca o snapshot local pelo compartilhado, se ele mudou; devolve quando foi publicado.
+        
+        A versão local continua sendo um contador do processo (é o que os fragments
+        comparam); a compartilhada só decide se há algo novo para adotar.
+        """
+        meta = self.backend.meta()
+        if meta is None:
+            return None
+        versao, publicado_em = meta
+        if versao != self._shared_version:
+            carregado = self.backend.load()
+            if carregado is None:
+                return None
+            versao, publicado_em, payload = carregado
+            data = snapshot_data(payload)
+            self._publish(Snapshot.from_data(self._snapshot.version + 1, data))
+            self._shared_version = versao
+            replicate_archive(data)
+            servicos.pipeline_metrics.inc("enchentes_snapshot_compartilhado_total", resultado="adotado")
+        self._last_refresh = publicado_em
+        return publicado_em
+    
+    def sync(self, pedido=False):
+        """Modo compartilhado: adota o snapshot de outra réplica ou, se ele venceu, atualiza (uma réplica só)"""
+        limite = self.min_interval if pedido else self.interval
+        publicado_em = self._adopt()
+        if publicado_em is not None and time.time() - publicado_em < limite:
+            return
+        token = self.backend.acquire(SNAPSHOT_LOCK_TTL)
+        if token is None:
+            # Outra réplica está buscando as fontes; a próxima verificação adota o resultado
+            servicos.pipeline_metrics.inc("enchentes_snapshot_compartilhado_total", resultado="aguardado")
+            return
+        try:
+            # Conferência dupla: outra réplica pode ter publicado entre a leitura e a trava
+            publicado_em = self._adopt()
+            if publicado_em is None or time.time() - publicado_em >= limite:
+                self.refresh_now()
+        finally:
+            self.backend.release(token)
+    
+    def _cycle(self, pedido):
+        if self.backend is None:
+            self.refresh_now()
+            return
+        try:
+            self.sync(pedido)
+        except (OSError, SnapshotCacheError):
+            # Cache compartilhado fora do ar: a réplica segue sozinha até ele voltar
+            servicos.pipeline_metrics.inc("enchentes_snapshot_compartilhado_total", resultado="indisponivel")
+            if time.time() - (self._last_refresh or 0) >= (self.min_interval if pedido else self.interval):
+                self.refresh_now(compartilhar=False)
+    
+    def _fail(self, etapa, erro):
+        """Registra uma falha em segundo plano (log, contador e `last_error`); o último snapshot continua valendo"""
+        log.exception("Falha na atualização em segundo plano (%s); mantido o snapshot %d", etapa, self._snapshot.version)
+        servicos.pipeline_metrics.inc("enchentes_atualizacao_erros_total", etapa=etapa, tipo=type(erro).__name__)
+        self.last_error = (time.time(), f"{type(erro).__name__}: {erro}")
+    
+    def _run(self):
+        # Abre o arquivo (e monta o índice de quase-duplicatas) aqui, não na primeira busca de uma página
+        try:
+            with servicos.pipeline_metrics.stage("aquecer"):
+                servicos.news_store.warm()
+        except Exception as e:
+            self._fail("aquecer", e)  # a primeira atualização tenta de novo
+        pedido = False
+        while True:
+            try:
+                self._cycle(pedido)
+            except Exception as e:
+                self._fail("ciclo", e)
+            self._wake.wait(self.interval if self.backend is None else self.sync_interval)
+            pedido = self._wake.is_set()
+            # Pedido logo depois de uma atualização: espera o fim da janela mínima;
+            # o evento só é limpo depois, então cliques durante a espera são absorvidos
+            espera = self.next_refresh_at() - time.time()
+            if pedido and espera > 0:
+                time.sleep(espera)
+            self._wake.clear()
@@ -0,0 +1,147 @@
+"""Séries horárias de chuva por região e seus acumulados móveis"""
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .datas import TZ_LOCAL
+
+CHUVA_JANELAS = (1, 24, 48, 72)  # horas
+# Acumulados de referência para alerta (mm na janela)
+CHUVA_LIMIARES = {1: 30.0, 24: 80.0, 48: 100.0, 72: 150.0}
+CHUVA_DIAS_INICIAIS = 31  # histórico pedido na primeira busca (cobre o mês corrente)
+CHUVA_DIAS_MAX = 92       # limite de past_days da Open-Meteo
+
+class RainfallSeries:
+    """Série horária de chuva de uma região, em colunas NumPy que só crescem no fim.
+    
+    `_acumulado[i]` guarda a soma das `i` primeiras horas, então o total de qualquer
+    janela é uma subtração. Cada `extend` processa só as horas novas: acumulados
+    móveis e excedências dos limiares custam O(k) para k amostras novas.
+    """
+    
+    def __init__(self):
+        self.inicio = None  # primeira hora da série (epoch // 3600)
+        self.n = 0
+        self._mm = np.zeros(0)
+        self._acumulado = np.zeros(1)
+        self.excedencias = dict.fromkeys(CHUVA_JANELAS, 0)  # horas com a janela acima do limiar
+        self.maximos = dict.fromkeys(CHUVA_JANELAS, 0.0)
+    
+    @property
+    def fim(self):
+        """Próxima hora esperada (ou None com a série vazia)"""
+        return None if self.inicio is None else self.inicio + self.n
+    
+    def _reserve(self, total):
+        """Crescimento geométrico: anexar continua amortizado O(1) por amostra"""
+        if total > len(self._mm):
+            capacidade = max(total, 2 * len(self._mm), 256)
+            mm = np.zeros(capacidade)
+            mm[:self.n] = self._mm[:self.n]
+            acumulado = np.zeros(capacidade + 1)
+            acumulado[:self.n + 1] = self._acumulado[:self.n + 1]
+            self._mm, self._acumulado = mm, acumulado
+    
+    def extend(self, horas, mm):
+        """Anexa amostras (horas epoch em ordem crescente); horas já gravadas são ignoradas.
+        
+        Horas sem amostra entre o fim da série e a nova amostra contam como zero.
+        Devolve quantas horas foram acrescentadas.
+        """
+        horas = np.asarray(horas, dtype=np.int64)
+        mm = np.nan_to_num(np.asarray(mm, dtype=float))
+        if self.inicio is None:
+            if not len(horas):
+                return 0
+            self.inicio = int(horas[0])
+        novas = horas >= self.fim
+        horas, mm = horas[novas], mm[novas]
+        if not len(horas):
+            return 0
+        
+        k = int(horas[-1]) - self.fim + 1
+        bloco = np.zeros(k)
+        bloco[horas - self.fim] = mm
+        antes = self.n
+        self._reserve(antes + k)
+        self._mm[antes:antes + k] = bloco
+        self._acumulado[antes + 1:antes + k + 1] = self._acumulado[antes] + np.cumsum(bloco)
+        self.n += k
+        
+        # Acumulado de cada janela terminando em cada hora nova, sem revisitar o histórico
+        fins = np.arange(antes + 1, self.n + 1)
+        for janela in CHUVA_JANELAS:
+            somas = self._acumulado[fins] - self._acumulado[np.maximum(fins - janela, 0)]
+            self.excedencias[janela] += int(np.count_nonzero(somas >= CHUVA_LIMIARES[janela]))
+            self.maximos[janela] = max(self.maximos[janela], float(somas.max()))
+        return k
+    
+    def rolling(self, janela):
+        """Chuva nas últimas `janela` horas da série"""
+        return float(self._acumulado[self.n] - self._acumulado[max(self.n - janela, 0)])
+    
+    def total_since(self, hora):
+        """Chuva da hora `hora` (epoch // 3600) até o fim da série"""
+        i = min(max(hora - self.inicio, 0), self.n)
+        return float(self._acumulado[self.n] - self._acumulado[i])
+    
+    def hourly(self, horas):
+        """Últimas `horas` amostras como (datetime local, mm)"""
+        inicio = max(self.n - horas, 0)
+        return [
+            (datetime.fromtimestamp((self.inicio + i) * 3600, TZ_LOCAL), float(self._mm[i]))
+            for i in range(inicio, self.n)
+        ]
+    
+    def daily(self, dias):
+        """Totais dos últimos `dias` dias (calendário local) como ("dd/mm", mm)"""
+        ultima = datetime.fromtimestamp((self.fim - 1) * 3600, TZ_LOCAL)
+        meia_noite = ultima.replace(hour=0, minute=0, second=0, microsecond=0)
+        limites = [int((meia_noite - timedelta(days=d)).timestamp()) // 3600 for d in range(dias - 1, -1, -1)]
+        indices = np.clip(np.array(limites + [self.fim]) - self.inicio, 0, self.n)
+        totais = np.diff(self._acumulado[indices])
+        return [
+            ((meia_noite - timedelta(days=dias - 1 - i)).strftime("%d/%m"), round(float(total), 1))
+            for i, total in enumerate(totais)
+        ]
+    
+    def summary(self, dias=14, horas=72):
+        """Indicadores para o snapshot (cópia pequena, independente dos arrays)"""
+        ultima = datetime.fromtimestamp((self.fim - 1) * 3600, TZ_LOCAL)
+        inicio_mes = ultima.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return {
+            "ultima_hora": ultima,
+            "janelas": {janela: round(self.rolling(janela), 1) for janela in CHUVA_JANELAS},
+            "mes": round(self.total_since(int(inicio_mes.timestamp()) // 3600), 1),
+            "excedencias": dict(self.excedencias),
+            "maximos": dict(self.maximos),
+            "diaria": self.daily(dias),
+            "horaria": self.hourly(horas),
+        }
+
+class RainfallStore:
+    """Séries de chuva por região, alimentadas a cada busca da Open-Meteo"""
+    
+    def __init__(self):
+        self.series = {}
+        self._lock = threading.Lock()
+    
+    def extend(self, regiao, horas, mm):
+        with self._lock:
+            return self.series.setdefault(regiao, RainfallSeries()).extend(horas, mm)
+    
+    def past_days(self, regioes, agora=None):
+        """Dias de histórico a pedir: o suficiente para cobrir o trecho que falta na série mais atrasada"""
+        with self._lock:
+            fins = [self.series[r].fim for r in regioes if r in self.series and self.series[r].n]
+        if len(fins) < len(regioes):
+            return CHUVA_DIAS_INICIAIS
+        hora_atual = int((agora or time.time()) // 3600)
+        return int(np.clip(np.ceil((hora_atual - min(fins) + 1) / 24), 1, CHUVA_DIAS_MAX))
+    
+    def summary(self, regiao):
+        with self._lock:
+            serie = self.series.get(regiao)
+            return serie.summary() if serie and serie.n else None
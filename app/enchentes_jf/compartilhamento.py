@@ -0,0 +1,222 @@
+"""Snapshot compartilhado entre réplicas: diretório local (flock) ou servidor Redis (RESP)"""
+import json
+import os
+import socket
+import threading
+from datetime import datetime
+from types import MappingProxyType
+from urllib.parse import urlsplit
+
+from .arquivo import DATA_DIR
+from .ocorrencias import OccurrenceLayer
+
+SNAPSHOT_SYNC_INTERVAL = 5  # segundos entre verificações da versão compartilhada
+SNAPSHOT_LOCK_TTL = 120     # trava de atualização expira se a réplica que atualiza morrer
+
+class SnapshotCacheError(Exception):
+    """Erro devolvido pelo servidor do cache compartilhado"""
+
+def _to_json(valor):
+    """Estrutura do snapshot em tipos JSON (datas, chaves inteiras e camadas marcadas)"""
+    if isinstance(valor, (dict, MappingProxyType)):
+        if all(isinstance(k, str) for k in valor):
+            return {k: _to_json(v) for k, v in valor.items()}
+        return {"__int__": {str(k): _to_json(v) for k, v in valor.items()}}
+    if isinstance(valor, (list, tuple)):
+        return [_to_json(v) for v in valor]
+    if isinstance(valor, datetime):
+        return {"__datetime__": valor.isoformat()}
+    if isinstance(valor, OccurrenceLayer):
+        return {"__ocorrencias__": _to_json(valor.registros)}
+    return valor
+
+def _from_json(obj):
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    if "__int__" in obj:
+        return {int(k): v for k, v in obj["__int__"].items()}
+    if "__ocorrencias__" in obj:
+        return OccurrenceLayer(obj["__ocorrencias__"])
+    return obj
+
+def snapshot_payload(data):
+    """Serializa o resultado de `merge_results` (JSON: nada de pickle vindo de outra máquina)"""
+    return json.dumps(_to_json(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def snapshot_data(payload):
+    return json.loads(payload, object_hook=_from_json)
+
+def _parse_meta(linha):
+    versao, publicado_em = linha.split()
+    return int(versao), float(publicado_em)
+
+class FileSnapshotBackend:
+    """Snapshot compartilhado pelos processos de um mesmo host, em um diretório local.
+    
+    O arquivo começa com a linha "versão publicado_em", então conferir a versão lê
+    só a primeira linha. A publicação é atômica (arquivo temporário + os.replace) e
+    a trava de atualização é um flock: o sistema a libera se o processo morrer.
+    """
+    
+    def __init__(self, directory):
+        import fcntl  # só POSIX; em outros sistemas use o backend Redis
+        self._fcntl = fcntl
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "snapshot.json")
+        self.lock_path = os.path.join(directory, "atualizacao.lock")
+        self._travas = {}  # token -> descritor com o flock
+    
+    def meta(self):
+        """(versão, publicado_em) do snapshot compartilhado, ou None"""
+        try:
+            with open(self.path, "rb") as f:
+                return _parse_meta(f.readline())
+        except FileNotFoundError:
+            return None
+    
+    def load(self):
+        """(versão, publicado_em, payload) do snapshot compartilhado, ou None"""
+        try:
+            with open(self.path, "rb") as f:
+                cabecalho, payload = f.readline(), f.read()
+        except FileNotFoundError:
+            return None
+        return (*_parse_meta(cabecalho), payload)
+    
+    def publish(self, versao, publicado_em, payload):
+        temporario = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(f"{versao} {publicado_em}\n".encode())
+            f.write(payload)
+        os.replace(temporario, self.path)
+    
+    def acquire(self, ttl):
+        """Token da trava de atualização, ou None se outra réplica a detém (`ttl` não se aplica)"""
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            self._fcntl.flock(fd, self._fcntl.LOCK_EX | self._fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        token = os.urandom(8).hex()
+        self._travas[token] = fd
+        return token
+    
+    def release(self, token):
+        fd = self._travas.pop(token, None)
+        if fd is not None:
+            os.close(fd)  # fechar o descritor libera o flock
+
+# Apaga a trava só se ela ainda tiver o token de quem a obteve
+RESP_LIBERAR_TRAVA = (
+    'if redis.call("GET", KEYS[1]) == ARGV[1] then return redis.call("DEL", KEYS[1]) else return 0 end'
+)
+
+class RespSnapshotBackend:
+    """Snapshot compartilhado entre hosts em um servidor Redis (protocolo RESP, sem dependência extra).
+    
+    Metadados e conteúdo são gravados juntos com MSET e lidos juntos com MGET; a
+    trava é um SET NX PX com token aleatório, removida só por quem a detém.
+    """
+    
+    def __init__(self, url, prefixo="enchentes:snapshot", timeout=5):
+        partes = urlsplit(url)
+        self.host = partes.hostname or "localhost"
+        self.port = partes.port or 6379
+        self.db = int(partes.path.strip("/") or 0)
+        self.password = partes.password
+        self.timeout = timeout
+        self.keys = {nome: f"{prefixo}:{nome}" for nome in ("meta", "dados", "trava")}
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+        if self.password:
+            self._send("AUTH", self.password)
+        if self.db:
+            self._send("SELECT", self.db)
+    
+    def _close(self):
+        if self._sock is not None:
+            self._reader.close()
+            self._sock.close()
+        self._sock = self._reader = None
+    
+    def _send(self, *args):
+        partes = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            arg = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            partes.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        self._sock.sendall(b"".join(partes))
+        return self._reply()
+    
+    def _reply(self):
+        linha = self._reader.readline()
+        if not linha.endswith(b"\r\n"):
+            raise ConnectionError("conexão encerrada pelo servidor")
+        tipo, resto = linha[:1], linha[1:-2]
+        if tipo == b"+":
+            return resto.decode()
+        if tipo == b"-":
+            raise SnapshotCacheError(resto.decode())
+        if tipo == b":":
+            return int(resto)
+        if tipo == b"$":
+            tamanho = int(resto)
+            return None if tamanho < 0 else self._reader.read(tamanho + 2)[:-2]
+        if tipo == b"*":
+            tamanho = int(resto)
+            return None if tamanho < 0 else [self._reply() for _ in range(tamanho)]
+        raise ConnectionError(f"resposta RESP inválida: {linha[:40]!r}")
+    
+    def command(self, *args):
+        """Executa um comando; reconecta uma vez se a conexão tiver caído"""
+        with self._lock:
+            for tentativa in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._send(*args)
+                except OSError:
+                    self._close()
+                    if tentativa:
+                        raise
+    
+    def meta(self):
+        meta = self.command("GET", self.keys["meta"])
+        return _parse_meta(meta) if meta else None
+    
+    def load(self):
+        meta, payload = self.command("MGET", self.keys["meta"], self.keys["dados"])
+        return (*_parse_meta(meta), payload) if meta and payload else None
+    
+    def publish(self, versao, publicado_em, payload):
+        self.command("MSET", self.keys["meta"], f"{versao} {publicado_em}", self.keys["dados"], payload)
+    
+    def acquire(self, ttl):
+        token = os.urandom(8).hex()
+        resposta = self.command("SET", self.keys["trava"], token, "NX", "PX", int(ttl * 1000))
+        return token if resposta == "OK" else None
+    
+    def release(self, token):
+        # Compara e apaga no servidor, atomicamente: se a trava expirou e outra
+        # réplica a obteve entre uma leitura e um DEL separados, ela seria apagada
+        self.command("EVAL", RESP_LIBERAR_TRAVA, 1, self.keys["trava"], token)
+
+def snapshot_backend_from_env():
+    """Backend definido por ENCHENTES_SNAPSHOT_CACHE.
+    
+    Vazio: cada processo busca as fontes sozinho. "arquivo" (ou "arquivo:/diretório"):
+    réplicas do mesmo host. "redis://[:senha@]host:porta/db": réplicas em vários hosts.
+    """
+    destino = os.getenv("ENCHENTES_SNAPSHOT_CACHE", "").strip()
+    if not destino:
+        return None
+    if destino.startswith("redis://"):
+        return RespSnapshotBackend(destino)
+    if destino.split(":", 1)[0] == "arquivo":
+        return FileSnapshotBackend(destino.partition(":")[2] or os.path.join(DATA_DIR, "compartilhado"))
+    raise ValueError(f"ENCHENTES_SNAPSHOT_CACHE não reconhecido: {destino!r}")
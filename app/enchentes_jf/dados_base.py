@@ -0,0 +1,74 @@
+"""Dados base por região (boletins e números de referência), usados enquanto as fontes não respondem"""
+
+class DataManager:
+    """Gerencia dados com fallback para modo offline"""
+    
+    def __init__(self):
+        self.last_update = None
+        self.cache_duration = 300  # 5 minutos
+        
+        # Dados base históricos por região (fallback)
+        self.historical_data = {
+            "juiz-de-fora": {
+                "mortes": 46,
+                "desaparecidos": 21,
+                "desabrigados": 3400,
+                "desalojados": 400,
+                "chuva_acumulada_mes": 589.6,  # fevereiro/2026
+                "chuva_48h": 227.6,
+                "ocorrencias": 1017,
+                "data_atualizacao": "25/02/2026 16:00"
+            }
+        }
+        
+        # Ocorrências confirmadas nos boletins (situação da via e vítimas por bairro)
+        self.bairros_base = {
+            "juiz-de-fora": {
+                "Três Moinhos": {"tipo": "Deslizamento", "gravidade": "Alta", "vítimas": 5, "status": "Bloqueado"},
+                "Cidade Universitária": {"tipo": "Alagamento", "gravidade": "Alta", "chuva_mm": 221.72, "status": "Interditado"},
+                "Nossa Senhora de Lourdes": {"tipo": "Alagamento", "gravidade": "Alta", "chuva_mm": 216.19, "status": "Interditado"},
+                "Centro": {"tipo": "Alagamento", "gravidade": "Média", "chuva_mm": 215.43, "status": "Parcial"},
+                "Santa Cruz": {"tipo": "Deslizamento", "gravidade": "Alta", "vítimas": 3, "status": "Bloqueado"},
+                "Benfica": {"tipo": "Enchente", "gravidade": "Média", "status": "Restrito"},
+                "São Pedro": {"tipo": "Deslizamento", "gravidade": "Alta", "vítimas": 2, "status": "Bloqueado"},
+                "Mariano Procópio": {"tipo": "Alagamento", "gravidade": "Média", "status": "Parcial"},
+                "São Mateus": {"tipo": "Enchente", "gravidade": "Alta", "status": "Interditado"},
+                "Granjas Betânia": {"tipo": "Deslizamento", "gravidade": "Crítica", "vítimas": 8, "status": "Bloqueado"}
+            }
+        }
+        
+        # Boletins de Juiz de Fora (região padrão)
+        self.noticias_base = [
+            {
+                "fonte": "Defesa Civil MG",
+                "horario": "25/02 16:00",
+                "titulo": "Balanço atualizado: 46 óbitos confirmados em Juiz de Fora",
+                "resumo": "Equipes continuam buscas por 21 desaparecidos. Mais de 3.400 pessoas estão desabrigadas.",
+                "tipo": "Boletim Oficial",
+                "url": "https://www.defesacivil.mg.gov.br/noticias"
+            },
+            {
+                "fonte": "G1 Zona da Mata",
+                "horario": "25/02 14:30",
+                "titulo": "Temporal em Juiz de Fora e Ubá deixa rastro de destruição",
+                "resumo": "Chuva volumosa atingiu a região entre os dias 22 e 24 de fevereiro.",
+                "tipo": "Reportagem",
+                "url": "https://g1.globo.com/mg/zona-da-mata/"
+            },
+            {
+                "fonte": "CNN Brasil",
+                "horario": "25/02 12:00",
+                "titulo": "Vídeo: Morro desliza sobre casas no bairro Três Moinhos",
+                "resumo": "Imagens mostram momento exato do deslizamento que matou 5 pessoas.",
+                "tipo": "Vídeo",
+                "url": "https://www.cnnbrasil.com.br"
+            },
+            {
+                "fonte": "Prefeitura JF",
+                "horario": "24/02 18:00",
+                "titulo": "Fevereiro de 2026 é o mês mais chuvoso da história de Juiz de Fora",
+                "resumo": "Já são 589,6mm de chuva acumulada, superando em 270% a média histórica.",
+                "tipo": "Comunicado",
+                "url": "https://www.pjf.mg.gov.br"
+            }
+        ]
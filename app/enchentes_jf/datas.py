@@ -0,0 +1,49 @@
+"""Normalização das datas das fontes para o fuso de Juiz de Fora"""
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from zoneinfo import ZoneInfo
+
+TZ_LOCAL = ZoneInfo("America/Sao_Paulo")
+
+def parse_timestamp(value, now=None):
+    """Converte qualquer formato de data das fontes em datetime com fuso (America/Sao_Paulo).
+    
+    Aceita datetime, struct_time (feedparser, em UTC), "25/02 16:00", "25/02/2026 16:00",
+    ISO 8601 (NewsAPI) e RFC 822 (RSS). Devolve None se não reconhecer o valor.
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=TZ_LOCAL) if value.tzinfo is None else value.astimezone(TZ_LOCAL)
+    if isinstance(value, time.struct_time):
+        return datetime(*value[:6], tzinfo=timezone.utc).astimezone(TZ_LOCAL)
+    
+    value = str(value).strip()
+    now = now or datetime.now(TZ_LOCAL)
+    
+    match = re.fullmatch(r"(\d{1,2})/(\d{1,2})(?:/(\d{4}))?\s+(\d{1,2}):(\d{2})", value)
+    if match:
+        dia, mes, ano, hora, minuto = match.groups()
+        try:
+            dt = datetime(int(ano or now.year), int(mes), int(dia), int(hora), int(minuto), tzinfo=TZ_LOCAL)
+        except ValueError:
+            return None
+        # Sem ano explícito, uma data "no futuro" é do ano anterior
+        if not ano and dt > now + timedelta(days=1):
+            dt = dt.replace(year=dt.year - 1)
+        return dt
+    
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            dt = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return dt.replace(tzinfo=TZ_LOCAL) if dt.tzinfo is None else dt.astimezone(TZ_LOCAL)
+
+def format_horario(ts):
+    """Horário de exibição a partir de um timestamp Unix"""
+    return datetime.fromtimestamp(ts, TZ_LOCAL).strftime("%d/%m %H:%M")
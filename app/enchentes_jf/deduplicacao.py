@@ -0,0 +1,101 @@
+"""Detecção de quase-duplicatas (MinHash + LSH) entre notícias de fontes diferentes"""
+import zlib
+
+import numpy as np
+
+from .metricas import scan_metrics
+from .regioes import regions_in_text
+from .textos import tokenize
+
+# Resumo genérico do scraping: igual para todas as notícias do site, não entra na comparação
+RESUMO_SCRAPING = "Notícia publicada no site da"
+
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16                  # 16 bandas x 4 linhas: limiar efetivo ~ (1/16) ** (1/4) = 0,5
+NEAR_DUPLICATE_THRESHOLD = 0.5  # Jaccard estimado mínimo para juntar ao mesmo grupo
+_MINHASH_PRIME = np.uint64(4294967311)  # primo > 2**32
+
+class NearDuplicateIndex:
+    """Agrupa notícias quase idênticas com MinHash sobre os tokens de título + resumo.
+    
+    Cada assinatura é dividida em bandas; notícias que coincidem em alguma banda são
+    candidatas e só elas são comparadas. O custo por notícia nova depende do número de
+    candidatas, não do tamanho do arquivo.
+    
+    Textos quase iguais podem contar fatos diferentes ("Chuva em Ubá deixa 5 mortos" x
+    "Chuva em Juiz de Fora deixa 5 mortos"): o último elemento da assinatura é a marca
+    das regiões citadas e dos números extraídos, e só se juntam notícias com a mesma.
+    """
+    
+    def __init__(self, permutations=MINHASH_PERMUTATIONS, bands=LSH_BANDS,
+                 threshold=NEAR_DUPLICATE_THRESHOLD, seed=20260225):
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 31, size=permutations, dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 31, size=permutations, dtype=np.uint64)
+        self.bands = bands
+        self.rows = permutations // bands
+        self.threshold = threshold
+        self._buckets = [dict() for _ in range(bands)]
+        self._signatures = {}   # id -> assinatura
+        self._clusters = {}     # id -> id do grupo
+    
+    def __len__(self):
+        return len(self._signatures)
+    
+    @staticmethod
+    def mark(texto):
+        """Regiões citadas e métricas extraídas do texto, resumidas em um inteiro de 32 bits"""
+        fatos = (sorted(regions_in_text(texto)), sorted(set(scan_metrics(texto))))
+        return zlib.crc32(repr(fatos).encode("utf-8"))
+    
+    def signature(self, noticia):
+        """MinHash dos tokens seguido da marca (`mark`); None se o texto não tem tokens"""
+        resumo = noticia.get("resumo") or ""
+        if resumo.startswith(RESUMO_SCRAPING):
+            resumo = ""
+        texto = f"{noticia.get('titulo', '')} {resumo}"
+        tokens = set(tokenize(texto))
+        if not tokens:
+            return None
+        hashes = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in tokens), dtype=np.uint64, count=len(tokens))
+        # Permutações (a*x + b) mod p de todos os tokens de uma vez; mínimo por permutação
+        minhash = ((np.outer(self._a, hashes) + self._b[:, None]) % _MINHASH_PRIME).min(axis=1)
+        return np.append(minhash, self.mark(texto)).astype(np.uint32)
+    
+    def is_current(self, signature):
+        """Assinatura com a marca (as gravadas antes dela têm só o MinHash)"""
+        return signature is not None and len(signature) == len(self._a) + 1
+    
+    def _band_keys(self, signature):
+        raw = signature[:-1].tobytes()
+        step = self.rows * signature.itemsize
+        return [raw[i * step:(i + 1) * step] for i in range(self.bands)]
+    
+    def add(self, doc_id, signature, cluster_id=None):
+        """Indexa a notícia e devolve o id do grupo a que ela pertence"""
+        if doc_id in self._clusters:
+            return self._clusters[doc_id]
+        if signature is None:
+            self._clusters[doc_id] = cluster_id or doc_id
+            return self._clusters[doc_id]
+        
+        keys = self._band_keys(signature)
+        if cluster_id is None:
+            candidatos = set()
+            for bucket, key in zip(self._buckets, keys):
+                candidatos.update(bucket.get(key, ()))
+            melhor, melhor_sim = None, self.threshold
+            for candidato in candidatos:
+                outra = self._signatures[candidato]
+                if outra[-1] != signature[-1]:
+                    continue  # outra região ou outros números: outra história
+                sim = float(np.mean(outra[:-1] == signature[:-1]))
+                if sim >= melhor_sim:
+                    melhor, melhor_sim = candidato, sim
+            cluster_id = self._clusters[melhor] if melhor else doc_id
+        
+        for bucket, key in zip(self._buckets, keys):
+            bucket.setdefault(key, []).append(doc_id)
+        self._signatures[doc_id] = signature
+        self._clusters[doc_id] = cluster_id
+        return cluster_id
@@ -0,0 +1,383 @@
+"""Busca às fontes (páginas da Defesa Civil, feeds RSS, NewsAPI e Open-Meteo) com prazo total"""
+import codecs
+import importlib.util
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+
+import numpy as np
+
+from . import servicos
+from .datas import TZ_LOCAL, parse_timestamp
+from .deduplicacao import RESUMO_SCRAPING
+from .instrumentacao import _fetch_context, current_source
+from .rede import UpstreamError, content_digest
+from .regioes import REGIOES, is_relevant
+
+# requests e feedparser só são importados no primeiro uso (dentro da busca às
+# fontes, em segundo plano): o primeiro render da página não espera por eles.
+FEEDPARSER_AVAILABLE = importlib.util.find_spec("feedparser") is not None
+
+# =============================================================================
+# PÁGINAS, FEEDS E NEWSAPI
+# =============================================================================
+
+# Fontes consultadas a cada atualização (uma única vez, para todas as regiões que cobrem)
+FONTES_SCRAPING = [
+    {"url": "https://www.defesacivil.mg.gov.br/", "nome": "Defesa Civil MG"},
+    {"url": "https://www.pjf.mg.gov.br/defesa_civil/noticias.php", "nome": "Defesa Civil JF", "regioes": ["juiz-de-fora"]}
+]
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+
+FEEDS_RSS = [
+    {"url": "https://g1.globo.com/rss/g1/mg/zona-da-mata/", "nome": "G1 Zona da Mata (RSS)"},
+    {"url": "https://www.em.com.br/rss/gerais.xml", "nome": "Estado de Minas (RSS)"}
+]
+
+SCRAPING_MAX_LINKS = 15
+SCRAPING_CHUNK_SIZE = 16 * 1024
+
+class LinkExtractor(HTMLParser):
+    """Coleta os primeiros `limit` links <a href> de um HTML recebido em blocos"""
+    
+    def __init__(self, limit=SCRAPING_MAX_LINKS):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.links = []
+        self._href = None
+        self._texto = []
+    
+    @property
+    def done(self):
+        return len(self.links) >= self.limit
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == "a" and not self.done:
+            href = dict(attrs).get("href")
+            if href is not None:
+                self._href, self._texto = href, []
+    
+    def handle_data(self, data):
+        if self._href is not None:
+            self._texto.append(data)
+    
+    def handle_endtag(self, tag):
+        if tag == "a" and self._href is not None:
+            self.links.append((self._href, "".join(self._texto)))
+            self._href = None
+
+def _response_decoder(response, primeiro_bloco):
+    """Decodificador incremental: charset do cabeçalho, da tag <meta> ou UTF-8"""
+    cabecalho = re.search(r'charset=["\']?([\w-]+)', response.headers.get("Content-Type", ""), re.IGNORECASE)
+    meta = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', primeiro_bloco[:4096], re.IGNORECASE)
+    if cabecalho:
+        charset = cabecalho.group(1)
+    elif meta:
+        charset = meta.group(1).decode("ascii")
+    else:
+        charset = "utf-8"
+    try:
+        return codecs.getincrementaldecoder(charset)(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+def extract_links(response, limit=SCRAPING_MAX_LINKS, chunk_size=SCRAPING_CHUNK_SIZE):
+    """Lê o corpo em blocos e para assim que encontrar `limit` links"""
+    parser = LinkExtractor(limit)
+    decoder = None
+    for bloco in response.iter_content(chunk_size=chunk_size):
+        if decoder is None:
+            decoder = _response_decoder(response, bloco)
+        parser.feed(decoder.decode(bloco))
+        if parser.done:
+            break
+    return parser.links
+
+def _parse_defesa_civil_page(fonte, response):
+    """Extrai links de notícias de uma página da Defesa Civil"""
+    noticias = []
+    for href, texto in extract_links(response):
+        # Completar URL relativa
+        if href.startswith('/'):
+            href = fonte["url"].rstrip('/') + href
+        elif not href.startswith(('http://', 'https://')):
+            continue
+        
+        if len(texto.strip()) > 20 and is_relevant(texto):
+            noticias.append({
+                "fonte": fonte["nome"],
+                "titulo": texto.strip()[:100] + "...",
+                "resumo": f"{RESUMO_SCRAPING} {fonte['nome']}",
+                "tipo": "Boletim",
+                "url": href
+            })
+    return noticias
+
+def scrape_page(fonte):
+    """Scraping de uma única página da Defesa Civil (erros sobem para o circuit breaker)"""
+    return servicos.http_client.fetch_parsed(fonte["url"], lambda r: _parse_defesa_civil_page(fonte, r), stream=True)
+
+RSS_MAX_ENTRADAS = 5  # primeiras entradas de cada feed consideradas
+# Um <item> (RSS) ou <entry> (Atom) completo, do jeito que veio no XML
+FEED_ITEM_RE = re.compile(rb"<(item|entry)\b.*?</\1\s*>", re.DOTALL)
+
+def _rss_entry(entry, fonte):
+    """Notícia de uma entrada do feed, ou None se ela não for relevante"""
+    titulo = entry.get('title', '')
+    if not is_relevant(titulo):
+        return None
+    return {
+        "fonte": fonte,
+        "titulo": titulo,
+        "publicado_em": parse_timestamp(
+            entry.get('published_parsed') or entry.get('published') or entry.get('updated')
+        ),
+        "resumo": entry.get('summary', '')[:150] + "...",
+        "tipo": "RSS",
+        "url": entry.get('link', '#')
+    }
+
+class FeedEntryCache:
+    """Entradas já processadas de cada feed, pela impressão digital do XML de cada uma.
+    
+    Quando o feed muda, só as entradas novas (ou editadas) passam pelo feedparser:
+    o documento entregue a ele mantém o cabeçalho do canal e leva apenas esses
+    itens. As demais reaproveitam a notícia (ou o descarte) da vez anterior.
+    """
+    
+    def __init__(self):
+        self._feeds = {}  # url -> (nome do canal, {hash do item: notícia ou None})
+        self._lock = threading.Lock()
+    
+    def parse(self, url, body, headers):
+        import feedparser
+        todos = list(FEED_ITEM_RE.finditer(body))
+        itens = todos[:RSS_MAX_ENTRADAS]
+        digests = [content_digest(m.group()) for m in itens]
+        with self._lock:
+            fonte, conhecidos = self._feeds.get(url, (None, {}))
+        
+        novos = [(d, m) for d, m in zip(digests, itens) if d not in conhecidos]
+        entradas = dict(conhecidos)
+        if novos or fonte is None:
+            documento = body
+            if todos:
+                documento = body[:todos[0].start()] + b"".join(m.group() for _, m in novos) + body[todos[-1].end():]
+            feed = feedparser.parse(documento, response_headers=headers)
+            fonte = feed.feed.get('title', 'RSS')
+            if len(feed.entries) != len(novos):
+                # XML que a divisão por itens não reproduz: processa o feed inteiro, sem cache
+                feed = feedparser.parse(body, response_headers=headers)
+                with self._lock:
+                    self._feeds.pop(url, None)
+                return [n for n in (_rss_entry(e, fonte) for e in feed.entries[:RSS_MAX_ENTRADAS]) if n]
+            entradas.update((d, _rss_entry(e, fonte)) for (d, _), e in zip(novos, feed.entries))
+        
+        servicos.pipeline_metrics.inc("enchentes_entradas_feed_total", len(novos), fonte=current_source(), resultado="nova")
+        servicos.pipeline_metrics.inc("enchentes_entradas_feed_total", len(itens) - len(novos), fonte=current_source(), resultado="reaproveitada")
+        with self._lock:
+            # Só as entradas ainda presentes no feed continuam guardadas
+            self._feeds[url] = (fonte, {d: entradas[d] for d in digests})
+        return [entradas[d] for d in digests if entradas[d] is not None]
+
+servicos.feed_entry_cache = FeedEntryCache()
+
+def _parse_rss_response(response):
+    """Filtra as entradas relevantes de um feed já baixado (só as novas são processadas)"""
+    headers = {k.lower(): v for k, v in response.headers.items()}
+    return servicos.feed_entry_cache.parse(response.url, response.content, headers)
+
+def parse_rss_feed(feed):
+    """Parse de um único feed RSS (erros sobem para o circuit breaker)"""
+    if not FEEDPARSER_AVAILABLE:
+        return []
+    return servicos.http_client.fetch_parsed(feed["url"], _parse_rss_response)
+
+def _parse_news_api_response(response):
+    """Converte a resposta da NewsAPI em notícias"""
+    data = response.json()
+    
+    noticias = []
+    if data.get("status") == "ok":
+        for article in data.get("articles", []):
+            noticias.append({
+                "fonte": article.get("source", {}).get("name", "NewsAPI"),
+                "titulo": article.get("title", ""),
+                "publicado_em": parse_timestamp(article.get("publishedAt")),
+                "resumo": (article.get("description", "") or "")[:150] + "...",
+                "tipo": "API",
+                "url": article.get("url", "#")
+            })
+    return noticias
+
+def _news_api_key():
+    try:
+        import streamlit as st  # já carregado pela página; fora dela (API, testes) vale só a variável
+        return st.secrets.get("NEWS_API_KEY", os.getenv("NEWS_API_KEY", ""))
+    except Exception as e:
+        # Sem secrets.toml configurado (ou sem Streamlit)
+        return os.getenv("NEWS_API_KEY", "")
+
+def news_api_query():
+    """Uma única consulta para todas as regiões: ("Juiz de Fora" OR "Ubá" ...) AND (enchente OR ...)"""
+    cidades = " OR ".join(f'"{r["nome"]}"' for r in REGIOES.values())
+    return f"({cidades}) AND (enchente OR deslizamento OR chuva)"
+
+def fetch_news_api():
+    """API de notícias com chave de secrets (erros sobem para o circuit breaker)"""
+    api_key = _news_api_key()
+    
+    if not api_key:
+        return []
+        
+    url = NEWS_API_URL
+    params = {
+        "q": news_api_query(),
+        "language": "pt",
+        "sortBy": "publishedAt",
+        "pageSize": min(5 * len(REGIOES), 100),
+        "apiKey": api_key
+    }
+    
+    return servicos.http_client.fetch_parsed(url, _parse_news_api_response, params=params)
+
+# =============================================================================
+# PREVISÃO DO TEMPO
+# =============================================================================
+
+def _summarize_weather(data):
+    """Resume a previsão de um local da Open-Meteo nos indicadores exibidos.
+    
+    A série horária é separada em observada (até a hora atual, vai para o
+    `servicos.rainfall_store`) e prevista (próximas 48 h, exibida no gráfico).
+    """
+    current = data.get("current", {})
+    daily = data.get("daily", {})
+    hourly = data.get("hourly", {})
+    
+    horas = np.asarray(hourly.get("time", []), dtype=np.int64) // 3600
+    mm = np.asarray(hourly.get("precipitation", []), dtype=float)
+    agora = int(current.get("time") or time.time()) // 3600
+    observada = horas <= agora
+    prevista = ~observada & (horas <= agora + 48)
+    # Com past_days a série diária começa dias antes de hoje: o dia vem da data, não da posição
+    hoje = datetime.fromtimestamp(agora * 3600, TZ_LOCAL).date()
+    por_dia = {
+        datetime.fromtimestamp(int(t), TZ_LOCAL).date(): v
+        for t, v in zip(daily.get("time", []), daily.get("precipitation_sum", []))
+    }
+    
+    return {
+        "temperatura": current.get("temperature_2m", "N/A"),
+        "umidade": current.get("relative_humidity_2m", "N/A"),
+        "precipitacao_atual": current.get("precipitation", 0),
+        "previsao_hoje": por_dia.get(hoje) or 0,
+        "previsao_amanha": por_dia.get(hoje + timedelta(days=1)) or 0,
+        "previsao_horaria": [
+            (datetime.fromtimestamp(int(h) * 3600, TZ_LOCAL), float(v))
+            for h, v in zip(horas[prevista], np.nan_to_num(mm[prevista]))
+        ],
+        "serie_horaria": (horas[observada], mm[observada])
+    }
+
+def _parse_weather_response(response, regioes):
+    """Previsão por região: com vários locais a Open-Meteo devolve uma lista, na ordem pedida"""
+    data = response.json()
+    locais = data if isinstance(data, list) else [data]
+    return {regiao: _summarize_weather(local) for regiao, local in zip(regioes, locais)}
+
+def fetch_weather_data():
+    """Dados meteorológicos da Open-Meteo (gratuita, não precisa de chave), todas as regiões em uma requisição"""
+    url = OPEN_METEO_URL
+    regioes = list(REGIOES)
+    params = {
+        "latitude": ",".join(str(REGIOES[r]["latitude"]) for r in regioes),
+        "longitude": ",".join(str(REGIOES[r]["longitude"]) for r in regioes),
+        "current": ["temperature_2m", "relative_humidity_2m", "precipitation", "rain"],
+        "daily": ["precipitation_sum", "rain_sum"],
+        "hourly": "precipitation",
+        "past_days": servicos.rainfall_store.past_days(regioes),
+        "timezone": "America/Sao_Paulo",
+        "timeformat": "unixtime",
+        "forecast_days": 3
+    }
+    
+    return servicos.http_client.fetch_parsed(url, lambda r: _parse_weather_response(r, regioes), params=params)
+
+# =============================================================================
+# BUSCA CONCORRENTE COM PRAZO TOTAL
+# =============================================================================
+
+REFRESH_DEADLINE = 12  # segundos para a atualização completa
+MAX_FETCH_WORKERS = 8
+
+# `regioes`: regiões cobertas pela fonte (None = todas as do registro)
+FetchTask = namedtuple("FetchTask", ["nome", "categoria", "func", "args", "regioes"], defaults=(None,))
+
+def build_fetch_tasks():
+    """Uma tarefa por URL de cada fonte, compartilhada por todas as regiões que ela cobre"""
+    tasks = [FetchTask(f["nome"], "scraping", scrape_page, (f,), f.get("regioes")) for f in FONTES_SCRAPING]
+    tasks += [FetchTask(f["nome"], "rss", parse_rss_feed, (f,), f.get("regioes")) for f in FEEDS_RSS]
+    tasks.append(FetchTask("NewsAPI", "api", fetch_news_api, ()))
+    tasks.append(FetchTask("Open-Meteo", "weather", fetch_weather_data, ()))
+    return tasks
+
+def _run_task(task):
+    """Executa uma tarefa marcando a fonte da thread para as métricas da camada HTTP"""
+    _fetch_context.fonte = task.nome
+    try:
+        with servicos.pipeline_metrics.stage("fonte", task.nome):
+            return task.func(*task.args)
+    finally:
+        _fetch_context.fonte = None
+
+def tasks_for_region(tasks, regiao):
+    return [task for task in tasks if task.regioes is None or regiao in task.regioes]
+
+def run_fetch_tasks(tasks, deadline=REFRESH_DEADLINE, health=None):
+    """Executa todas as tarefas em paralelo e devolve as que terminaram dentro do prazo.
+    
+    O resultado é {nome: (categoria, resultado, regioes)}.
+    
+    Tarefas que estouram o prazo são abandonadas: o resultado fica sem elas e a
+    atualização não espera pela fonte mais lenta além de `deadline` segundos.
+    Fontes com circuito aberto nem são disparadas.
+    """
+    health = health or servicos.source_health
+    allowed = [task for task in tasks if health.get(task.nome).allow()]
+    
+    executor = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS, thread_name_prefix="fetch")
+    futures = {executor.submit(_run_task, task): task for task in allowed}
+    results = {}
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            task = futures[future]
+            breaker = health.get(task.nome)
+            try:
+                resultado = future.result()
+            except UpstreamError as e:
+                breaker.record_failure(e, retry_after=e.retry_after)
+                resultado = None
+            except Exception as e:
+                breaker.record_failure(e)
+                resultado = None
+            else:
+                itens = len(resultado) if isinstance(resultado, list) else int(resultado is not None)
+                breaker.record_success(itens)
+                servicos.pipeline_metrics.inc("enchentes_itens_total", itens, fonte=task.nome)
+            results[task.nome] = (task.categoria, resultado, task.regioes)
+    except FuturesTimeout:
+        for future, task in futures.items():
+            if not future.done():
+                health.get(task.nome).record_failure(TimeoutError(f"sem resposta em {deadline}s"))
+                servicos.pipeline_metrics.inc("enchentes_erros_total", fonte=task.nome, etapa="prazo", tipo="TimeoutError")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
@@ -0,0 +1,182 @@
+"""Histórico das métricas em arquivos de registros de largura fixa (bruto, 5 min, hora, dia)"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from .arquivo import DATA_DIR
+from .chuva import CHUVA_JANELAS
+from .datas import TZ_LOCAL
+from .metricas import METRICAS
+
+TIMELINE_DIR = os.path.join(DATA_DIR, "historico")
+TIMELINE_CAMPOS = METRICAS + tuple(f"chuva_{j}h" for j in CHUVA_JANELAS) + ("temperatura", "umidade")
+# Registro de largura fixa (52 bytes): início do intervalo, nº de amostras e um float32 por campo (NaN = sem valor)
+TIMELINE_DTYPE = np.dtype([("ts", "<i8"), ("amostras", "<u4")] + [(c, "<f4") for c in TIMELINE_CAMPOS])
+TIMELINE_RESOLUCOES = {"5min": 300, "hora": 3600, "dia": 86400}
+TIMELINE_MAX_PONTOS = 600  # a resolução automática é a mais fina que cabe nisso
+
+class MetricsTimeline:
+    """Histórico das métricas em arquivos de registros de largura fixa, só com anexação.
+    
+    Cada região tem um arquivo bruto (um registro por atualização) e um por
+    resolução (5 min, hora, dia) com o último valor de cada intervalo fechado.
+    O intervalo em aberto fica em memória e é refeito da cauda do arquivo bruto
+    sempre que ele cresce por fora (outra réplica no mesmo DATA_DIR); anexações
+    são serializadas entre processos por um flock por região. Leituras usam
+    memmap e busca binária pelo tempo: o custo depende só do trecho pedido, não
+    do tamanho do histórico.
+    """
+    
+    def __init__(self, directory=TIMELINE_DIR):
+        self.directory = directory
+        self._abertos = {}    # (regiao, resolucao) -> registro do intervalo em aberto
+        self._pendentes = {}  # (regiao, resolucao) -> intervalos fechados que faltam no arquivo
+        self._ultimo = {}     # regiao -> ts do último registro bruto
+        self._tamanho = {}    # regiao -> bytes do arquivo bruto quando o estado foi refeito
+        self._lock = threading.Lock()
+    
+    def _path(self, regiao, nivel):
+        return os.path.join(self.directory, regiao, f"{nivel}.bin")
+    
+    def _size(self, regiao, nivel):
+        try:
+            return os.path.getsize(self._path(regiao, nivel))
+        except FileNotFoundError:
+            return 0
+    
+    def _map(self, regiao, nivel):
+        """Registros completos do arquivo (uma escrita interrompida no fim é ignorada)"""
+        n = self._size(regiao, nivel) // TIMELINE_DTYPE.itemsize
+        if not n:
+            return np.zeros(0, dtype=TIMELINE_DTYPE)
+        return np.memmap(self._path(regiao, nivel), dtype=TIMELINE_DTYPE, mode="r", shape=(n,))
+    
+    def _write(self, regiao, nivel, registros):
+        os.makedirs(os.path.dirname(self._path(regiao, nivel)), exist_ok=True)
+        with open(self._path(regiao, nivel), "ab") as f:
+            resto = f.tell() % TIMELINE_DTYPE.itemsize
+            if resto:
+                f.truncate(f.tell() - resto)  # escrita interrompida de um processo que parou no meio
+            f.write(np.ascontiguousarray(registros, dtype=TIMELINE_DTYPE).tobytes())
+    
+    @contextmanager
+    def _writer(self, regiao):
+        """Trava de escrita da região entre processos (flock; fora de POSIX, só entre threads)"""
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+        os.makedirs(os.path.join(self.directory, regiao), exist_ok=True)
+        with open(os.path.join(self.directory, regiao, "escrita.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield  # fechar o arquivo libera o flock
+    
+    @staticmethod
+    def _merge(aberto, registro):
+        """Último valor de cada campo no intervalo (NaN não apaga o valor anterior)"""
+        novo = np.array(registro, dtype=TIMELINE_DTYPE)
+        if aberto is not None:
+            novo["amostras"] = aberto["amostras"] + registro["amostras"]
+            for campo in TIMELINE_CAMPOS:
+                if np.isnan(novo[campo]):
+                    novo[campo] = aberto[campo]
+        return novo
+    
+    def _recover(self, regiao):
+        """Refaz os intervalos em aberto a partir do arquivo bruto, se ele mudou desde a última vez.
+        
+        Não grava nada (leitores não escrevem): intervalos que fecharam sem chegar
+        ao arquivo (processo que parou entre as escritas) ficam pendentes até a
+        próxima anexação.
+        """
+        tamanho = self._size(regiao, "bruto")
+        if self._tamanho.get(regiao) == tamanho:
+            return
+        self._tamanho[regiao] = tamanho
+        bruto = self._map(regiao, "bruto")
+        self._ultimo[regiao] = int(bruto["ts"][-1]) if len(bruto) else None
+        for nivel, largura in TIMELINE_RESOLUCOES.items():
+            fechados = self._map(regiao, nivel)
+            inicio = int(fechados["ts"][-1]) + largura if len(fechados) else np.iinfo(np.int64).min
+            aberto, pendentes = None, []
+            for registro in np.array(bruto[np.searchsorted(bruto["ts"], inicio):]):
+                registro["ts"] = registro["ts"] // largura * largura
+                if aberto is not None and aberto["ts"] != registro["ts"]:
+                    pendentes.append(aberto)
+                    aberto = None
+                aberto = self._merge(aberto, registro)
+            self._pendentes[(regiao, nivel)] = pendentes
+            self._abertos[(regiao, nivel)] = aberto
+    
+    def append(self, regiao, ts, valores):
+        """Anexa uma leitura (`valores`: campo -> número ou None); O(1) por resolução"""
+        registro = np.zeros((), dtype=TIMELINE_DTYPE)
+        registro["ts"] = int(ts)
+        registro["amostras"] = 1
+        for campo in TIMELINE_CAMPOS:
+            valor = valores.get(campo)
+            registro[campo] = valor if isinstance(valor, (int, float)) else np.nan
+        with self._lock, self._writer(regiao):
+            # Sob a trava: o que outra réplica anexou entra no estado antes de escrever,
+            # então nenhum intervalo é gravado duas vezes nem fora de ordem
+            self._recover(regiao)
+            if self._ultimo[regiao] is not None and registro["ts"] <= self._ultimo[regiao]:
+                return False  # o arquivo bruto precisa ficar em ordem de tempo
+            self._write(regiao, "bruto", registro)
+            self._ultimo[regiao] = int(registro["ts"])
+            for nivel, largura in TIMELINE_RESOLUCOES.items():
+                fechados = self._pendentes.pop((regiao, nivel), [])
+                aberto = self._abertos.get((regiao, nivel))
+                inicio = registro["ts"] // largura * largura
+                if aberto is not None and aberto["ts"] != inicio:
+                    fechados.append(aberto)
+                    aberto = None
+                if fechados:
+                    self._write(regiao, nivel, np.array(fechados, dtype=TIMELINE_DTYPE))
+                novo = registro.copy()
+                novo["ts"] = inicio
+                self._abertos[(regiao, nivel)] = self._merge(aberto, novo)
+            self._tamanho[regiao] = self._size(regiao, "bruto")
+            return True
+    
+    def span(self, regiao):
+        """Segundos entre a primeira leitura e agora"""
+        bruto = self._map(regiao, "bruto")
+        return time.time() - int(bruto["ts"][0]) if len(bruto) else 0
+    
+    @staticmethod
+    def resolution_for(segundos):
+        """Resolução mais fina que mostra `segundos` em até TIMELINE_MAX_PONTOS pontos"""
+        for nivel, largura in TIMELINE_RESOLUCOES.items():
+            if segundos / largura <= TIMELINE_MAX_PONTOS:
+                return nivel
+        return "dia"
+    
+    def read(self, regiao, nivel, desde=None):
+        """DataFrame (índice = horário local) com os registros de `nivel` a partir de `desde`.
+        
+        Nas resoluções agregadas o intervalo em aberto entra como último ponto.
+        """
+        with self._lock:
+            self._recover(regiao)
+            aberto = self._abertos.get((regiao, nivel))
+            extras = list(self._pendentes.get((regiao, nivel), ())) + ([aberto.copy()] if aberto is not None else [])
+        registros = self._map(regiao, nivel)
+        # Outra réplica pode ter gravado um intervalo que aqui ainda está em memória
+        fim = int(registros["ts"][-1]) if len(registros) else None
+        extras = [r for r in extras if (fim is None or r["ts"] > fim)
+                  and (desde is None or r["ts"] + TIMELINE_RESOLUCOES[nivel] > desde)]
+        if desde is not None:
+            registros = registros[np.searchsorted(registros["ts"], int(desde)):]
+        registros = np.array(registros)
+        if extras:
+            registros = np.concatenate([registros, np.array(extras, dtype=TIMELINE_DTYPE)])
+        import pandas as pd  # a gravação (append) não precisa dele; só a leitura para os gráficos e a API
+        df = pd.DataFrame(registros)
+        df.index = pd.to_datetime(df.pop("ts"), unit="s", utc=True).dt.tz_convert(TZ_LOCAL)
+        df.index.name = "quando"
+        return df
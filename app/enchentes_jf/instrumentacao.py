@@ -0,0 +1,173 @@
+"""Métricas da ingestão (latência, bytes, itens, cache, erros) e o servidor /metrics"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import servicos
+
+# Limites (segundos) dos histogramas de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class Histogram:
+    """Histograma cumulativo no formato do Prometheus"""
+    
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # último = +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, limite in enumerate(self.buckets):
+            if value <= limite:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+    
+    def quantile(self, q):
+        """Estimativa do quantil por interpolação linear dentro do bucket"""
+        if not self.count:
+            return None
+        alvo, acumulado, anterior = q * self.count, 0, 0.0
+        for limite, n in zip(self.buckets + (float("inf"),), self.counts):
+            if n and acumulado + n >= alvo:
+                if limite == float("inf"):
+                    return anterior
+                return anterior + (limite - anterior) * (alvo - acumulado) / n
+            acumulado += n
+            anterior = limite
+        return anterior
+
+class PipelineMetrics:
+    """Registro de métricas da ingestão: latência por fonte/etapa, bytes, itens, cache e erros.
+    
+    Exporta em texto do Prometheus (`to_prometheus`) ou como dict/JSON (`to_dict`).
+    """
+    
+    DESCRICOES = {
+        "enchentes_etapa_segundos": ("histogram", "Duração de cada etapa por fonte"),
+        "enchentes_bytes_recebidos_total": ("counter", "Bytes lidos da rede por fonte"),
+        "enchentes_itens_total": ("counter", "Itens extraídos por fonte"),
+        "enchentes_cache_total": ("counter", "Respostas reaproveitadas (hit: 304; inalterado: mesmo hash) ou processadas (miss)"),
+        "enchentes_entradas_feed_total": ("counter", "Entradas de feed processadas (novas) ou reaproveitadas"),
+        "enchentes_erros_total": ("counter", "Exceções por fonte, etapa e tipo"),
+        "enchentes_snapshot_versao": ("gauge", "Versão do último snapshot publicado"),
+        "enchentes_atualizacao_erros_total": ("counter", "Falhas da atualização em segundo plano por etapa e tipo"),
+        "enchentes_noticias_arquivadas": ("gauge", "Notícias no arquivo local"),
+        "enchentes_pedidos_atualizacao_total": ("counter", "Pedidos manuais de atualização (atendidos ou agrupados)"),
+        "enchentes_snapshot_compartilhado_total": ("counter", "Snapshots publicados, adotados de outra réplica ou aguardados"),
+        "enchentes_api_respostas_total": ("counter", "Respostas da API geradas ou servidas do cache"),
+    }
+    
+    def __init__(self):
+        self._series = {}   # (nome, labels ordenados) -> valor ou Histogram
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(nome, labels):
+        return nome, tuple(sorted(labels.items()))
+    
+    def observe(self, nome, value, **labels):
+        with self._lock:
+            key = self._key(nome, labels)
+            if key not in self._series:
+                self._series[key] = Histogram()
+            self._series[key].observe(value)
+    
+    def inc(self, nome, value=1, **labels):
+        with self._lock:
+            key = self._key(nome, labels)
+            self._series[key] = self._series.get(key, 0) + value
+    
+    def set(self, nome, value, **labels):
+        with self._lock:
+            self._series[self._key(nome, labels)] = value
+    
+    @contextmanager
+    def stage(self, etapa, fonte="pipeline"):
+        """Cronometra um bloco; exceções são contadas e propagadas"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.inc("enchentes_erros_total", fonte=fonte, etapa=etapa, tipo=type(e).__name__)
+            raise
+        finally:
+            self.observe("enchentes_etapa_segundos", time.perf_counter() - inicio, fonte=fonte, etapa=etapa)
+    
+    def to_prometheus(self):
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: item[0])
+            linhas, atual = [], None
+            for (nome, labels), valor in series:
+                if nome != atual:
+                    tipo, ajuda = self.DESCRICOES.get(nome, ("untyped", nome))
+                    linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} {tipo}"]
+                    atual = nome
+                rotulos = ",".join(f'{k}="{_prom_escape(v)}"' for k, v in labels)
+                if isinstance(valor, Histogram):
+                    acumulado = 0
+                    for limite, n in zip(valor.buckets + ("+Inf",), valor.counts):
+                        acumulado += n
+                        le = f'le="{limite}"'
+                        linhas.append(f"{nome}_bucket{{{rotulos + ',' if rotulos else ''}{le}}} {acumulado}")
+                    linhas.append(f"{nome}_sum{{{rotulos}}} {valor.sum:.6f}")
+                    linhas.append(f"{nome}_count{{{rotulos}}} {valor.count}")
+                else:
+                    linhas.append(f"{nome}{{{rotulos}}} {valor}")
+        return "\n".join(linhas) + "\n"
+    
+    def to_dict(self):
+        with self._lock:
+            saida = {}
+            for (nome, labels), valor in self._series.items():
+                item = dict(labels)
+                if isinstance(valor, Histogram):
+                    item.update(count=valor.count, sum=round(valor.sum, 6),
+                                p50=valor.quantile(0.5), p95=valor.quantile(0.95))
+                else:
+                    item["valor"] = valor
+                saida.setdefault(nome, []).append(item)
+        return saida
+
+def _prom_escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# Fonte em processamento na thread atual (rótulo das métricas da camada HTTP)
+_fetch_context = threading.local()
+
+def current_source():
+    return getattr(_fetch_context, "fonte", None) or "desconhecida"
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """GET /metrics (Prometheus) e /metrics.json"""
+    
+    def do_GET(self):
+        rota = self.path.split("?")[0]
+        if rota == "/metrics":
+            status, tipo = 200, "text/plain; version=0.0.4; charset=utf-8"
+            body = servicos.pipeline_metrics.to_prometheus().encode("utf-8")
+        elif rota == "/metrics.json":
+            status, tipo = 200, "application/json"
+            body = json.dumps(servicos.pipeline_metrics.to_dict(), ensure_ascii=False).encode("utf-8")
+        else:
+            status, tipo, body = 404, "text/plain", b"not found"
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+def start_metrics_server(port, handler=MetricsRequestHandler):
+    """Servidor de métricas em thread própria (porta definida por ENCHENTES_METRICS_PORT)"""
+    server = ThreadingHTTPServer(("0.0.0.0", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="enchentes-metrics", daemon=True).start()
+    return server
@@ -0,0 +1,108 @@
+"""Extração de métricas (óbitos, desaparecidos, desabrigados, desalojados) do texto das notícias"""
+import re
+import threading
+from collections import namedtuple
+
+# Número em formato brasileiro ("46", "3.400", "3,4 mil") seguido do termo da métrica
+# ("5 mortos", "3 pessoas morreram") ou precedido do verbo ("morreram 10 pessoas").
+# Um único padrão com grupos nomeados: cada texto é percorrido uma só vez, e o
+# lookahead inicial descarta sem mais testes as posições que não começam por
+# dígito, "m" ou "d" (sem ele, o ramo do verbo custava ~50% a mais por notícia).
+_NUMERO = r"\d{1,3}(?:\.\d{3})+|\d+(?:,\d+)?"
+_ATE_O_NUMERO = r"\s+(?:(?:pelo|ao)\s+menos\s+)?"
+METRICA_DO_VERBO = {"morreram": "mortes", "morreu": "mortes",
+                    "desapareceram": "desaparecidos", "desapareceu": "desaparecidos"}
+# Verbo depois do número só conta se não vier outro número: "em 2026 morreram 3 pessoas" é 3
+_MORRERAM = rf"(?:morreram|morreu)(?!{_ATE_O_NUMERO}\d)"
+_DESAPARECERAM = rf"(?:desapareceram|desapareceu)(?!{_ATE_O_NUMERO}\d)"
+METRICAS_RE = re.compile(
+    rf"(?=[\dmd])(?:(?<![\d.,])(?P<num>{_NUMERO})(?:\s*(?P<mil>mil))?"
+    r"(?:\s+pessoas?)?(?:\s+(?:estão|estao|ficaram|seguem|continuam))?\s*"
+    rf"(?:(?P<mortes>mort(?:es?|[oa]s?)\b|óbitos?|obitos?|vítimas?\s*fatais?|vitimas?\s*fatais?|{_MORRERAM})"
+    rf"|(?P<desaparecidos>desaparecid[oa]s?|{_DESAPARECERAM})"
+    r"|(?P<desabrigados>desabrigad[oa]s?)"
+    r"|(?P<desalojados>desalojad[oa]s?))"
+    rf"|\b(?P<verbo>{'|'.join(METRICA_DO_VERBO)}){_ATE_O_NUMERO}"
+    rf"(?P<num_verbo>{_NUMERO})(?:\s*(?P<mil_verbo>mil))?\s+(?:pessoas?|morador(?:es)?)\b)",
+    re.IGNORECASE
+)
+
+METRICAS = ("mortes", "desaparecidos", "desabrigados", "desalojados")
+
+MetricValue = namedtuple("MetricValue", ["valor", "fonte", "titulo", "url", "publicado_em"])
+
+def parse_br_number(numero, mil=False):
+    """ "3.400" -> 3400, "3,4" + mil -> 3400, "46" -> 46"""
+    if "," in numero:
+        valor = float(numero.replace(".", "").replace(",", "."))
+    else:
+        valor = int(numero.replace(".", ""))
+    return int(round(valor * 1000)) if mil else int(valor)
+
+def scan_metrics(texto):
+    """Todas as ocorrências (métrica, valor) de um texto, em uma única passada"""
+    for m in METRICAS_RE.finditer(texto):
+        if m.group("verbo"):
+            numero = parse_br_number(m.group("num_verbo"), bool(m.group("mil_verbo")))
+            yield METRICA_DO_VERBO[m.group("verbo").lower()], numero
+        else:
+            yield m.lastgroup, parse_br_number(m.group("num"), bool(m.group("mil")))
+
+class MetricsEngine:
+    """Mantém o maior valor de cada métrica e a notícia de onde ele saiu.
+    
+    Consome o arquivo de notícias de forma incremental: cada notícia é lida uma
+    única vez, na primeira atualização depois de ser arquivada.
+    """
+    
+    def __init__(self, regiao=None):
+        self.regiao = regiao
+        self.best = dict.fromkeys(METRICAS)
+        self._last_rowid = 0
+        self._lock = threading.Lock()
+    
+    def ingest(self, noticias):
+        """Processa notícias (dicts) e devolve quantas foram lidas"""
+        total = 0
+        for n in noticias:
+            total += 1
+            texto = f"{n.get('titulo', '')} {n.get('resumo', '')}"
+            for metrica, valor in scan_metrics(texto):
+                atual = self.best[metrica]
+                if atual is None or valor > atual.valor:
+                    self.best[metrica] = MetricValue(
+                        valor, n.get("fonte"), n.get("titulo"), n.get("url"), n.get("publicado_em")
+                    )
+        return total
+    
+    def ingest_store(self, store):
+        """Lê apenas as notícias arquivadas desde a última chamada"""
+        with self._lock:
+            total = 0
+            for row in store.since(self._last_rowid, regiao=self.regiao):
+                if row.get("localizada", 1):  # notícia sem região definida não entra no máximo da região
+                    total += self.ingest((row,))
+                self._last_rowid = row["rowid"]
+            return total
+    
+    def values(self):
+        return {k: (v.valor if v else None) for k, v in self.best.items()}
+    
+    def provenance(self):
+        return {k: v._asdict() for k, v in self.best.items() if v}
+
+class RegionalMetrics:
+    """Um `MetricsEngine` por região, todos alimentados pelo mesmo arquivo"""
+    
+    def __init__(self):
+        self.engines = {}
+        self._lock = threading.Lock()
+    
+    def engine(self, regiao):
+        with self._lock:
+            if regiao not in self.engines:
+                self.engines[regiao] = MetricsEngine(regiao)
+            return self.engines[regiao]
+    
+    def ingest_store(self, store, regioes):
+        return sum(self.engine(regiao).ingest_store(store) for regiao in regioes)
@@ -0,0 +1,159 @@
+"""Camada espacial de ocorrências: enquadramento do mapa, vizinhos mais próximos e agrupamento"""
+import os
+import re
+import threading
+
+import numpy as np
+
+from .arquivo import DATA_DIR
+from .datas import format_horario
+from .regioes import REGIAO_PADRAO
+from .risco import BAIRROS_CSV, load_bairros
+from .textos import fold_text, strip_accents
+
+# Ocorrências georreferenciadas importadas (opcional): regiao, latitude, longitude, tipo, bairro, registrado_em
+OCORRENCIAS_CSV = os.path.join(DATA_DIR, "ocorrencias.csv")
+
+METROS_POR_GRAU = 111_320
+MAPA_LARGURA_PX, MAPA_ALTURA_PX = 800, 450
+CLUSTER_RAIO_PX = 40      # pontos a menos disso (na tela) viram um grupo
+
+TIPO_OCORRENCIA = (
+    ("Deslizamento", re.compile(r"desliz|barreira|soterr|encosta")),
+    ("Enchente", re.compile(r"ench|inund|transbord|cheia")),
+    ("Alagamento", re.compile(r"alag")),
+)
+
+def viewport(lat, lon, zoom, largura=MAPA_LARGURA_PX, altura=MAPA_ALTURA_PX):
+    """Retângulo visível (sul, oeste, norte, leste) de um mapa Web Mercator centrado em (lat, lon)"""
+    graus_px = 360 / (256 * 2 ** zoom)
+    meia_largura = largura / 2 * graus_px
+    meia_altura = altura / 2 * graus_px * np.cos(np.radians(lat))
+    return lat - meia_altura, lon - meia_largura, lat + meia_altura, lon + meia_largura
+
+def cluster_points(lat, lon, zoom):
+    """Agrupa pontos em células de ~CLUSTER_RAIO_PX pixels no zoom dado (centroide e contagem)"""
+    import pandas as pd  # só o mapa usa o DataFrame dos grupos
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    if not len(lat):
+        return pd.DataFrame({"latitude": [], "longitude": [], "ocorrencias": []})
+    graus = 360 / (256 * 2 ** zoom) * CLUSTER_RAIO_PX
+    # Linha e coluna da célula numa única chave inteira (np.unique 1-D é bem mais rápido que por linhas)
+    linha = np.floor((lat + 90) / graus).astype(np.int64)
+    coluna = np.floor((lon + 180) / graus).astype(np.int64)
+    _, grupo, contagem = np.unique(linha * (1 << 32) + coluna, return_inverse=True, return_counts=True)
+    return pd.DataFrame({
+        "latitude": np.bincount(grupo, weights=lat) / contagem,
+        "longitude": np.bincount(grupo, weights=lon) / contagem,
+        "ocorrencias": contagem,
+    })
+
+class OccurrenceLayer:
+    """Ocorrências de uma região (registros + coordenadas em arrays), imutável depois de criada.
+    
+    As consultas são filtros vetorizados sobre os arrays: com os milhares de pontos
+    de uma região (bairros citados nas notícias + importadas), uma máscara do numpy
+    custa menos que montar e consultar um índice espacial (ver bench_spatial.py).
+    """
+    
+    def __init__(self, registros=()):
+        self.registros = tuple(registros)
+        self.lat = np.array([r["latitude"] for r in self.registros], dtype=float)
+        self.lon = np.array([r["longitude"] for r in self.registros], dtype=float)
+    
+    def __len__(self):
+        return len(self.registros)
+    
+    def visible(self, sul, oeste, norte, leste):
+        """Latitude/longitude dos pontos dentro do retângulo"""
+        dentro = (self.lat >= sul) & (self.lat <= norte) & (self.lon >= oeste) & (self.lon <= leste)
+        return self.lat[dentro], self.lon[dentro]
+    
+    def nearest(self, lat, lon, k=5):
+        """Os `k` registros mais próximos, do mais perto ao mais longe, com a distância em metros"""
+        k = min(k, len(self))
+        if not k:
+            return []
+        dist = METROS_POR_GRAU * np.hypot(self.lat - lat, (self.lon - lon) * np.cos(np.radians(lat)))
+        idx = np.argpartition(dist, k - 1)[:k]
+        idx = idx[np.argsort(dist[idx], kind="stable")]
+        return [dict(self.registros[i], distancia_m=float(dist[i])) for i in idx]
+
+class OccurrenceStore:
+    """Camadas de ocorrências por região.
+    
+    Ocorrências vêm do arquivo importado (`OCORRENCIAS_CSV`, se existir) e das
+    notícias arquivadas que citam bairros cadastrados (posicionadas no centroide
+    do bairro). As notícias são lidas de forma incremental; a camada da região
+    só é refeita quando chegam pontos novos.
+    """
+    
+    def __init__(self, csv_path=OCORRENCIAS_CSV, bairros_path=BAIRROS_CSV):
+        self.csv_path = csv_path
+        self.bairros_path = bairros_path
+        self.registros = {}
+        self.layers = {}
+        self._last_rowid = {}
+        self._padroes = {}
+        self._importado = False
+        self._lock = threading.Lock()
+    
+    def _import_csv(self):
+        if self._importado:
+            return
+        self._importado = True
+        if os.path.exists(self.csv_path):
+            import pandas as pd
+            for r in pd.read_csv(self.csv_path).fillna("").to_dict("records"):
+                regiao = r.get("regiao") or REGIAO_PADRAO
+                self.registros.setdefault(regiao, []).append({
+                    "latitude": float(r["latitude"]), "longitude": float(r["longitude"]),
+                    "tipo": r.get("tipo") or "", "bairro": r.get("bairro") or "",
+                    "origem": "importada", "titulo": "", "url": "", "registrado_em": r.get("registrado_em") or ""
+                })
+    
+    def _bairros_regiao(self, regiao):
+        """(padrão que acha nomes de bairros, {nome sem acento: cadastro}); nomes mais longos primeiro"""
+        if regiao not in self._padroes:
+            bairros = load_bairros(self.bairros_path)
+            registros = {strip_accents(b["bairro"]): b for b in bairros[bairros["regiao"] == regiao].to_dict("records")}
+            nomes = sorted(registros, key=len, reverse=True)
+            # Sensível a maiúsculas: "Progresso", "Centro", "Grama" só contam como nome próprio
+            padrao = re.compile(r"\b(%s)\b" % "|".join(map(re.escape, nomes))) if nomes else None
+            self._padroes[regiao] = (padrao, registros)
+        return self._padroes[regiao]
+    
+    def _from_news(self, regiao, noticia):
+        padrao, bairros = self._bairros_regiao(regiao)
+        if padrao is None:
+            return []
+        texto = f"{noticia.get('titulo', '')} {noticia.get('resumo', '')}"
+        citados = dict.fromkeys(m.group(1) for m in padrao.finditer(strip_accents(texto)))
+        tipo = next((nome for nome, regex in TIPO_OCORRENCIA if regex.search(fold_text(texto))), None)
+        return [{
+            "latitude": bairros[nome]["latitude"], "longitude": bairros[nome]["longitude"],
+            "tipo": tipo or bairros[nome]["tipo"], "bairro": bairros[nome]["bairro"],
+            "origem": noticia.get("fonte") or "", "titulo": noticia.get("titulo") or "",
+            "url": noticia.get("url") or "", "registrado_em": format_horario(noticia["publicado_em"])
+        } for nome in citados]
+    
+    def ingest_store(self, store, regioes):
+        """Lê só as notícias novas de cada região; devolve quantas ocorrências entraram"""
+        with self._lock:
+            self._import_csv()
+            total = 0
+            for regiao in regioes:
+                novos = []
+                for row in store.since(self._last_rowid.get(regiao, 0), regiao=regiao):
+                    if row["localizada"]:  # "Centro" de uma notícia sem região não é o Centro de cada cidade
+                        novos.extend(self._from_news(regiao, row))
+                    self._last_rowid[regiao] = row["rowid"]
+                if novos or regiao not in self.layers:
+                    self.registros.setdefault(regiao, []).extend(novos)
+                    self.layers[regiao] = OccurrenceLayer(self.registros[regiao])
+                total += len(novos)
+            return total
+    
+    def layer(self, regiao):
+        with self._lock:
+            return self.layers.get(regiao) or OccurrenceLayer()
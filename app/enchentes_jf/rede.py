@@ -0,0 +1,187 @@
+"""Camada HTTP compartilhada pelas fontes: pool keep-alive, GET condicional e impressão digital do corpo"""
+import hashlib
+import threading
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+from . import servicos
+from .instrumentacao import current_source
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+REQUEST_TIMEOUT = 10
+HTTP_POOL_SIZE = 8
+HTTP_CHUNK_SIZE = 16 * 1024  # blocos das respostas lidas em streaming
+
+class UpstreamError(Exception):
+    """Resposta de erro de uma fonte externa, com o Retry-After informado (em segundos)"""
+    
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+def parse_retry_after(value):
+    """Retry-After em segundos, aceitando tanto número quanto data HTTP"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        return max(0, (parsedate_to_datetime(value) - datetime.now(parsedate_to_datetime(value).tzinfo)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def content_digest(dados):
+    """Impressão digital de um corpo de resposta (ou de um trecho dele)"""
+    return hashlib.blake2b(dados, digest_size=16).hexdigest()
+
+class StreamedBody:
+    """Corpo lido em streaming, com a impressão digital do trecho que o parse consumiu.
+    
+    `matches` lê (e guarda) só o prefixo que o parse da resposta anterior consumiu
+    e confere se ele é idêntico; `iter_content` entrega primeiro os blocos guardados
+    e depois o restante, registrando em `fingerprint` o que foi entregue. Os demais
+    atributos (headers, url, raw...) são os da resposta.
+    """
+    
+    def __init__(self, response, chunk_size=HTTP_CHUNK_SIZE):
+        self.response = response
+        self._blocos = response.iter_content(chunk_size=chunk_size)
+        self._lidos = []
+        self._hash = hashlib.blake2b(digest_size=16)
+        self._consumido = 0
+        self._fim = False
+    
+    def __getattr__(self, nome):
+        return getattr(self.response, nome)
+    
+    def _read(self):
+        bloco = next(self._blocos, None)
+        if bloco is None:
+            self._fim = True
+        return bloco
+    
+    def matches(self, anterior):
+        """O corpo começa com o mesmo trecho `(tamanho, hash, chegou_ao_fim)` consumido antes?"""
+        tamanho, digest, fim = anterior
+        # Se o parse anterior leu o corpo inteiro, um byte a mais agora já é mudança
+        necessario, lidos = tamanho + fim, sum(map(len, self._lidos))
+        while lidos < necessario and not self._fim:
+            bloco = self._read()
+            if bloco:
+                self._lidos.append(bloco)
+                lidos += len(bloco)
+        if lidos < tamanho or (fim and lidos != tamanho):
+            return False
+        return content_digest(b"".join(self._lidos)[:tamanho]) == digest
+    
+    def iter_content(self, chunk_size=None, decode_unicode=False):
+        """Blocos do corpo (no tamanho definido na criação, não em `chunk_size`)"""
+        while True:
+            bloco = self._lidos.pop(0) if self._lidos else self._read()
+            if bloco is None:
+                return
+            self._hash.update(bloco)
+            self._consumido += len(bloco)
+            yield bloco
+    
+    @property
+    def fingerprint(self):
+        return self._consumido, self._hash.hexdigest(), self._fim and not self._lidos
+
+class HttpClient:
+    """Sessão HTTP única com pool keep-alive, gzip e GET condicional por URL.
+    
+    Muitas fontes não mandam ETag/Last-Modified (ou mudam o ETag sem mudar o
+    conteúdo): por isso cada resposta também tem o corpo comparado pelo hash, e
+    um corpo idêntico reaproveita o resultado já processado sem chamar o parse.
+    """
+    
+    def __init__(self, pool_size=HTTP_POOL_SIZE):
+        self.pool_size = pool_size
+        self._session = None
+        
+        # URL -> {"etag", "last_modified", "impressao", "parsed"} da última resposta 200
+        self._validators = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """Sessão criada na primeira requisição (é ela que importa o requests)"""
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"})
+                self._session = session
+            return self._session
+    
+    def fetch_parsed(self, url, parse, params=None, timeout=REQUEST_TIMEOUT, stream=False):
+        """Busca a URL e devolve `parse(response)`.
+        
+        Se o servidor responder 304, o resultado já processado da resposta anterior
+        é reaproveitado sem baixar nem processar o corpo de novo; se responder 200
+        com o mesmo corpo (mesmo hash), só o processamento é evitado. Com
+        `stream=True` o corpo não é baixado de antemão: `parse` lê os blocos que
+        precisar e o restante é descartado; a comparação usa só o trecho que o
+        parse anterior leu.
+        """
+        import requests  # já carregado pela sessão
+        session = self.session
+        key = requests.Request("GET", url, params=params).prepare().url
+        with self._lock:
+            cached = self._validators.get(key)
+        
+        headers = {}
+        if cached:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+        
+        fonte = current_source()
+        with servicos.pipeline_metrics.stage("http", fonte):
+            response = session.get(url, params=params, headers=headers, timeout=timeout, stream=stream)
+        with response:
+            if response.status_code == 304 and cached:
+                servicos.pipeline_metrics.inc("enchentes_cache_total", fonte=fonte, resultado="hit")
+                return cached["parsed"]
+            if response.status_code >= 400:
+                raise UpstreamError(
+                    f"HTTP {response.status_code} em {url}",
+                    status_code=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get("Retry-After"))
+                )
+            
+            if stream:
+                corpo = StreamedBody(response)
+                inalterado = bool(cached) and corpo.matches(cached["impressao"])
+            else:
+                corpo = response
+                impressao = (len(response.content), content_digest(response.content), True)
+                inalterado = bool(cached) and cached["impressao"] == impressao
+            
+            if inalterado:
+                servicos.pipeline_metrics.inc("enchentes_cache_total", fonte=fonte, resultado="inalterado")
+                parsed, impressao = cached["parsed"], cached["impressao"]
+            else:
+                servicos.pipeline_metrics.inc("enchentes_cache_total", fonte=fonte, resultado="miss")
+                with servicos.pipeline_metrics.stage("parse", fonte):
+                    parsed = parse(corpo)
+                if stream:
+                    impressao = corpo.fingerprint
+            # Bytes efetivamente lidos da rede (comprimidos; menos que o corpo se o parse parou antes)
+            servicos.pipeline_metrics.inc("enchentes_bytes_recebidos_total", response.raw.tell(), fonte=fonte)
+        with self._lock:
+            self._validators[key] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "impressao": impressao,
+                "parsed": parsed,
+            }
+        return parsed
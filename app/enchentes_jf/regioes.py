@@ -0,0 +1,45 @@
+"""Registro das regiões monitoradas e roteamento das notícias entre elas"""
+import re
+from functools import lru_cache
+
+from .textos import fold_text
+
+# Registro declarativo: cada região define onde fica (previsão do tempo) e como é
+# citada nas notícias. Fontes sem "regioes" cobrem todas as regiões do registro.
+REGIOES = {
+    "juiz-de-fora": {"nome": "Juiz de Fora", "latitude": -21.76, "longitude": -43.35, "termos": ["juiz de fora", "jf"]},
+    "uba": {"nome": "Ubá", "latitude": -21.12, "longitude": -42.94, "termos": ["uba"]},
+    "muriae": {"nome": "Muriaé", "latitude": -21.13, "longitude": -42.37, "termos": ["muriae"]},
+    "cataguases": {"nome": "Cataguases", "latitude": -21.39, "longitude": -42.70, "termos": ["cataguases"]},
+}
+REGIAO_PADRAO = "juiz-de-fora"
+
+# Radicais (sem acento) que indicam notícia sobre o evento, em qualquer região
+TERMOS_EVENTO = ("ench", "chuv", "desliz", "alag", "temporal", "inund", "soterr")
+
+@lru_cache(maxsize=None)
+def _termos_re(termos):
+    """Padrão compilado com os termos da região como palavras inteiras ("uba" não casa com "cuba")"""
+    return re.compile(r"\b(?:%s)\b" % "|".join(re.escape(t) for t in termos))
+
+def regions_in_text(texto, candidatas=None):
+    """Regiões (dentre as candidatas) citadas em um texto"""
+    texto = fold_text(texto)
+    return [slug for slug in (candidatas or REGIOES) if _termos_re(tuple(REGIOES[slug]["termos"])).search(texto)]
+
+def is_relevant(texto):
+    """Notícia sobre o evento ou sobre alguma das regiões monitoradas"""
+    return any(t in fold_text(texto) for t in TERMOS_EVENTO) or bool(regions_in_text(texto))
+
+def route_news(noticia, regioes=None):
+    """Regiões de destino de uma notícia vinda de uma fonte que cobre `regioes`, e se ela é localizada.
+    
+    Notícias que citam regiões vão só para elas; as que não citam nenhuma (ex.:
+    "chuva forte na Zona da Mata") vão para o feed de todas as regiões cobertas
+    pela fonte. Se a fonte cobre uma região só, a notícia é dela; se cobre várias,
+    não é localizada e fica fora das métricas e ocorrências por região (o balanço
+    da Zona da Mata inteira não é o número de cada cidade).
+    """
+    candidatas = [r for r in (regioes or REGIOES) if r in REGIOES]
+    citadas = regions_in_text(f"{noticia.get('titulo', '')} {noticia.get('resumo', '')}", candidatas)
+    return citadas or candidatas, bool(citadas) or len(candidatas) == 1
@@ -0,0 +1,140 @@
+"""HTML do bloco de métricas e do feed de notícias, renderizado uma vez por snapshot"""
+import html
+from datetime import datetime
+
+from .datas import TZ_LOCAL, format_horario
+from .saude import CircuitBreaker
+
+# Cor da fonte baseada no nome
+# (nomes do registro de fontes e, para os feeds, também o título do canal)
+COR_FONTE = {
+    "Defesa Civil MG": "#dc2626",
+    "Defesa Civil JF": "#dc2626",
+    "Defesa Civil (Web)": "#dc2626",
+    "G1 Zona da Mata (RSS)": "#c4170c",
+    "G1 Zona da Mata": "#c4170c",
+    "Estado de Minas (RSS)": "#0f4c81",
+    "Estado de Minas - Gerais": "#0f4c81",
+    "CNN Brasil": "#cc0000",
+    "NewsAPI": "#2563eb",
+    "Prefeitura JF": "#059669",
+    "Corpo de Bombeiros MG": "#d97706",
+    "RSS": "#6b7280"
+}
+
+# Substituído a cada rerun: é a única parte do bloco de métricas que depende do relógio
+TEMPO_DECORRIDO = "<!--tempo-decorrido-->"
+
+def _compact_html(trecho):
+    """Remove a indentação e as quebras de linha (o Markdown trataria linhas indentadas como código)"""
+    return "".join(linha.strip() for linha in trecho.splitlines())
+
+def _format_metric(valor, formato="{}"):
+    """Valor da métrica ou travessão (região sem boletim e sem notícias com números)"""
+    return "—" if valor is None else formato.format(valor)
+
+def render_metrics_html(data):
+    """HTML do bloco de métricas (cinco cartões) de um snapshot"""
+    metrics = data.metrics
+    online = sum(1 for f in data.sources if f["estado"] == CircuitBreaker.FECHADO and f["ultimo_sucesso"])
+    
+    return _compact_html(f"""
+    <div style="display: grid; grid-template-columns: repeat(5, 1fr); gap: 1rem;">
+        <div class="metric-card"{_origem_attr(data, 'mortes')}>
+            <div style="display: flex; justify-content: space-between; align-items: center;">
+                <span class="update-badge">● ATUALIZADO</span>
+            </div>
+            <h3 style="margin:10px 0 0 0; color:#dc2626; font-size:2.5rem;">{_format_metric(metrics['mortes'])}</h3>
+            <p style="margin:0; color:#7f1d1d; font-weight:bold;">ÓBITOS</p>
+        </div>
+        <div class="metric-card"{_origem_attr(data, 'desaparecidos')}>
+            <h3 style="margin:0; color:#f59e0b; font-size:2.5rem;">{_format_metric(metrics['desaparecidos'])}</h3>
+            <p style="margin:0; color:#92400e; font-weight:bold;">DESAPARECIDOS</p>
+        </div>
+        <div class="metric-card"{_origem_attr(data, 'desabrigados')}>
+            <h3 style="margin:0; color:#2563eb; font-size:2.5rem;">{_format_metric(metrics['desabrigados'], '{:,}')}</h3>
+            <p style="margin:0; color:#1e40af; font-weight:bold;">DESABRIGADOS</p>
+        </div>
+        <div class="metric-card"{_origem_attr(data, 'desalojados')}>
+            <h3 style="margin:0; color:#7c3aed; font-size:2.5rem;">{_format_metric(metrics['desalojados'])}</h3>
+            <p style="margin:0; color:#5b21b6; font-weight:bold;">DESALOJADOS</p>
+        </div>
+        <div style="background: #ecfdf5; border: 2px solid #10b981; border-radius: 0.5rem; padding: 1rem; text-align: center;">
+            <div style="font-size: 2rem;">🔄</div>
+            <div style="font-size: 0.875rem; color: #059669; font-weight: bold;">
+                Há {TEMPO_DECORRIDO} min
+            </div>
+            <div style="font-size: 0.75rem; color: #6b7280; margin-top: 5px;">
+                {online}/{len(data.sources)} fontes online
+            </div>
+            <div style="font-size: 0.7rem; color: #374151; margin-top: 5px; text-align: left;">
+                {"<br>".join(_source_status_line(f) for f in data.sources)}
+            </div>
+        </div>
+    </div>
+    """)
+
+def _origem_attr(data, metrica):
+    """Atributo title com a notícia de onde o valor da métrica foi extraído"""
+    origem = data.metrics_origem.get(metrica)
+    if not origem:
+        return ' title="Valor de referência (boletim histórico)"'
+    quando = format_horario(origem["publicado_em"]) if origem.get("publicado_em") else ""
+    texto = f"{origem['fonte']} {quando}: {origem['titulo']}"
+    return f' title="{html.escape(texto)}"'
+
+def _source_status_line(fonte):
+    """Linha de estado de uma fonte para o painel de atualização"""
+    nome = html.escape(fonte["nome"])
+    if fonte["estado"] == CircuitBreaker.ABERTO:
+        retorno = format_horario(fonte["proxima_tentativa"])[-5:]
+        return f'🔴 {nome} <span style="color:#9ca3af;">(nova tentativa às {retorno})</span>'
+    if fonte["estado"] == CircuitBreaker.MEIO_ABERTO or fonte["falhas"]:
+        return f'🟡 {nome} <span style="color:#9ca3af;">({fonte["falhas"]} falha(s))</span>'
+    if not fonte["ultimo_sucesso"]:
+        return f'⚪ {nome}'
+    return f'🟢 {nome} <span style="color:#9ca3af;">({fonte["itens"]})</span>'
+
+def render_news_card(noticia):
+    """HTML de um cartão de notícia"""
+    # Garantir que todos os campos existam
+    fonte = noticia.get("fonte", "Fonte desconhecida")
+    horario = noticia.get("horario", datetime.now(TZ_LOCAL).strftime("%d/%m %H:%M"))
+    titulo = noticia.get("titulo", "Sem título")
+    resumo = noticia.get("resumo", "Clique no link para ler a matéria completa")
+    url = noticia.get("url", "")
+    
+    cor_fonte = COR_FONTE.get(fonte, "#6b7280")
+    
+    # Construir o link apenas se for válido
+    link_html = ""
+    if url and url != "#" and url.startswith(("http://", "https://")):
+        link_html = f'<a href="{html.escape(url)}" target="_blank" style="color: #2563eb; font-size: 0.875rem; margin-top: 0.5rem; display: inline-block;">🔗 Ler matéria completa →</a>'
+    elif fonte == "Defesa Civil (Web)":
+        # Se veio de scraping mas sem link específico, usar link da fonte
+        link_html = f'<span style="color: #6b7280; font-size: 0.875rem;">ℹ️ Fonte: {html.escape(fonte)}</span>'
+    
+    # Mesma história publicada por outras fontes
+    if noticia.get("relacionadas"):
+        outras = ", ".join(noticia.get("outras_fontes") or []) or fonte
+        link_html += f'<div style="color: #6b7280; font-size: 0.75rem; margin-top: 0.25rem;">📎 Também em: {html.escape(outras)} ({noticia["relacionadas"]} matéria(s) semelhante(s))</div>'
+    
+    return _compact_html(f"""
+    <div class="news-card" style="border-left: 4px solid {cor_fonte};">
+        <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 0.5rem;">
+            <span style="background-color: {cor_fonte}; color: white; padding: 0.25rem 0.5rem; 
+                         border-radius: 0.25rem; font-size: 0.75rem; font-weight: bold;">
+                {html.escape(fonte)}
+            </span>
+            <span style="color: #6b7280; font-size: 0.875rem;">{horario}</span>
+        </div>
+        <h4 style="margin: 0.5rem 0; color: #111827;">{html.escape(titulo)}</h4>
+        <p style="margin: 0; color: #4b5563; line-height: 1.5;">{html.escape(resumo)}</p>
+        {link_html}
+    </div>
+    """)
+
+def render_news_feed_html(noticias):
+    """HTML completo do feed (título + 10 cartões) em um único bloco"""
+    cartoes = "".join(render_news_card(n) for n in noticias[:10])
+    return f'<h3>📰 Central de Notícias ({len(noticias)} atualizações)</h3>{cartoes}'
@@ -0,0 +1,90 @@
+"""Escore de risco por bairro a partir da chuva acumulada e do histórico de ocorrências"""
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from .chuva import CHUVA_JANELAS, CHUVA_LIMIARES
+
+# Cadastro estático: tipo de risco predominante, classe de suscetibilidade,
+# ocorrências registradas e centroide aproximado de cada bairro (a origem dos
+# valores está no cabeçalho do arquivo, em linhas começadas por "#")
+BAIRROS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "bairros.csv")
+
+SUSCETIBILIDADE = {"baixa": 0.25, "media": 0.5, "alta": 0.75, "muito_alta": 1.0}
+
+# Peso de cada janela de CHUVA_JANELAS (1, 24, 48, 72 h) por tipo de risco:
+# encostas respondem à saturação do solo (72 h), alagamentos à intensidade (1 h)
+PESOS_JANELA = {
+    "Deslizamento": (0.1, 0.2, 0.3, 0.4),
+    "Alagamento": (0.5, 0.3, 0.1, 0.1),
+    "Enchente": (0.2, 0.4, 0.3, 0.1),
+}
+RISCO_CHUVA_SATURACAO = 1.5  # razão acumulado/limiar a partir da qual a chuva conta por inteiro
+RISCO_PESO_CHUVA = 0.7       # o restante do escore vem do histórico de ocorrências
+GRAVIDADE_FAIXAS = ((75, "Crítica"), (50, "Alta"), (25, "Média"), (0, "Baixa"))
+
+@lru_cache(maxsize=None)
+def load_bairros(path=BAIRROS_CSV):
+    """Cadastro de bairros (lido uma vez por processo)"""
+    import pandas as pd  # importado na primeira leitura, já fora do import da página
+    return pd.read_csv(path, comment="#")
+
+class RiskEngine:
+    """Escore de risco (0-100) de todos os bairros em uma passada vetorizada.
+    
+    escore = 100 x suscetibilidade x (0,7 x chuva + 0,3 x histórico), onde
+    `chuva` é a razão acumulado/limiar das janelas ponderada pelo tipo de risco
+    do bairro e `histórico` é log(1 + ocorrências) normalizado. Os atributos
+    estáticos viram arrays uma única vez; a cada atualização só as razões de
+    chuva das regiões mudam. Cada bairro sai com `estimado`, verdadeiro quando
+    a classe de suscetibilidade não vem dos boletins (escore só indicativo).
+    """
+    
+    def __init__(self, path=BAIRROS_CSV):
+        self.path = path
+        self._bairros = None
+    
+    def _load(self):
+        if self._bairros is None:
+            df = load_bairros(self.path)
+            # Sem a coluna `estimado`, nenhuma classe do cadastro conta como confirmada
+            estimado = df["estimado"].fillna(1).astype(bool) if "estimado" in df else True
+            df = df.assign(estimado=estimado)
+            self._bairros = df
+            self._registros = df.to_dict("records")
+            self._suscetibilidade = df["suscetibilidade"].map(SUSCETIBILIDADE).fillna(0.5).to_numpy()
+            self._pesos = np.array([PESOS_JANELA.get(t, PESOS_JANELA["Alagamento"]) for t in df["tipo"]])
+            historico = np.log1p(df["ocorrencias"].to_numpy(dtype=float))
+            self._historico = historico / (historico.max() or 1.0)
+        return self._bairros
+    
+    def score(self, chuva_por_regiao):
+        """{regiao: resumo da chuva ou None} -> {regiao: [bairros em ordem de risco]}"""
+        bairros = self._load()
+        regioes = list(chuva_por_regiao)
+        limiares = np.array([CHUVA_LIMIARES[j] for j in CHUVA_JANELAS])
+        razoes = np.zeros((len(regioes) + 1, len(CHUVA_JANELAS)))  # última linha: região sem série
+        for i, regiao in enumerate(regioes):
+            chuva = chuva_por_regiao[regiao]
+            if chuva:
+                razoes[i] = [chuva["janelas"][j] for j in CHUVA_JANELAS]
+        razoes[:-1] /= limiares
+        
+        indice = bairros["regiao"].map({r: i for i, r in enumerate(regioes)}).fillna(len(regioes)).to_numpy(dtype=int)
+        fator_chuva = np.einsum("ij,ij->i", self._pesos, razoes[indice])
+        fator_chuva = np.clip(fator_chuva / RISCO_CHUVA_SATURACAO, 0, 1)
+        escores = 100 * self._suscetibilidade * (RISCO_PESO_CHUVA * fator_chuva + (1 - RISCO_PESO_CHUVA) * self._historico)
+        gravidade = np.select(
+            [escores >= limite for limite, _ in GRAVIDADE_FAIXAS], [nome for _, nome in GRAVIDADE_FAIXAS]
+        )
+        
+        resultado = {regiao: [] for regiao in regioes}
+        escores, fator_chuva, gravidade = escores.round(1).tolist(), fator_chuva.round(2).tolist(), gravidade.tolist()
+        for i in np.argsort(-np.asarray(escores), kind="stable").tolist():
+            registro = self._registros[i]
+            if registro["regiao"] in resultado:
+                resultado[registro["regiao"]].append(
+                    dict(registro, escore=escores[i], chuva=fator_chuva[i], gravidade=gravidade[i])
+                )
+        return resultado
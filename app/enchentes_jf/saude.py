@@ -0,0 +1,93 @@
+"""Saúde das fontes: um circuit breaker por fonte"""
+import threading
+import time
+
+BREAKER_FAILURE_THRESHOLD = 3   # falhas seguidas até abrir o circuito
+BREAKER_BASE_BACKOFF = 60       # segundos da primeira espera
+BREAKER_MAX_BACKOFF = 3600
+
+class CircuitBreaker:
+    """Estado de saúde de uma fonte.
+    
+    Depois de `threshold` falhas seguidas o circuito abre e a fonte deixa de ser
+    consultada. Vencida a espera, uma única sondagem (meio-aberto) decide se volta
+    ao normal ou reabre com espera dobrada. Retry-After do servidor é respeitado.
+    """
+    
+    FECHADO, ABERTO, MEIO_ABERTO = "fechado", "aberto", "meio-aberto"
+    
+    def __init__(self, nome, threshold=BREAKER_FAILURE_THRESHOLD,
+                 base_backoff=BREAKER_BASE_BACKOFF, max_backoff=BREAKER_MAX_BACKOFF):
+        self.nome = nome
+        self.threshold = threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.estado = self.FECHADO
+        self.falhas = 0
+        self.aberturas = 0
+        self.aberto_ate = 0.0
+        self.ultimo_erro = None
+        self.ultimo_sucesso = None
+        self.itens = 0
+        self._lock = threading.Lock()
+    
+    def allow(self, now=None):
+        """Indica se a fonte pode ser consultada agora"""
+        now = now or time.time()
+        with self._lock:
+            if self.estado == self.FECHADO:
+                return True
+            if self.estado == self.ABERTO and now >= self.aberto_ate:
+                self.estado = self.MEIO_ABERTO
+                return True
+            return False
+    
+    def record_success(self, itens=0):
+        with self._lock:
+            self.estado = self.FECHADO
+            self.falhas = 0
+            self.aberturas = 0
+            self.ultimo_erro = None
+            self.ultimo_sucesso = time.time()
+            self.itens = itens
+    
+    def record_failure(self, erro, retry_after=None, now=None):
+        now = now or time.time()
+        with self._lock:
+            self.falhas += 1
+            self.ultimo_erro = str(erro) or type(erro).__name__
+            if self.estado == self.MEIO_ABERTO or self.falhas >= self.threshold or retry_after:
+                self.aberturas += 1
+                espera = min(self.max_backoff, self.base_backoff * 2 ** (self.aberturas - 1))
+                if retry_after:
+                    espera = max(espera, retry_after) if self.falhas >= self.threshold else retry_after
+                self.estado = self.ABERTO
+                self.aberto_ate = now + espera
+    
+    def status(self):
+        with self._lock:
+            return {
+                "nome": self.nome,
+                "estado": self.estado,
+                "falhas": self.falhas,
+                "itens": self.itens,
+                "ultimo_sucesso": self.ultimo_sucesso,
+                "ultimo_erro": self.ultimo_erro,
+                "proxima_tentativa": self.aberto_ate if self.estado == self.ABERTO else None
+            }
+
+class SourceHealth:
+    """Um circuit breaker por fonte, criado no primeiro uso"""
+    
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+    
+    def get(self, nome):
+        with self._lock:
+            if nome not in self._breakers:
+                self._breakers[nome] = CircuitBreaker(nome)
+            return self._breakers[nome]
+    
+    def statuses(self, nomes):
+        return [self.get(nome).status() for nome in nomes]
@@ -0,0 +1,80 @@
+"""Instâncias únicas por processo, criadas no primeiro acesso.
+
+Os módulos do pacote usam `servicos.news_store`, `servicos.pipeline_metrics`...
+em vez de criar as suas: a página, a thread de atualização e a API veem os
+mesmos objetos, e importar o pacote não abre o arquivo SQLite nem cria
+diretórios. Para usar outra instância (testes, benchmarks), basta atribuir:
+`servicos.news_store = NewsStore(caminho)`.
+"""
+import os
+import threading
+
+_lock = threading.RLock()  # reentrante: uma fábrica pode usar outra instância
+
+def _data_manager():
+    from .dados_base import DataManager
+    return DataManager()
+
+def _pipeline_metrics():
+    from .instrumentacao import PipelineMetrics
+    return PipelineMetrics()
+
+def _http_client():
+    from .rede import HttpClient
+    return HttpClient()
+
+def _news_store():
+    from .arquivo import DATA_DIR, NewsStore
+    return NewsStore(os.path.join(DATA_DIR, "noticias.sqlite3"))
+
+def _rainfall_store():
+    from .chuva import RainfallStore
+    return RainfallStore()
+
+def _risk_engine():
+    from .risco import RiskEngine
+    return RiskEngine()
+
+def _occurrence_store():
+    from .ocorrencias import OccurrenceStore
+    return OccurrenceStore()
+
+def _source_health():
+    from .saude import SourceHealth
+    return SourceHealth()
+
+def _feed_entry_cache():
+    from .fontes import FeedEntryCache
+    return FeedEntryCache()
+
+def _metrics_engine():
+    from .metricas import RegionalMetrics
+    return RegionalMetrics()
+
+def _metrics_timeline():
+    from .historico import MetricsTimeline
+    return MetricsTimeline()
+
+FABRICAS = {
+    "data_manager": _data_manager,
+    "pipeline_metrics": _pipeline_metrics,
+    "http_client": _http_client,
+    "news_store": _news_store,
+    "rainfall_store": _rainfall_store,
+    "risk_engine": _risk_engine,
+    "occurrence_store": _occurrence_store,
+    "source_health": _source_health,
+    "feed_entry_cache": _feed_entry_cache,
+    "metrics_engine": _metrics_engine,
+    "metrics_timeline": _metrics_timeline,
+}
+
+def __getattr__(nome):
+    """Cria a instância na primeira leitura; as seguintes já a encontram no módulo"""
+    fabrica = FABRICAS.get(nome)
+    if fabrica is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    with _lock:
+        if nome not in globals():
+            globals()[nome] = fabrica()
+        return globals()[nome]
@@ -0,0 +1,21 @@
+"""Normalização de texto (acentos, maiúsculas, stopwords) comum à deduplicação e ao roteamento"""
+import re
+import unicodedata
+
+STOPWORDS_PT = frozenset("""
+    a ao aos as com da das de do dos e em na nas no nos o os para por que se sem sob sobre um uma
+    uns umas apos ate mais foi sao ser ter tem pelo pela pelos pelas entre como ja nao
+""".split())
+
+def strip_accents(texto):
+    """Remove os acentos mantendo maiúsculas ("Três Moinhos" -> "Tres Moinhos")"""
+    texto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+def fold_text(texto):
+    """Minúsculas sem acentos ("Óbitos em Três Moinhos" -> "obitos em tres moinhos")"""
+    return strip_accents(texto.casefold())
+
+def tokenize(texto):
+    """Palavras normalizadas, sem pontuação nem stopwords"""
+    return [t for t in re.findall(r"\w+", fold_text(texto)) if len(t) > 1 and t not in STOPWORDS_PT]
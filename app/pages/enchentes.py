@@ -2,34 +2,37 @@ import streamlit as st
 import os
 os.environ['STREAMLIT_SERVER_FILE_WATCHER_TYPE'] = 'none'
 
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
-import requests
-from PIL import Image
-from io import BytesIO
-import re
-import json
+import html
+import sys
 import time
-import os
+from urllib.parse import urlsplit
+
+# O pacote enchentes_jf (fontes, arquivo, risco, histórico, API) fica em app/, ao lado de pages/
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
 
-# Tratamento de erro para BeautifulSoup (caso não esteja instalado)
-try:
-    from bs4 import BeautifulSoup
-    BS4_AVAILABLE = True
-except ImportError:
-    BS4_AVAILABLE = False
-    st.warning("BeautifulSoup não instalado. Modo de demonstração ativado.")
+from enchentes_jf import servicos
+from enchentes_jf.api import cli, start_api_server
+from enchentes_jf.arquivo import BUSCA_ORDENS
+from enchentes_jf.atualizacao import BackgroundRefresher
+from enchentes_jf.chuva import CHUVA_JANELAS, CHUVA_LIMIARES
+from enchentes_jf.compartilhamento import snapshot_backend_from_env
+from enchentes_jf.datas import TZ_LOCAL
+from enchentes_jf.historico import TIMELINE_RESOLUCOES
+from enchentes_jf.instrumentacao import start_metrics_server
+from enchentes_jf.ocorrencias import MAPA_ALTURA_PX, MAPA_LARGURA_PX, cluster_points, viewport
+from enchentes_jf.regioes import REGIAO_PADRAO, REGIOES
+from enchentes_jf.renderizacao import TEMPO_DECORRIDO, render_news_card
+from enchentes_jf.risco import GRAVIDADE_FAIXAS
 
-# Tratamento de erro para feedparser
-try:
-    import feedparser
-    FEEDPARSER_AVAILABLE = True
-except ImportError:
-    FEEDPARSER_AVAILABLE = False
+# O pandas (que traz o pyarrow) é importado dentro das funções display_*, nas
+# tabelas e gráficos do primeiro render: importar a página (modo bare, `cli`)
+# não o carrega. O numpy continua vindo com o pacote enchentes_jf.
 
-# Configuração da página
-st.set_page_config(
+# Configuração da página (aplicada em main(), primeiro comando da execução)
+PAGE_CONFIG = dict(
     page_title="Dashboard Enchentes Juiz de Fora - Atualização em tempo real",
     page_icon="🌊",
     layout="wide",
@@ -37,7 +40,7 @@ st.set_page_config(
 )
 
 # CSS mantido (igual ao anterior)
-st.markdown("""
+PAGE_CSS = """
 <style>
     .main-header { font-size: 3rem; font-weight: bold; color: #dc2626; text-align: center; }
     .sub-header { font-size: 1.2rem; color: #7f1d1d; text-align: center; margin-bottom: 2rem; }
@@ -49,488 +52,396 @@ st.markdown("""
                  border-radius: 0.5rem; padding: 1rem; margin-bottom: 1rem; }
     .alert-box { background-color: #fef3c7; border-left: 5px solid #f59e0b; 
                  padding: 1rem; border-radius: 0.5rem; margin: 1rem 0; }
-    .demo-mode { background-color: #dbeafe; border: 2px solid #3b82f6; 
-                 padding: 1rem; border-radius: 0.5rem; margin: 1rem 0; }
 </style>
-""", unsafe_allow_html=True)
+"""
 
 # =============================================================================
-# SISTEMA DE DADOS COM FALLBACK
+# ATUALIZADOR DO PROCESSO
 # =============================================================================
 
-class DataManager:
-    """Gerencia dados com fallback para modo offline"""
-    
-    def __init__(self):
-        self.last_update = None
-        self.cache_duration = 300  # 5 minutos
-        
-        # Dados base históricos (fallback)
-        self.historical_data = {
-            "mortes": 46,
-            "desaparecidos": 21,
-            "desabrigados": 3400,
-            "desalojados": 400,
-            "chuva_acumulada_fev": 589.6,
-            "chuva_48h": 227.6,
-            "ocorrencias": 1017,
-            "data_atualizacao": "25/02/2026 16:00"
-        }
-        
-        self.bairros_base = {
-            "Três Moinhos": {"tipo": "Deslizamento", "gravidade": "Alta", "vítimas": 5, "status": "Bloqueado"},
-            "Cidade Universitária": {"tipo": "Alagamento", "gravidade": "Alta", "chuva_mm": 221.72, "status": "Interditado"},
-            "Nossa Senhora de Lourdes": {"tipo": "Alagamento", "gravidade": "Alta", "chuva_mm": 216.19, "status": "Interditado"},
-            "Centro": {"tipo": "Alagamento", "gravidade": "Média", "chuva_mm": 215.43, "status": "Parcial"},
-            "Santa Cruz": {"tipo": "Deslizamento", "gravidade": "Alta", "vítimas": 3, "status": "Bloqueado"},
-            "Benfica": {"tipo": "Enchente", "gravidade": "Média", "status": "Restrito"},
-            "São Pedro": {"tipo": "Deslizamento", "gravidade": "Alta", "vítimas": 2, "status": "Bloqueado"},
-            "Mariano Procópio": {"tipo": "Alagamento", "gravidade": "Média", "status": "Parcial"},
-            "São Mateus": {"tipo": "Enchente", "gravidade": "Alta", "status": "Interditado"},
-            "Granjas Betânia": {"tipo": "Deslizamento", "gravidade": "Crítica", "vítimas": 8, "status": "Bloqueado"}
-        }
-        
-        self.noticias_base = [
-            {
-                "fonte": "Defesa Civil MG",
-                "horario": "25/02 16:00",
-                "titulo": "Balanço atualizado: 46 óbitos confirmados em Juiz de Fora",
-                "resumo": "Equipes continuam buscas por 21 desaparecidos. Mais de 3.400 pessoas estão desabrigadas.",
-                "tipo": "Boletim Oficial",
-                "url": "https://www.defesacivil.mg.gov.br/noticias"
-            },
-            {
-                "fonte": "G1 Zona da Mata",
-                "horario": "25/02 14:30",
-                "titulo": "Temporal em Juiz de Fora e Ubá deixa rastro de destruição",
-                "resumo": "Chuva volumosa atingiu a região entre os dias 22 e 24 de fevereiro.",
-                "tipo": "Reportagem",
-                "url": "https://g1.globo.com/mg/zona-da-mata/"
-            },
-            {
-                "fonte": "CNN Brasil",
-                "horario": "25/02 12:00",
-                "titulo": "Vídeo: Morro desliza sobre casas no bairro Três Moinhos",
-                "resumo": "Imagens mostram momento exato do deslizamento que matou 5 pessoas.",
-                "tipo": "Vídeo",
-                "url": "https://www.cnnbrasil.com.br"
-            },
-            {
-                "fonte": "Prefeitura JF",
-                "horario": "24/02 18:00",
-                "titulo": "Fevereiro de 2026 é o mês mais chuvoso da história de Juiz de Fora",
-                "resumo": "Já são 589,6mm de chuva acumulada, superando em 270% a média histórica.",
-                "tipo": "Comunicado",
-                "url": "https://www.pjf.mg.gov.br"
-            }
-        ]
-
-data_manager = DataManager()
+@st.cache_resource(show_spinner=False)
+def get_refresher():
+    """Um único atualizador por processo, compartilhado por todas as sessões"""
+    porta = os.getenv("ENCHENTES_METRICS_PORT")
+    if porta:
+        start_metrics_server(int(porta))
+    refresher = BackgroundRefresher(backend=snapshot_backend_from_env()).start()
+    porta_api = os.getenv("ENCHENTES_API_PORT")
+    if porta_api:
+        start_api_server(int(porta_api), refresher)
+    return refresher
 
 # =============================================================================
-# FUNÇÕES DE SCRAPING COM TRATAMENTO DE ERRO
+# INTERFACE DO USUÁRIO
 # =============================================================================
 
-def scrape_defesa_civil():
-    """Scraping com fallback para dados estáticos se falhar"""
-    if not BS4_AVAILABLE:
-        return []
-    
-    try:
-        urls = [
-            {"url": "https://www.defesacivil.mg.gov.br/", "nome": "Defesa Civil MG"},
-            {"url": "https://www.pjf.mg.gov.br/defesa_civil/noticias.php", "nome": "Defesa Civil JF"}
-        ]
-        
-        noticias = []
-        for fonte in urls:
-            try:
-                response = requests.get(fonte["url"], timeout=10, headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                })
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                keywords = ['ench', 'chuv', 'desliz', 'alag', 'temporal', 'juiz de fora']
-                
-                # Tentar encontrar links de notícias
-                links = soup.find_all('a', href=True, limit=15)
-                
-                for link in links:
-                    texto = link.get_text()
-                    href = link['href']
-                    
-                    # Completar URL relativa
-                    if href.startswith('/'):
-                        href = fonte["url"].rstrip('/') + href
-                    elif not href.startswith(('http://', 'https://')):
-                        continue
-                    
-                    if any(k in texto.lower() for k in keywords) and len(texto.strip()) > 20:
-                        noticias.append({
-                            "fonte": fonte["nome"],
-                            "titulo": texto.strip()[:100] + "...",
-                            "horario": datetime.now().strftime("%d/%m %H:%M"),
-                            "resumo": f"Notícia publicada no site da {fonte['nome']}",
-                            "tipo": "Boletim",
-                            "url": href
-                        })
-            except Exception as e:
-                continue
-                
-        return noticias
-    except Exception as e:
-        return []
+def display_realtime_metrics(data):
+    """Exibe métricas com indicadores visuais (HTML pré-renderizado do snapshot)"""
+    tempo_decorrido = (datetime.now(TZ_LOCAL) - data.last_update).seconds // 60
+    st.markdown(data.metrics_html.replace(TEMPO_DECORRIDO, str(tempo_decorrido)), unsafe_allow_html=True)
 
-def parse_rss_feeds():
-    """Parse de RSS com tratamento de erro"""
-    if not FEEDPARSER_AVAILABLE:
-        return []
-    
-    feeds = [
-        "https://g1.globo.com/rss/g1/mg/zona-da-mata/",
-        "https://www.em.com.br/rss/gerais.xml"
-    ]
-    
-    noticias = []
-    for feed_url in feeds:
-        try:
-            feed = feedparser.parse(feed_url)
-            for entry in feed.entries[:5]:
-                titulo = entry.get('title', '')
-                if any(k in titulo.lower() for k in ['juiz de fora', 'jf', 'enchente', 'chuva', 'deslizamento']):
-                    noticias.append({
-                        "fonte": feed.feed.get('title', 'RSS'),
-                        "titulo": titulo,
-                        "horario": entry.get('published', datetime.now().strftime("%d/%m %H:%M"))[:16],
-                        "resumo": entry.get('summary', '')[:150] + "...",
-                        "tipo": "RSS",
-                        "url": entry.get('link', '#')
-                    })
-        except Exception as e:
-            continue
-    return noticias
+def display_news_feed(data):
+    """Feed de notícias com links funcionando (HTML pré-renderizado do snapshot)"""
+    st.markdown(data.feed_html, unsafe_allow_html=True)
 
-def fetch_news_api():
-    """API de notícias com chave de secrets"""
-    try:
-        api_key = st.secrets.get("NEWS_API_KEY", os.getenv("NEWS_API_KEY", ""))
-        
-        if not api_key:
-            return []
-            
-        url = "https://newsapi.org/v2/everything"
-        params = {
-            "q": "Juiz de Fora enchente OR deslizamento OR chuva",
-            "language": "pt",
-            "sortBy": "publishedAt",
-            "pageSize": 5,
-            "apiKey": api_key
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
-        
-        noticias = []
-        if data.get("status") == "ok":
-            for article in data.get("articles", []):
-                noticias.append({
-                    "fonte": article.get("source", {}).get("name", "NewsAPI"),
-                    "titulo": article.get("title", ""),
-                    "horario": article.get("publishedAt", "")[:16].replace("T", " "),
-                    "resumo": (article.get("description", "") or "")[:150] + "...",
-                    "tipo": "API",
-                    "url": article.get("url", "#")
-                })
-        return noticias
-    except:
-        return []
+def display_confirmed_bairros(data):
+    """Bairros com ocorrências confirmadas nos boletins, com o escore de risco atual ao lado"""
+    import pandas as pd
+    st.subheader("Bairros com ocorrências confirmadas")
+    bairros = servicos.data_manager.bairros_base.get(data.regiao)
+    if not bairros:
+        st.info(f"Ainda não há levantamento de bairros para {data.nome}")
+        return
+    escores = {b["bairro"]: b["escore"] for b in data.bairros}
+    df_bairros = pd.DataFrame([
+        {"Bairro": b, "Tipo": d["tipo"], "Gravidade": d["gravidade"],
+         "Status": d["status"], "Vítimas": d.get("vítimas", 0), "Escore atual": escores.get(b)}
+        for b, d in bairros.items()
+    ])
+    st.dataframe(df_bairros, use_container_width=True, hide_index=True)
 
-def extract_metrics_from_news(news_list):
-    """Extrai métricas usando regex"""
-    metrics = {"mortes": None, "desaparecidos": None, "desabrigados": None, "desalojados": None}
-    
-    patterns = {
-        "mortes": r'(\d+)\s*(?:mortes?|óbitos?|vítimas?\s*fatais?)',
-        "desaparecidos": r'(\d+)\s*(?:desaparecidos?)',
-        "desabrigados": r'(\d+)[\.\d]*\s*(?:desabrigados?)',
-        "desalojados": r'(\d+)\s*(?:desalojados?)'
-    }
-    
-    for news in news_list:
-        texto = f"{news.get('titulo', '')} {news.get('resumo', '')}"
-        for key, pattern in patterns.items():
-            matches = re.findall(pattern, texto.lower())
-            if matches:
-                nums = [int(m.replace('.', '')) for m in matches]
-                if metrics[key] is None or max(nums) > metrics[key]:
-                    metrics[key] = max(nums)
-    
-    return metrics
+def display_bairros_risk(data):
+    """Bairros ordenados pelo escore de risco calculado a partir da chuva acumulada"""
+    import pandas as pd
+    st.subheader("Risco por bairro")
+    if not data.bairros:
+        st.info(f"Ainda não há cadastro de bairros para {data.nome}")
+        return
+    
+    df_bairros = pd.DataFrame([
+        {"Bairro": b["bairro"], "Tipo": b["tipo"], "Gravidade": b["gravidade"], "Escore": b["escore"],
+         "Suscetibilidade": b["suscetibilidade"].replace("_", " "), "Ocorrências registradas": b["ocorrencias"],
+         "Classe": "estimada" if b.get("estimado", True) else "boletim"}
+        for b in data.bairros
+    ])
+    criticos = df_bairros[df_bairros["Gravidade"] == "Crítica"]
+    if len(criticos):
+        estimados = (criticos["Classe"] == "estimada").sum()
+        aviso = f" ({estimados} com classe de suscetibilidade estimada, não oficial)" if estimados else ""
+        st.error(f"⚠️ {len(criticos)} bairro(s) em risco crítico com a chuva das últimas 72 h{aviso}")
+    if (df_bairros["Classe"] == "estimada").any():
+        st.warning(
+            "Cadastro provisório: só os bairros com classe \"boletim\" vêm dos boletins da Defesa Civil. "
+            "Nos demais, tipo, suscetibilidade e ocorrências foram estimados e o escore é apenas indicativo."
+        )
+    st.dataframe(
+        df_bairros, use_container_width=True, hide_index=True,
+        column_config={"Escore": st.column_config.ProgressColumn("Escore", min_value=0, max_value=100, format="%.0f")}
+    )
+    contagem = df_bairros["Gravidade"].value_counts().reindex([nome for _, nome in GRAVIDADE_FAIXAS], fill_value=0)
+    st.bar_chart(contagem, color="#dc2626")
+    st.caption("Escore = suscetibilidade x (chuva acumulada ponderada pelo tipo de risco + histórico de ocorrências)")
 
-def fetch_weather_data():
-    """Dados meteorológicos da Open-Meteo (gratuita, não precisa de chave)"""
-    try:
-        url = "https://api.open-meteo.com/v1/forecast"
-        params = {
-            "latitude": -21.76,
-            "longitude": -43.35,
-            "current": ["temperature_2m", "relative_humidity_2m", "precipitation", "rain"],
-            "daily": ["precipitation_sum", "rain_sum"],
-            "timezone": "America/Sao_Paulo",
-            "forecast_days": 3
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
-        
-        current = data.get("current", {})
-        daily = data.get("daily", {})
-        
-        return {
-            "temperatura": current.get("temperature_2m", "N/A"),
-            "umidade": current.get("relative_humidity_2m", "N/A"),
-            "precipitacao_atual": current.get("precipitation", 0),
-            "previsao_hoje": daily.get("precipitation_sum", [0])[0] if daily.get("precipitation_sum") else 0,
-            "previsao_amanha": daily.get("precipitation_sum", [0, 0])[1] if len(daily.get("precipitation_sum", [])) > 1 else 0
-        }
-    except Exception as e:
-        return None
+def display_occurrence_map(data):
+    """Mapa de ocorrências: só os grupos dentro do enquadramento escolhido vão para o navegador"""
+    import pandas as pd
+    st.subheader("Mapa de ocorrências")
+    camada = data.ocorrencias
+    if not len(camada):
+        st.info(f"Nenhuma ocorrência georreferenciada para {data.nome}")
+        return
+    
+    regiao = REGIOES[data.regiao]
+    centros = {f"{data.nome} (cidade)": (regiao["latitude"], regiao["longitude"])}
+    centros.update({b["bairro"]: (b["latitude"], b["longitude"]) for b in sorted(data.bairros, key=lambda b: b["bairro"])})
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        centro = st.selectbox("Centralizar em", list(centros), key="mapa_centro")
+    with col2:
+        zoom = st.slider("Zoom", 10, 17, 13, key="mapa_zoom")
+    lat, lon = centros[centro]
+    
+    import pydeck as pdk  # só quem abre a aba de bairros paga o import
+    visiveis_lat, visiveis_lon = camada.visible(*viewport(lat, lon, zoom))
+    grupos = cluster_points(visiveis_lat, visiveis_lon, zoom)
+    grupos["raio"] = 40 * grupos["ocorrencias"] ** 0.5 * 2 ** (13 - zoom) + 20
+    # O mapa abre no mesmo centro, zoom e tamanho usados para recortar os pontos (`viewport`)
+    camada_mapa = pdk.Layer(
+        "ScatterplotLayer", grupos, get_position=["longitude", "latitude"], get_radius="raio",
+        get_fill_color=[220, 38, 38, 170], pickable=True
+    )
+    st.pydeck_chart(pdk.Deck(
+        layers=[camada_mapa], initial_view_state=pdk.ViewState(latitude=lat, longitude=lon, zoom=zoom),
+        map_style=None, tooltip={"text": "{ocorrencias} ocorrência(s)"}
+    ), width=MAPA_LARGURA_PX, height=MAPA_ALTURA_PX)
+    st.caption(f"{len(visiveis_lat)} de {len(camada)} ocorrências no enquadramento, em {len(grupos)} grupo(s)")
+    
+    proximas = camada.nearest(lat, lon, k=5)
+    st.markdown(f"**Ocorrências mais próximas de {centro}**")
+    st.dataframe(pd.DataFrame([
+        {"Bairro": o["bairro"], "Tipo": o["tipo"], "Distância (m)": round(o["distancia_m"]),
+         "Registro": o["registrado_em"], "Origem": o["origem"], "Título": o["titulo"]}
+        for o in proximas
+    ]), use_container_width=True, hide_index=True)
 
-# =============================================================================
-# AGREGADOR DE DADOS COM CACHE
-# =============================================================================
+def display_rainfall(data):
+    """Acumulados móveis, alertas de limiar e gráficos da série horária de chuva"""
+    import pandas as pd
+    chuva = data.chuva
+    if not chuva:
+        st.info("Série horária de precipitação ainda não disponível para esta região")
+        return
+    
+    st.subheader("Chuva acumulada")
+    cols = st.columns(len(CHUVA_JANELAS) + 1)
+    for col, janela in zip(cols, CHUVA_JANELAS):
+        col.metric(f"Últimas {janela} h", f"{chuva['janelas'][janela]:.1f}mm")
+    cols[-1].metric("No mês", f"{chuva['mes']:.1f}mm")
+    
+    for janela in CHUVA_JANELAS:
+        if chuva["janelas"][janela] >= CHUVA_LIMIARES[janela]:
+            st.error(f"⚠️ {chuva['janelas'][janela]:.1f}mm em {janela} h — acima do limiar de alerta ({CHUVA_LIMIARES[janela]:.0f}mm)")
+    
+    st.subheader(f"Precipitação diária - últimos {len(chuva['diaria'])} dias")
+    df_diaria = pd.DataFrame(chuva["diaria"], columns=["Dia", "mm"])
+    st.bar_chart(df_diaria.set_index("Dia"), color="#3b82f6")
+    
+    st.subheader("Precipitação horária - últimas 72 h e próximas 48 h")
+    previsao = (data.weather or {}).get("previsao_horaria", ())
+    df_horaria = pd.DataFrame(
+        [(h, mm, 0.0) for h, mm in chuva["horaria"]] + [(h, 0.0, mm) for h, mm in previsao],
+        columns=["Hora", "Observada", "Prevista"]
+    ).set_index("Hora")
+    st.bar_chart(df_horaria, color=["#3b82f6", "#93c5fd"])
+    
+    st.dataframe(pd.DataFrame([
+        {"Janela": f"{janela} h", "Limiar (mm)": CHUVA_LIMIARES[janela], "Máximo (mm)": round(chuva["maximos"][janela], 1),
+         "Horas acima do limiar": chuva["excedencias"][janela]}
+        for janela in CHUVA_JANELAS
+    ]), use_container_width=True, hide_index=True)
+    st.caption(f"Fonte: Open-Meteo (série horária) - dados até {chuva['ultima_hora'].strftime('%d/%m %H:%M')}")
 
-@st.cache_data(ttl=300)
-def aggregate_all_data():
-    """Agrega dados de todas as fontes com fallback garantido"""
-    
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    # 1. Dados base (sempre disponíveis)
-    status_text.text("Carregando dados base...")
-    all_news = data_manager.noticias_base.copy()
-    progress_bar.progress(25)
-    
-    # 2. Tentar scraping
-    status_text.text("Buscando dados da Defesa Civil...")
-    news_scraping = scrape_defesa_civil()
-    all_news.extend(news_scraping)
-    progress_bar.progress(50)
-    
-    # 3. Tentar RSS
-    status_text.text("Lendo feeds de notícias...")
-    news_rss = parse_rss_feeds()
-    all_news.extend(news_rss)
-    progress_bar.progress(75)
-    
-    # 4. Tentar API
-    status_text.text("Consultando APIs...")
-    news_api = fetch_news_api()
-    all_news.extend(news_api)
-    progress_bar.progress(90)
-    
-    # 5. Dados meteorológicos
-    status_text.text("Obtendo dados meteorológicos...")
-    weather = fetch_weather_data()
-    progress_bar.progress(100)
-    
-    time.sleep(0.5)  # Feedback visual
-    progress_bar.empty()
-    status_text.empty()
-    
-    # Remover duplicatas
-    seen = set()
-    unique_news = []
-    for n in all_news:
-        titulo = n.get('titulo', '')
-        if titulo and titulo not in seen:
-            seen.add(titulo)
-            unique_news.append(n)
-    
-    unique_news.sort(key=lambda x: x.get('horario', ''), reverse=True)
-    
-    # Extrair métricas ou usar fallback
-    extracted = extract_metrics_from_news(unique_news)
-    metrics = {
-        "mortes": extracted.get("mortes") or data_manager.historical_data["mortes"],
-        "desaparecidos": extracted.get("desaparecidos") or data_manager.historical_data["desaparecidos"],
-        "desabrigados": extracted.get("desabrigados") or data_manager.historical_data["desabrigados"],
-        "desalojados": extracted.get("desalojados") or data_manager.historical_data["desalojados"],
-        "chuva_acumulada_fev": data_manager.historical_data["chuva_acumulada_fev"],
-        "chuva_48h": data_manager.historical_data["chuva_48h"],
-        "ocorrencias": data_manager.historical_data["ocorrencias"],
-        "data_atualizacao": datetime.now().strftime("%d/%m/%Y %H:%M")
-    }
-    
-    return {
-        "noticias": unique_news[:15],
-        "metrics": metrics,
-        "weather": weather,
-        "last_update": datetime.now(),
-        "sources_online": len(news_scraping) + len(news_rss) + len(news_api)
-    }
+SNAPSHOT_POLL_INTERVAL = 15  # segundos entre verificações da versão do snapshot
 
-# =============================================================================
-# INTERFACE DO USUÁRIO
-# =============================================================================
+# st.fragment (1.37+) ou st.experimental_fragment (1.33-1.36); antes disso não há reruns parciais
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
 
-def display_realtime_metrics(data):
-    """Exibe métricas com indicadores visuais"""
-    col1, col2, col3, col4, col5 = st.columns([2,2,2,2,2])
-    
-    metrics = data["metrics"]
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div style="display: flex; justify-content: space-between; align-items: center;">
-                <span class="update-badge">● ATUALIZADO</span>
-            </div>
-            <h3 style="margin:10px 0 0 0; color:#dc2626; font-size:2.5rem;">{metrics['mortes']}</h3>
-            <p style="margin:0; color:#7f1d1d; font-weight:bold;">ÓBITOS</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3 style="margin:0; color:#f59e0b; font-size:2.5rem;">{metrics['desaparecidos']}</h3>
-            <p style="margin:0; color:#92400e; font-weight:bold;">DESAPARECIDOS</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3 style="margin:0; color:#2563eb; font-size:2.5rem;">{metrics['desabrigados']:,}</h3>
-            <p style="margin:0; color:#1e40af; font-weight:bold;">DESABRIGADOS</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3 style="margin:0; color:#7c3aed; font-size:2.5rem;">{metrics['desalojados']}</h3>
-            <p style="margin:0; color:#5b21b6; font-weight:bold;">DESALOJADOS</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col5:
-        last_update = data.get('last_update', datetime.now())
-        tempo_decorrido = (datetime.now() - last_update).seconds // 60
-        fontes = data.get('sources_online', 0)
-        
-        st.markdown(f"""
-        <div style="background: #ecfdf5; border: 2px solid #10b981; border-radius: 0.5rem; padding: 1rem; text-align: center;">
-            <div style="font-size: 2rem;">🔄</div>
-            <div style="font-size: 0.875rem; color: #059669; font-weight: bold;">
-                Há {tempo_decorrido} min
-            </div>
-            <div style="font-size: 0.75rem; color: #6b7280; margin-top: 5px;">
-                {fontes} fontes online
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+def live_fragment(func):
+    """Reexecuta só `func` a cada SNAPSHOT_POLL_INTERVAL segundos, sem rerun da página.
+    
+    Sem suporte a fragments, `func` roda normalmente, uma vez por rerun.
+    """
+    if _fragment is None:
+        return func
+    return _fragment(run_every=SNAPSHOT_POLL_INTERVAL)(func)
+
+@live_fragment
+def live_metrics(regiao):
+    """Bloco de métricas: a cada verificação relê o snapshot (o HTML só muda com a versão)"""
+    snapshot = get_refresher().latest()
+    if snapshot.version == 0:
+        st.caption("⏳ Buscando fontes em segundo plano — exibindo dados base por enquanto")
+    display_realtime_metrics(snapshot.regiao(regiao))
+
+@live_fragment
+def live_news(regiao):
+    """Feed de notícias: avisa quando uma versão nova traz notícias que a sessão ainda não viu"""
+    snapshot = get_refresher().latest()
+    data = snapshot.regiao(regiao)
+    versao, vistas = st.session_state.get(f"feed_{regiao}", (None, None))
+    if versao != snapshot.version:
+        titulos = frozenset(n["titulo"] for n in data.noticias)
+        novas = len(titulos - vistas) if vistas is not None else 0
+        if novas:
+            st.toast(f"📰 {novas} notícia(s) nova(s) em {data.nome}")
+        st.session_state[f"feed_{regiao}"] = (snapshot.version, titulos)
+    display_news_feed(data)
+
+BUSCA_POR_PAGINA = 20
+
+def display_news_search(data):
+    """Busca no arquivo completo de notícias; devolve False se nenhuma busca foi feita"""
+    consulta = st.text_input(
+        "🔎 Buscar no arquivo de notícias", key="busca_texto",
+        placeholder='ex.: deslizamento, "queda de barreira", alag*'
+    )
+    with st.expander("Filtros da busca"):
+        col1, col2, col3 = st.columns(3)
+        fontes = col1.multiselect("Fontes", servicos.news_store.sources(), key="busca_fontes")
+        bairro = col2.selectbox("Bairro", ["Todos", *sorted(b["bairro"] for b in data.bairros)], key="busca_bairro")
+        periodo = col3.date_input("Publicadas entre", value=(), format="DD/MM/YYYY", key="busca_periodo")
+        col4, col5, col6 = st.columns(3)
+        ordem = BUSCA_ORDENS[col4.radio("Ordenar por", list(BUSCA_ORDENS), horizontal=True, key="busca_ordem")]
+        so_regiao = col5.checkbox(f"Só {data.nome}", value=True, key="busca_regiao")
+        pagina = col6.number_input("Página", min_value=1, value=1, key="busca_pagina")
+    bairro = None if bairro == "Todos" else bairro
+    if not (consulta.strip() or fontes or bairro or periodo):
+        return False
+    
+    desde = ate = None
+    if periodo:
+        desde = datetime.combine(periodo[0], datetime.min.time(), TZ_LOCAL).timestamp()
+        ate = datetime.combine(periodo[-1] + timedelta(days=1), datetime.min.time(), TZ_LOCAL).timestamp()
+    inicio = time.perf_counter()
+    noticias, mais = servicos.news_store.search(
+        consulta, fontes=fontes, bairro=bairro, desde=desde, ate=ate, regiao=data.regiao if so_regiao else None,
+        ordem=ordem, limit=BUSCA_POR_PAGINA, offset=(pagina - 1) * BUSCA_POR_PAGINA
+    )
+    decorrido = (time.perf_counter() - inicio) * 1000
+    
+    if not noticias:
+        st.info("Nenhuma notícia encontrada no arquivo com esses critérios")
+        return True
+    primeira = (pagina - 1) * BUSCA_POR_PAGINA + 1
+    st.caption(
+        f"Resultados {primeira}-{primeira + len(noticias) - 1}{' (há mais na próxima página)' if mais else ''} "
+        f"em {decorrido:.1f} ms"
+    )
+    st.markdown("".join(render_news_card(n) for n in noticias), unsafe_allow_html=True)
+    return True
+
+TIMELINE_PERIODOS = {"24 horas": 86400, "7 dias": 7 * 86400, "30 dias": 30 * 86400, "Tudo": None}
+
+def display_timeline(data):
+    """Evolução das métricas, lida das agregações pré-calculadas (5 min, hora, dia)"""
+    st.subheader("Evolução da crise")
+    col1, col2 = st.columns(2)
+    periodo = col1.selectbox("Período", list(TIMELINE_PERIODOS), index=1, key="evolucao_periodo")
+    resolucao = col2.selectbox("Resolução", ["automática", *TIMELINE_RESOLUCOES], key="evolucao_resolucao")
+    
+    janela = TIMELINE_PERIODOS[periodo]
+    if resolucao == "automática":
+        resolucao = servicos.metrics_timeline.resolution_for(janela or servicos.metrics_timeline.span(data.regiao))
+    df = servicos.metrics_timeline.read(data.regiao, resolucao, desde=time.time() - janela if janela else None)
+    if df.empty:
+        st.info("Ainda não há histórico registrado para esta região")
+        return
+    
+    st.markdown("**Óbitos e desaparecidos**")
+    st.line_chart(df[["mortes", "desaparecidos"]], color=["#dc2626", "#f59e0b"])
+    st.markdown("**Desabrigados e desalojados**")
+    st.line_chart(df[["desabrigados", "desalojados"]], color=["#2563eb", "#7c3aed"])
+    st.markdown("**Chuva acumulada (mm)**")
+    st.line_chart(df[["chuva_24h", "chuva_72h"]], color=["#3b82f6", "#1e3a8a"])
+    st.caption(f"{len(df)} pontos na resolução {resolucao} ({int(df['amostras'].sum())} leituras)")
+
+def display_ops_panel(data):
+    """Painel de operações: atualizador, saúde das fontes e métricas do pipeline de ingestão"""
+    import pandas as pd
+    refresher = get_refresher()
+    st.subheader("Atualização em segundo plano")
+    idade = (datetime.now(TZ_LOCAL) - data.last_update).total_seconds()
+    falhas = sum(s["valor"] for s in servicos.pipeline_metrics.to_dict().get("enchentes_atualizacao_erros_total", []))
+    cols = st.columns(3)
+    cols[0].metric("Idade do snapshot", f"{int(idade // 60)} min {int(idade % 60):02d} s")
+    cols[1].metric("Versão do snapshot", data.version)
+    cols[2].metric("Falhas desde o início", falhas)
+    if idade > 2 * refresher.interval:
+        st.warning("O snapshot passou de duas vezes o intervalo de atualização: as fontes ou o atualizador estão falhando")
+    if refresher.last_error:
+        quando, erro = refresher.last_error
+        st.error(f"Última falha ({datetime.fromtimestamp(quando, TZ_LOCAL).strftime('%d/%m %H:%M:%S')}): {erro}")
+    
+    st.subheader("Saúde das fontes")
+    st.dataframe(pd.DataFrame([
+        {"Fonte": f["nome"], "Estado": f["estado"], "Falhas seguidas": f["falhas"],
+         "Itens (última busca)": f["itens"], "Último erro": f["ultimo_erro"] or ""}
+        for f in data.sources
+    ]), use_container_width=True, hide_index=True)
+    
+    metricas = servicos.pipeline_metrics.to_dict()
+    etapas = metricas.get("enchentes_etapa_segundos", [])
+    if etapas:
+        st.subheader("Latência por fonte e etapa")
+        df_etapas = pd.DataFrame([
+            {"Fonte": e["fonte"], "Etapa": e["etapa"], "Execuções": e["count"],
+             "p50 (ms)": round((e["p50"] or 0) * 1000, 1), "p95 (ms)": round((e["p95"] or 0) * 1000, 1),
+             "Total (s)": round(e["sum"], 3)}
+            for e in etapas
+        ]).sort_values("Total (s)", ascending=False)
+        st.dataframe(df_etapas, use_container_width=True, hide_index=True)
+    
+    contadores = {
+        "Bytes recebidos": "enchentes_bytes_recebidos_total",
+        "Itens extraídos": "enchentes_itens_total",
+        "Cache (hit/miss)": "enchentes_cache_total",
+        "Erros": "enchentes_erros_total",
+        "Pedidos de atualização": "enchentes_pedidos_atualizacao_total",
+        "Snapshot compartilhado": "enchentes_snapshot_compartilhado_total",
+        "API": "enchentes_api_respostas_total",
+    }
+    cols = st.columns(len(contadores))
+    for col, (titulo, nome) in zip(cols, contadores.items()):
+        with col:
+            st.markdown(f"**{titulo}**")
+            linhas = metricas.get(nome, [])
+            if linhas:
+                st.dataframe(pd.DataFrame(linhas), use_container_width=True, hide_index=True)
+            else:
+                st.caption("Sem registros")
+    
+    porta = os.getenv("ENCHENTES_METRICS_PORT")
+    if porta:
+        st.caption(f"Exportação: http://<host>:{porta}/metrics (Prometheus) e /metrics.json")
+    else:
+        st.caption("Defina ENCHENTES_METRICS_PORT para expor /metrics (Prometheus) e /metrics.json")
+    
+    porta_api = os.getenv("ENCHENTES_API_PORT")
+    if porta_api:
+        st.caption(f"API somente leitura: http://<host>:{porta_api}/api/v1 (JSON, CSV e Parquet)")
+    else:
+        st.caption("Defina ENCHENTES_API_PORT para expor a API /api/v1 (ou rode `python enchentes.py serve`)")
+    
+    cache = os.getenv("ENCHENTES_SNAPSHOT_CACHE")
+    if cache:
+        if cache.startswith("redis://"):
+            cache = f"redis://{urlsplit(cache).hostname}:{urlsplit(cache).port or 6379}"  # sem a senha
+        st.caption(f"Snapshot compartilhado entre réplicas: {cache}")
+    else:
+        st.caption("Defina ENCHENTES_SNAPSHOT_CACHE (arquivo ou redis://) para várias réplicas compartilharem o snapshot")
 
-def display_news_feed(noticias):
-    """Feed de notícias com links funcionando"""
-    st.subheader(f"📰 Central de Notícias ({len(noticias)} atualizações)")
-    
-    for i, noticia in enumerate(noticias[:10]):
-        # Garantir que todos os campos existam
-        fonte = noticia.get("fonte", "Fonte desconhecida")
-        horario = noticia.get("horario", datetime.now().strftime("%d/%m %H:%M"))
-        titulo = noticia.get("titulo", "Sem título")
-        resumo = noticia.get("resumo", "Clique no link para ler a matéria completa")
-        url = noticia.get("url", "")
-        
-        # Cor da fonte baseada no nome
-        cor_fonte = {
-            "Defesa Civil MG": "#dc2626",
-            "Defesa Civil (Web)": "#dc2626",
-            "G1 Zona da Mata": "#c4170c",
-            "CNN Brasil": "#cc0000",
-            "NewsAPI": "#2563eb",
-            "Prefeitura JF": "#059669",
-            "Corpo de Bombeiros MG": "#d97706",
-            "RSS": "#6b7280"
-        }.get(fonte, "#6b7280")
-        
-        # Construir o link apenas se for válido
-        link_html = ""
-        if url and url != "#" and url.startswith(("http://", "https://")):
-            link_html = f'<a href="{url}" target="_blank" style="color: #2563eb; font-size: 0.875rem; margin-top: 0.5rem; display: inline-block;">🔗 Ler matéria completa →</a>'
-        elif fonte == "Defesa Civil (Web)":
-            # Se veio de scraping mas sem link específico, usar link da fonte
-            link_html = f'<span style="color: #6b7280; font-size: 0.875rem;">ℹ️ Fonte: {fonte}</span>'
-        
-        st.markdown(f"""
-        <div class="news-card" style="border-left: 4px solid {cor_fonte};">
-            <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 0.5rem;">
-                <span style="background-color: {cor_fonte}; color: white; padding: 0.25rem 0.5rem; 
-                             border-radius: 0.25rem; font-size: 0.75rem; font-weight: bold;">
-                    {fonte}
-                </span>
-                <span style="color: #6b7280; font-size: 0.875rem;">{horario}</span>
-            </div>
-            <h4 style="margin: 0.5rem 0; color: #111827;">{titulo}</h4>
-            <p style="margin: 0; color: #4b5563; line-height: 1.5;">{resumo}</p>
-            {link_html}
-        </div>
-        """, unsafe_allow_html=True)
-        
 def main():
+    st.set_page_config(**PAGE_CONFIG)
+    st.markdown(PAGE_CSS, unsafe_allow_html=True)
+    
+    # Região monitorada
+    regiao = st.sidebar.selectbox(
+        "📍 Região", list(REGIOES), index=list(REGIOES).index(REGIAO_PADRAO),
+        format_func=lambda slug: REGIOES[slug]["nome"]
+    )
+    
     # Header
-    st.markdown('<h1 class="main-header">🌊 DASHBOARD ENCHENTES JUIZ DE FORA</h1>', unsafe_allow_html=True)
+    st.markdown(f'<h1 class="main-header">🌊 DASHBOARD ENCHENTES {html.escape(REGIOES[regiao]["nome"].upper())}</h1>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Monitoramento em tempo real - dados atualizados automaticamente</p>', unsafe_allow_html=True)
     
-    # Aviso se estiver em modo demo
-    if not BS4_AVAILABLE:
-        st.markdown("""
-        <div class="demo-mode">
-            <strong>⚠️ Modo de demonstração ativo</strong><br>
-            Algumas funcionalidades de web scraping estão desativadas. 
-            Para funcionalidade completa, instale: <code>pip install beautifulsoup4 lxml</code>
-        </div>
-        """, unsafe_allow_html=True)
-    
     # Controles
     col1, col2, col3 = st.columns([2, 2, 2])
     with col1:
         if st.button("🔄 Atualizar Agora", type="primary"):
-            st.cache_data.clear()
-            st.rerun()
+            previsto = datetime.fromtimestamp(get_refresher().request_refresh(), TZ_LOCAL).strftime("%H:%M:%S")
+            if _fragment:
+                st.toast(f"Atualização solicitada para {previsto} — os dados novos aparecem sozinhos")
+            else:
+                st.toast(f"Atualização solicitada para {previsto} — recarregue a página em seguida")
     with col2:
         st.error("🔴 Estado de Calamidade Pública")
     with col3:
-        st.info(f"⏱️ {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+        st.info(f"⏱️ {datetime.now(TZ_LOCAL).strftime('%d/%m/%Y %H:%M:%S')}")
     
-    # Carregar dados
-    data = aggregate_all_data()
+    # Ler o último snapshot publicado (nunca bloqueia na rede)
+    snapshot = get_refresher().latest()
+    data = snapshot.regiao(regiao)
     
     st.divider()
-    display_realtime_metrics(data)
+    live_metrics(regiao)
     st.divider()
     
     # Tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["📰 Notícias", "🗺️ Bairros afetados", "🌦️ Meteorologia", "ℹ️ Sobre"])
+    tab1, tab2, tab3, tab_evolucao, tab_ops, tab4 = st.tabs(
+        ["📰 Notícias", "🗺️ Bairros afetados", "🌦️ Meteorologia", "📈 Evolução", "⚙️ Operações", "ℹ️ Sobre"]
+    )
     
     with tab1:
-        display_news_feed(data["noticias"])
+        if not display_news_search(data):
+            live_news(regiao)
     
     with tab2:
-        st.subheader("Bairros com ocorrências confirmadas")
-        df_bairros = pd.DataFrame([
-            {"Bairro": b, "Tipo": d["tipo"], "Gravidade": d["gravidade"], 
-             "Status": d["status"], "Vítimas": d.get("vítimas", 0)}
-            for b, d in data_manager.bairros_base.items()
-        ])
-        st.dataframe(df_bairros, use_container_width=True, hide_index=True)
-        st.bar_chart(df_bairros["Gravidade"].value_counts(), color="#dc2626")
+        display_confirmed_bairros(data)
+        display_bairros_risk(data)
+        display_occurrence_map(data)
     
     with tab3:
-        weather = data.get("weather")
+        weather = data.weather
         if weather:
             cols = st.columns(4)
             cols[0].metric("Temperatura", f"{weather.get('temperatura', 'N/A')}°C")
@@ -543,13 +454,13 @@ def main():
         else:
             st.warning("Dados meteorológicos temporariamente indisponíveis")
 
-        # Gráfico histórico
-        st.subheader("Histórico de precipitação - Fevereiro 2026")
-        dias = list(range(20, 26))
-        chuva = [15, 45, 89, 138.6, 45, 12]
-        df_chuva = pd.DataFrame({"Dia": [f"{d}/02" for d in dias], "mm": chuva})
-        st.bar_chart(df_chuva.set_index("Dia"), color="#3b82f6")
-        st.caption("Fonte: INMET/CEMADEN - Dados até 24/02/2026")
+        display_rainfall(data)
+
+    with tab_evolucao:
+        display_timeline(data)
+
+    with tab_ops:
+        display_ops_panel(snapshot)
 
     with tab4:
         st.markdown("""
@@ -564,15 +475,21 @@ def main():
         
         **Atualização:**
         - Dados atualizados automaticamente a cada 5 minutos
+        - Cada fonte é consultada uma única vez e suas notícias são distribuídas entre as regiões monitoradas
         - Cache local para otimização de performance
         - Extração automática de métricas usando NLP
+        - Busca em todo o arquivo de notícias (SQLite FTS5, sem diferenciar acentos)
         
         **Tecnologias:**
         - Streamlit para interface
-        - BeautifulSoup para scraping
+        - html.parser (leitura em blocos) para scraping
         - Feedparser para RSS
         - Regex/NLP para extração de dados
         """)
         
 if __name__ == "__main__":
-    main()
+    from streamlit import runtime
+    if runtime.exists():
+        main()
+    else:
+        cli()
@@ -0,0 +1,48 @@
+"""Utilidades compartilhadas pelos benchmarks: importa o dashboard fora do Streamlit."""
+import importlib
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(ROOT, "app", "pages")
+MODULOS = ("api", "arquivo", "atualizacao", "chuva", "compartilhamento", "fontes", "historico", "metricas",
+           "ocorrencias", "regioes", "renderizacao", "risco", "servicos", "textos")
+
+
+def load_app(data_dir=None):
+    """Importa `enchentes.py` em modo "bare" (sem servidor Streamlit) com dados isolados.
+
+    Devolve o pacote `enchentes_jf` com os módulos usados pelos benchmarks já
+    carregados (`app.fontes`, `app.servicos`...); a página fica em `import enchentes`.
+    """
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    os.environ["ENCHENTES_DATA_DIR"] = data_dir or tempfile.mkdtemp(prefix="enchentes-bench-")
+    if PAGES_DIR not in sys.path:
+        sys.path.insert(0, PAGES_DIR)
+    import enchentes  # põe app/ no sys.path e configura a página
+    import enchentes_jf
+    # Fora do servidor não há ScriptRunContext: cada st.* (cache_resource,
+    # secrets) chamado pelos benchmarks registraria um aviso. `disabled` e não
+    # setLevel, que o Streamlit refaz ao carregar a configuração.
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").disabled = True
+    for modulo in MODULOS:
+        importlib.import_module(f"enchentes_jf.{modulo}")
+    return enchentes_jf
+
+
+@contextmanager
+def timer(results, name):
+    inicio = time.perf_counter()
+    yield
+    results[name] = time.perf_counter() - inicio
+
+
+def report(title, rows):
+    print(f"\n== {title} ==")
+    largura = max(len(nome) for nome, _ in rows)
+    for nome, valor in rows:
+        print(f"  {nome:<{largura}}  {valor}")
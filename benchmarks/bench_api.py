@@ -0,0 +1,110 @@
+"""Benchmark da API somente leitura (/api/v1) com muitos clientes consultando em intervalos.
+
+Sobe o `StubServer`, faz uma atualização e mede:
+  - custo de gerar cada rota (primeira consulta do snapshot) x servir do cache;
+  - vazão com N clientes em conexões persistentes, baixando o corpo (gzip) ou
+    revalidando com If-None-Match (304, sem corpo);
+  - tamanho das exportações CSV/Parquet.
+
+Uso: python benchmarks/bench_api.py [--clientes 50] [--duracao 3]
+"""
+import argparse
+import http.client
+import threading
+import time
+
+from _common import load_app, report
+from stub_server import StubServer, point_app_at
+
+ROTAS = [
+    "/api/v1/regioes/juiz-de-fora",
+    "/api/v1/regioes/juiz-de-fora/noticias",
+    "/api/v1/regioes/juiz-de-fora/bairros",
+    "/api/v1/regioes/juiz-de-fora/historico",
+    "/api/v1/noticias?q=chuva",
+]
+
+
+def poll(porta, duracao, revalidar, contagem):
+    """Um cliente: consulta as rotas em sequência até o fim de `duracao`"""
+    conexao = http.client.HTTPConnection("127.0.0.1", porta)
+    etags, n, fim = {}, 0, time.perf_counter() + duracao
+    while time.perf_counter() < fim:
+        rota = ROTAS[n % len(ROTAS)]
+        headers = {"Accept-Encoding": "gzip"}
+        if revalidar and rota in etags:
+            headers["If-None-Match"] = etags[rota]
+        conexao.request("GET", rota, headers=headers)
+        resposta = conexao.getresponse()
+        resposta.read()
+        etags[rota] = resposta.getheader("ETag")
+        contagem[resposta.status] = contagem.get(resposta.status, 0) + 1
+        n += 1
+    conexao.close()
+
+
+def throughput(porta, clientes, duracao, revalidar):
+    contagens = [{} for _ in range(clientes)]
+    threads = [threading.Thread(target=poll, args=(porta, duracao, revalidar, c)) for c in contagens]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = {}
+    for c in contagens:
+        for status, n in c.items():
+            total[status] = total.get(status, 0) + n
+    return sum(total.values()) / duracao, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clientes", type=int, default=50)
+    parser.add_argument("--duracao", type=float, default=3.0, help="segundos por cenário de vazão")
+    args = parser.parse_args()
+
+    app = load_app()
+    stub = StubServer().start()
+    point_app_at(app, stub)
+    refresher = app.atualizacao.BackgroundRefresher(interval=3600)
+    refresher.refresh_now()
+    servidor = app.api.start_api_server(0, refresher)
+    snapshot = refresher.latest()
+
+    geracao = []
+    for rota in ROTAS:
+        caminho, _, query = rota.partition("?")
+        params = dict(p.split("=") for p in query.split("&") if p)
+        inicio = time.perf_counter()
+        resposta = app.api.api_response(snapshot, caminho, params)
+        gerar = time.perf_counter() - inicio
+        cache = app.api.ResponseCache()
+        chave = (snapshot.version, caminho, tuple(params.items()))
+        cache.get(chave, lambda: resposta)
+        inicio = time.perf_counter()
+        for _ in range(1000):
+            cache.get(chave, lambda: resposta)
+        geracao.append((rota, f"gerar {gerar * 1000:7.2f} ms | cache {(time.perf_counter() - inicio) * 1000:7.2f} µs | "
+                              f"{len(resposta.body):7d} B ({len(resposta.gzip or resposta.body):6d} B gzip)"))
+    report("Custo por rota", geracao)
+
+    linhas = []
+    for nome, revalidar in (("corpo completo (gzip)", False), ("revalidação (If-None-Match)", True)):
+        vazao, status = throughput(servidor.server_port, args.clientes, args.duracao, revalidar)
+        linhas.append((nome, f"{vazao:8.0f} req/s  {status}"))
+    report(f"{args.clientes} clientes em conexões persistentes", linhas)
+
+    exportacoes = []
+    for formato in ("csv", "parquet") if app.api.PARQUET_AVAILABLE else ("csv",):
+        for rota in ("/api/v1/regioes/juiz-de-fora/bairros", "/api/v1/noticias"):
+            inicio = time.perf_counter()
+            resposta = app.api.api_response(snapshot, rota, {"formato": formato})
+            exportacoes.append((f"{rota}.{formato}", f"{len(resposta.body):8d} B em {(time.perf_counter() - inicio) * 1000:7.2f} ms"))
+    report("Exportação", exportacoes)
+
+    servidor.shutdown()
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark da detecção de mudança por hash do conteúdo.
+
+Sobe o `StubServer` sem ETag/Last-Modified (toda resposta é 200) e mede:
+  - atualização morna com o corpo igual: processamento completo a cada vez (sem
+    impressão digital guardada) x resultado reaproveitado pelo hash do corpo;
+  - feed que ganha uma entrada nova por atualização: feedparser no feed inteiro x
+    só nas entradas novas (`FeedEntryCache`), conferindo que o resultado é o mesmo.
+
+Uso: python benchmarks/bench_fingerprint.py [--repeticoes 20]
+"""
+import argparse
+import statistics
+import time
+
+from _common import load_app, report
+from bench_refresh import StageTimer, fresh_state
+from stub_server import StubServer, point_app_at
+
+ROTA_FEED = "/rss/g1/zona-da-mata/"
+
+
+def parse_seconds(app):
+    """Tempo total já gasto na etapa de parse, somando todas as fontes"""
+    return sum(s["sum"] for s in app.servicos.pipeline_metrics.to_dict().get("enchentes_etapa_segundos", [])
+               if s["etapa"] == "parse")
+
+
+def warm_refresh(app, repeticoes, esquecer):
+    """Mediana da atualização morna e parse médio; `esquecer` descarta as impressões digitais antes de cada uma"""
+    tempos, parse = [], parse_seconds(app)
+    for _ in range(repeticoes):
+        if esquecer:
+            # Mesma sessão (conexões reaproveitadas): só as impressões digitais somem
+            with app.servicos.http_client._lock:
+                app.servicos.http_client._validators.clear()
+            app.servicos.feed_entry_cache = app.fontes.FeedEntryCache()
+        inicio = time.perf_counter()
+        app.atualizacao.merge_results(app.fontes.run_fetch_tasks(app.fontes.build_fetch_tasks()))
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos), (parse_seconds(app) - parse) / repeticoes
+
+
+def add_entry(fixture, n):
+    """Publica uma entrada nova no topo do feed"""
+    item = (f"<item><title>Chuva provoca deslizamento em Juiz de Fora (atualização {n})</title>"
+            f"<link>https://g1.globo.com/mg/zona-da-mata/noticia/novo-{n}.html</link>"
+            f"<pubDate>Tue, 24 Feb 2026 10:{n % 60:02d}:00 -0300</pubDate>"
+            f"<description>Boletim {n} da Defesa Civil.</description></item>\n    ").encode()
+    corpo = fixture.body
+    inicio = corpo.index(b"<item")
+    fixture.update(corpo[:inicio] + item + corpo[inicio:])
+
+
+def changing_feed(app, stub, repeticoes):
+    """Só o processamento do corpo (sem HTTP): entradas novas x feed inteiro do zero"""
+    fixture, url = stub.fixtures[ROTA_FEED], stub.url(ROTA_FEED)
+    headers = {"content-type": fixture.content_type}
+    cache = app.fontes.FeedEntryCache()
+    cache.parse(url, fixture.body, headers)  # primeira leitura: todas as entradas são novas
+    incremental, completo, divergencias = [], [], 0
+    for n in range(repeticoes):
+        add_entry(fixture, n)
+        inicio = time.perf_counter()
+        resultado = cache.parse(url, fixture.body, headers)
+        incremental.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        esperado = app.fontes.FeedEntryCache().parse(url, fixture.body, headers)
+        completo.append(time.perf_counter() - inicio)
+        divergencias += resultado != esperado
+    return statistics.median(incremental), statistics.median(completo), divergencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    app = load_app()
+    stub = StubServer(validadores=False).start()
+    try:
+        point_app_at(app, stub)
+        fresh_state(app, StageTimer())
+        warm_refresh(app, 1, esquecer=False)  # aquece a sessão HTTP e o arquivo
+        sem_hash, parse_sem_hash = warm_refresh(app, args.repeticoes, esquecer=True)
+        antes = app.servicos.pipeline_metrics.to_dict().get("enchentes_cache_total", [])
+        com_hash, parse_com_hash = warm_refresh(app, args.repeticoes, esquecer=False)
+        inalterados = sum(s["valor"] for s in app.servicos.pipeline_metrics.to_dict()["enchentes_cache_total"]
+                          if s["resultado"] == "inalterado") - sum(s["valor"] for s in antes if s["resultado"] == "inalterado")
+        report("Atualização morna sem ETag/Last-Modified (corpo igual)", [
+            ("processando tudo", f"{sem_hash * 1000:8.1f} ms (parse {parse_sem_hash * 1000:6.1f} ms)"),
+            ("reaproveitando pelo hash", f"{com_hash * 1000:8.1f} ms (parse {parse_com_hash * 1000:6.1f} ms)"),
+            ("respostas reaproveitadas", f"{inalterados} de {args.repeticoes * len(app.fontes.build_fetch_tasks())} buscas"),
+            ("diferença", f"{(sem_hash - com_hash) * 1000:+8.1f} ms por atualização ({com_hash / sem_hash:.0%} do tempo)"),
+        ])
+
+        incremental, completo, divergencias = changing_feed(app, stub, args.repeticoes)
+        report("Feed com uma entrada nova por atualização", [
+            ("feedparser no feed inteiro", f"{completo * 1000:8.2f} ms"),
+            ("só nas entradas novas", f"{incremental * 1000:8.2f} ms"),
+            ("resultados iguais", "sim" if not divergencias else f"não ({divergencias} divergências)"),
+        ])
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
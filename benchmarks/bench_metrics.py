@@ -0,0 +1,82 @@
+"""Microbenchmark da extração de métricas sobre um corpus sintético.
+
+Uso: python benchmarks/bench_metrics.py [--artigos 100000]
+"""
+import argparse
+import random
+import re
+
+from _common import load_app, report, timer
+
+TEMPLATES = [
+    "Balanço atualizado: {n} óbitos confirmados em Juiz de Fora",
+    "Equipes continuam buscas por {n} desaparecidos no bairro {bairro}",
+    "Mais de {mil} pessoas estão desabrigadas após o temporal",
+    "Prefeitura contabiliza {milf} mil desalojados na Zona da Mata",
+    "Chuva de {n} mm atinge {bairro}; Defesa Civil monitora encostas",
+    "Trânsito interditado na região de {bairro} por queda de barreira",
+]
+BAIRROS = ["Três Moinhos", "Santa Cruz", "Benfica", "São Pedro", "Centro", "Granjas Betânia"]
+
+
+def synthetic_corpus(total, seed=42):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(total):
+        texto = rng.choice(TEMPLATES).format(
+            n=rng.randint(1, 99), mil=f"{rng.randint(1, 9)}.{rng.randint(100, 999)}",
+            milf=f"{rng.randint(1, 9)},{rng.randint(1, 9)}", bairro=rng.choice(BAIRROS)
+        )
+        corpus.append({"fonte": "Sintético", "titulo": texto, "resumo": rng.choice(TEMPLATES[-2:]).format(
+            n=rng.randint(1, 99), mil="", milf="", bairro=rng.choice(BAIRROS)), "url": f"https://exemplo/{i}"})
+    return corpus
+
+
+def legacy_extract(news_list):
+    """Implementação anterior: quatro re.findall por notícia sobre o texto em minúsculas"""
+    metrics = {"mortes": None, "desaparecidos": None, "desabrigados": None, "desalojados": None}
+    patterns = {
+        "mortes": r'(\d+)\s*(?:mortes?|óbitos?|vítimas?\s*fatais?)',
+        "desaparecidos": r'(\d+)\s*(?:desaparecidos?)',
+        "desabrigados": r'(\d+)[\.\d]*\s*(?:desabrigados?)',
+        "desalojados": r'(\d+)\s*(?:desalojados?)'
+    }
+    for news in news_list:
+        texto = f"{news.get('titulo', '')} {news.get('resumo', '')}"
+        for key, pattern in patterns.items():
+            matches = re.findall(pattern, texto.lower())
+            if matches:
+                nums = [int(m.replace('.', '')) for m in matches]
+                if metrics[key] is None or max(nums) > metrics[key]:
+                    metrics[key] = max(nums)
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--artigos", type=int, default=100_000)
+    args = parser.parse_args()
+
+    app = load_app()
+    corpus = synthetic_corpus(args.artigos)
+    tempos = {}
+
+    with timer(tempos, "legado"):
+        legado = legacy_extract(corpus)
+    with timer(tempos, "motor"):
+        engine = app.metricas.MetricsEngine()
+        engine.ingest(corpus)
+    novos = synthetic_corpus(100, seed=7)
+    with timer(tempos, "incremental"):
+        engine.ingest(novos)
+
+    report(f"Extração de métricas ({args.artigos:,} artigos)", [
+        ("implementação anterior", f"{tempos['legado'] * 1000:8.1f} ms  {legado}"),
+        ("motor compilado", f"{tempos['motor'] * 1000:8.1f} ms  {engine.values()}"),
+        ("incremental (+100)", f"{tempos['incremental'] * 1000:8.1f} ms"),
+        ("por artigo", f"{tempos['motor'] / args.artigos * 1e6:8.2f} µs"),
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Microbenchmark da série horária de chuva: atualização incremental x recálculo completo.
+
+Simula `--dias` de chuva horária chegando de hora em hora e compara o custo de
+manter os acumulados móveis e as excedências com `RainfallSeries.extend` (só as
+horas novas) e com o recálculo da série inteira em pandas a cada chegada.
+Mede também o escore de risco de todos os bairros a partir do resumo da série.
+
+Uso: python benchmarks/bench_rainfall.py [--dias 365] [--lote 1]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from _common import load_app, report, timer
+
+
+def synthetic_series(horas, seed=3):
+    """Chuva horária: maioria das horas secas, pancadas ocasionais"""
+    rng = np.random.default_rng(seed)
+    chuva = rng.gamma(0.6, 4.0, horas) * (rng.random(horas) < 0.25)
+    inicio = int(time.time()) // 3600 - horas
+    return np.arange(inicio, inicio + horas, dtype=np.int64), chuva
+
+
+def full_recompute(mm, janelas, limiares):
+    """Recalcula tudo sobre a série completa, como faria um rolling a cada atualização"""
+    serie = pd.Series(mm)
+    resultado = {}
+    for janela in janelas:
+        somas = serie.rolling(janela, min_periods=1).sum()
+        resultado[janela] = (float(somas.iloc[-1]), int((somas >= limiares[janela]).sum()))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--lote", type=int, default=1, help="horas novas por atualização")
+    args = parser.parse_args()
+
+    app = load_app()
+    horas, mm = synthetic_series(args.dias * 24)
+    atualizacoes = range(0, len(horas), args.lote)
+    tempos = {}
+
+    with timer(tempos, "incremental"):
+        serie = app.chuva.RainfallSeries()
+        for i in atualizacoes:
+            serie.extend(horas[i:i + args.lote], mm[i:i + args.lote])
+            {janela: serie.rolling(janela) for janela in app.chuva.CHUVA_JANELAS}
+
+    # O recálculo completo é quadrático: mede só as últimas atualizações e extrapola
+    amostra = list(atualizacoes)[-200:]
+    with timer(tempos, "recalculo"):
+        for i in amostra:
+            full_recompute(mm[:i + args.lote], app.chuva.CHUVA_JANELAS, app.chuva.CHUVA_LIMIARES)
+    por_recalculo = tempos["recalculo"] / len(amostra)
+
+    esperado = full_recompute(mm, app.chuva.CHUVA_JANELAS, app.chuva.CHUVA_LIMIARES)
+    divergencias = [
+        janela for janela, (total, excedencias) in esperado.items()
+        if not np.isclose(total, serie.rolling(janela)) or excedencias != serie.excedencias[janela]
+    ]
+
+    with timer(tempos, "resumo"):
+        resumo = serie.summary()
+
+    chuvas = {regiao: resumo for regiao in app.regioes.REGIOES}
+    bairros = len(app.servicos.risk_engine.score(chuvas)[app.regioes.REGIAO_PADRAO])  # carrega o cadastro
+    with timer(tempos, "risco"):
+        for _ in range(100):
+            app.servicos.risk_engine.score(chuvas)
+
+    report(f"Série de chuva ({args.dias} dias, {len(horas):,} horas, lotes de {args.lote} h)", [
+        ("incremental (total)", f"{tempos['incremental'] * 1000:10.1f} ms"),
+        ("incremental (por atualização)", f"{tempos['incremental'] / len(atualizacoes) * 1e6:10.1f} µs"),
+        ("recálculo completo (por atualização, fim da série)", f"{por_recalculo * 1e6:10.1f} µs"),
+        ("recálculo completo (total estimado)", f"{por_recalculo * len(atualizacoes) / 2:10.1f} s"),
+        ("resumo do snapshot", f"{tempos['resumo'] * 1000:10.2f} ms"),
+        (f"escore de risco ({bairros} bairros)", f"{tempos['risco'] * 10:10.2f} ms"),
+        ("resultados iguais ao recálculo", "sim" if not divergencias else f"não: janelas {divergencias}"),
+    ])
+
+
+if __name__ == "__main__":
+    main()
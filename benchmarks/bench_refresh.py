@@ -0,0 +1,251 @@
+"""Benchmark do pipeline de atualização contra fontes locais (sem rede).
+
+Sobe o `StubServer` com as fixtures gravadas, aponta o dashboard para ele e mede:
+  - latência da atualização fria (arquivo vazio, sem ETags) e morna (tudo em cache);
+  - tempo por etapa (busca, arquivamento, métricas, consulta do feed) e por fonte;
+  - pico de memória da atualização fria (tracemalloc);
+  - requisições e tempo da atualização com 1 região x todas as regiões do registro;
+  - pedidos manuais simultâneos agrupados pelo atualizador (cliques x buscas às fontes);
+  - reruns por segundo do feed + métricas com N notícias (por cartão x HTML do snapshot).
+
+Cenários: normal, fonte lenta, falhas intermitentes e fonte que não responde.
+
+Uso: python benchmarks/bench_refresh.py [--latencia 0.05] [--repeticoes 5] [--json saida.json]
+"""
+import argparse
+import dataclasses
+import functools
+import json
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from _common import load_app, report
+from stub_server import StubServer, point_app_at
+
+
+class StageTimer:
+    """Acumula o tempo gasto em funções/métodos substituídos por versões cronometradas"""
+
+    def __init__(self):
+        self.tempos = {}
+
+    def wrap(self, nome, func):
+        @functools.wraps(func)
+        def cronometrado(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.tempos[nome] = self.tempos.get(nome, 0.0) + time.perf_counter() - inicio
+        return cronometrado
+
+    def reset(self):
+        self.tempos = {}
+
+
+def fresh_state(app, timer):
+    """Estado limpo (sem ETags, arquivo vazio, breakers fechados) com etapas cronometradas"""
+    app.servicos.http_client = app.rede.HttpClient()
+    app.servicos.feed_entry_cache = app.fontes.FeedEntryCache()
+    app.servicos.news_store = app.arquivo.NewsStore(tempfile.mktemp(suffix=".sqlite3", prefix="bench-"))
+    app.servicos.source_health = app.saude.SourceHealth()
+    app.servicos.metrics_engine = app.metricas.RegionalMetrics()
+    app.servicos.rainfall_store = app.chuva.RainfallStore()
+    app.servicos.occurrence_store = app.ocorrencias.OccurrenceStore()
+    app.servicos.metrics_timeline = app.historico.MetricsTimeline(tempfile.mkdtemp(prefix="bench-historico-"))
+    app.servicos.news_store.add = timer.wrap("arquivar notícias", app.servicos.news_store.add)
+    app.servicos.news_store.latest = timer.wrap("consultar feed", app.servicos.news_store.latest)
+    app.servicos.metrics_engine.ingest_store = timer.wrap("extrair métricas", app.servicos.metrics_engine.ingest_store)
+
+
+def timed_tasks(app, timer):
+    return [task._replace(func=timer.wrap(f"fonte: {task.nome}", task.func)) for task in app.fontes.build_fetch_tasks()]
+
+
+def refresh(app, timer, deadline):
+    """Uma atualização completa, separando busca e consolidação"""
+    inicio = time.perf_counter()
+    results = timer.wrap("buscar fontes", app.fontes.run_fetch_tasks)(timed_tasks(app, timer), deadline=deadline)
+    timer.wrap("consolidar", app.atualizacao.merge_results)(results)
+    return time.perf_counter() - inicio
+
+
+def run_scenario(app, nome, stub, repeticoes, deadline):
+    timer = StageTimer()
+    point_app_at(app, stub)
+    fresh_state(app, timer)
+
+    tracemalloc.start()
+    fria = refresh(app, timer, deadline)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    etapas_fria = dict(timer.tempos)
+
+    mornas = []
+    timer.reset()
+    for _ in range(repeticoes):
+        mornas.append(refresh(app, timer, deadline))
+    etapas_morna = {k: v / repeticoes for k, v in timer.tempos.items()}
+
+    return {
+        "cenario": nome,
+        "fria_s": fria,
+        "morna_s": statistics.median(mornas),
+        "pico_memoria_mb": pico / 2 ** 20,
+        "etapas_fria_s": etapas_fria,
+        "etapas_morna_s": etapas_morna,
+        "fontes": app.servicos.source_health.statuses(task.nome for task in app.fontes.build_fetch_tasks()),
+        "servidor": dict(stub.stats),
+    }
+
+
+def region_scaling(app, latencia, deadline):
+    """Atualização fria com 1, 2, ... regiões: as fontes compartilhadas não devem multiplicar as requisições"""
+    registro = dict(app.regioes.REGIOES)
+    resultado = {}
+    try:
+        for n in sorted({1, 2, len(registro)}):
+            # Em lugar: os módulos do pacote importam o mesmo dicionário pelo nome
+            app.regioes.REGIOES.clear()
+            app.regioes.REGIOES.update(list(registro.items())[:n])
+            stub = StubServer(latencia=latencia).start()
+            try:
+                timer = StageTimer()
+                point_app_at(app, stub)
+                fresh_state(app, timer)
+                tempo = refresh(app, timer, deadline)
+                resultado[n] = {"tempo_s": tempo, "requisicoes": stub.stats["requisicoes"],
+                                "parse_s": sum(v for k, v in timer.tempos.items() if k.startswith("fonte: "))}
+            finally:
+                stub.stop()
+    finally:
+        app.regioes.REGIOES.update(registro)
+    return resultado
+
+
+def coalescing(app, stub, cliques=200, duracao=3.0, janela=1.0):
+    """`cliques` pedidos de várias threads em `duracao` segundos: quantas atualizações saem"""
+    point_app_at(app, stub)
+    fresh_state(app, StageTimer())
+    antes = stub.stats["requisicoes"]
+    refresher = app.atualizacao.BackgroundRefresher(interval=3600, min_interval=janela).start()
+    while refresher.version == 0:
+        time.sleep(0.01)
+
+    def clicar(n):
+        for _ in range(n):
+            refresher.request_refresh()
+            time.sleep(duracao / n)
+
+    threads = [threading.Thread(target=clicar, args=(cliques // 10,)) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    time.sleep(janela + 0.5)  # deixa a última atualização agrupada terminar
+    return {"cliques": cliques, "atualizacoes": refresher.version - 1,
+            "requisicoes": stub.stats["requisicoes"] - antes, "janela_s": janela, "duracao_s": duracao}
+
+
+def render_throughput(app, tamanhos, repeticoes=200):
+    """Reruns por segundo do feed + métricas com N notícias (modo bare do Streamlit).
+
+    "por cartão" reproduz o rerun anterior (template + um st.markdown por cartão/métrica);
+    "snapshot" é o que cada rerun paga agora, com o HTML já pronto no snapshot.
+    """
+    import streamlit as st
+    import enchentes as pagina
+    base = app.servicos.news_store.latest(15) or [dict(app.servicos.data_manager.noticias_base[0])]
+    regiao = app.atualizacao.Snapshot.from_data(1, app.atualizacao.merge_results({})).regiao(app.regioes.REGIAO_PADRAO)
+    resultado = {}
+    for n in tamanhos:
+        noticias = [dict(base[i % len(base)], titulo=f"{base[i % len(base)]['titulo']} {i}") for i in range(n)]
+        snapshot = dataclasses.replace(regiao, noticias=app.atualizacao._freeze(noticias))
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            st.subheader(f"📰 Central de Notícias ({len(noticias)} atualizações)")
+            for noticia in noticias[:10]:
+                st.markdown(app.renderizacao.render_news_card(noticia), unsafe_allow_html=True)
+            for _ in range(5):
+                st.markdown(app.renderizacao.render_metrics_html(snapshot), unsafe_allow_html=True)
+        por_cartao = repeticoes / (time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            pagina.display_news_feed(snapshot)
+            pagina.display_realtime_metrics(snapshot)
+        resultado[n] = {"por_cartao": por_cartao, "snapshot": repeticoes / (time.perf_counter() - inicio)}
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latencia", type=float, default=0.05, help="latência base das fontes (s)")
+    parser.add_argument("--repeticoes", type=int, default=5, help="atualizações mornas por cenário")
+    parser.add_argument("--prazo", type=float, default=3.0, help="prazo total da atualização (s)")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    app = load_app()
+    cenarios = [
+        ("normal", dict(latencia=args.latencia)),
+        ("fonte lenta (1,5 s)", dict(latencia=args.latencia, latencia_rota={"/defesacivil-mg/": 1.5})),
+        ("falhas 50%", dict(latencia=args.latencia, falhas=0.5, seed=1)),
+        ("fonte sem resposta", dict(latencia=args.latencia, timeout_rota={"/pjf/defesa_civil/noticias.php"})),
+    ]
+
+    resultados = []
+    for nome, config in cenarios:
+        stub = StubServer(**config).start()
+        try:
+            resultados.append(run_scenario(app, nome, stub, args.repeticoes, args.prazo))
+        finally:
+            stub.stop()
+
+    for r in resultados:
+        linhas = [
+            ("atualização fria", f"{r['fria_s'] * 1000:8.1f} ms"),
+            ("atualização morna (mediana)", f"{r['morna_s'] * 1000:8.1f} ms"),
+            ("pico de memória (fria)", f"{r['pico_memoria_mb']:8.2f} MB"),
+            ("servidor", ", ".join(f"{k}={v}" for k, v in r["servidor"].items())),
+        ]
+        for etapa in sorted(r["etapas_fria_s"]):
+            morna = r["etapas_morna_s"].get(etapa, 0.0)
+            linhas.append((f"  {etapa}", f"fria {r['etapas_fria_s'][etapa] * 1000:8.1f} ms | morna {morna * 1000:8.1f} ms"))
+        linhas += [(f"  estado: {f['nome']}", f"{f['estado']} ({f['falhas']} falhas)") for f in r["fontes"]]
+        report(f"Cenário: {r['cenario']}", linhas)
+
+    escala = region_scaling(app, args.latencia, args.prazo)
+    report("Regiões (atualização fria)", [
+        (f"{n} região(ões)", f"{v['requisicoes']:3d} requisições | {v['tempo_s'] * 1000:8.1f} ms | "
+                             f"fontes {v['parse_s'] * 1000:8.1f} ms")
+        for n, v in escala.items()
+    ])
+
+    stub = StubServer(latencia=args.latencia).start()
+    try:
+        agrupamento = coalescing(app, stub)
+    finally:
+        stub.stop()
+    report("Pedidos manuais agrupados", [
+        ("cliques", f"{agrupamento['cliques']} em {agrupamento['duracao_s']:.0f} s (janela mínima de {agrupamento['janela_s']:.0f} s)"),
+        ("atualizações disparadas", f"{agrupamento['atualizacoes']}"),
+        ("requisições às fontes", f"{agrupamento['requisicoes']} (inclui a atualização inicial)"),
+    ])
+
+    vazao = render_throughput(app, (10, 100, 1000))
+    report("Renderização do feed", [
+        (f"{n} notícias", f"por cartão {v['por_cartao']:8.0f} reruns/s | HTML do snapshot {v['snapshot']:8.0f} reruns/s")
+        for n, v in vazao.items()
+    ])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cenarios": resultados, "regioes": escala, "agrupamento": agrupamento, "renderizacao": vazao}, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
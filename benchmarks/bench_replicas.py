@@ -0,0 +1,129 @@
+"""Benchmark de várias réplicas do dashboard com e sem o snapshot compartilhado.
+
+Sobe o `StubServer` e N processos réplica, cada um com seu `BackgroundRefresher`
+(intervalo curto para caber no benchmark), e compara nos modos sem cache, "arquivo"
+(flock no mesmo host) e "redis" (`RespServer` local):
+  - requisições às fontes e atualizações feitas por todas as réplicas juntas;
+  - snapshots adotados de outra réplica e o atraso entre publicação e adoção.
+
+Uso: python benchmarks/bench_replicas.py [--replicas 4] [--duracao 8] [--intervalo 2]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import report
+from resp_server import RespServer
+from stub_server import StubServer
+
+
+class _Remote:
+    """Só o que `point_app_at` usa do StubServer, para a réplica em outro processo"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def url(self, rota):
+        return self.base_url + rota
+
+
+def replica(args):
+    """Processo réplica: roda o atualizador por `duracao` segundos e imprime o que fez, em JSON"""
+    from _common import load_app
+    from bench_refresh import StageTimer, fresh_state
+    from stub_server import point_app_at
+
+    app = load_app()
+    point_app_at(app, _Remote(args.stub))
+    fresh_state(app, StageTimer())
+    refresher = app.atualizacao.BackgroundRefresher(interval=args.intervalo, min_interval=args.intervalo / 2,
+                                        backend=app.compartilhamento.snapshot_backend_from_env(), sync_interval=args.sincronia)
+
+    atualizacoes, atrasos = [], []
+    refresh_now, adopt = refresher.refresh_now, refresher._adopt
+
+    def contar_atualizacao(*a, **kw):
+        atualizacoes.append(time.time())
+        return refresh_now(*a, **kw)
+
+    def medir_adocao():
+        antes = refresher._shared_version
+        publicado_em = adopt()
+        if refresher._shared_version != antes and publicado_em is not None:
+            atrasos.append(time.time() - publicado_em)
+        return publicado_em
+
+    refresher.refresh_now, refresher._adopt = contar_atualizacao, medir_adocao
+    refresher.start()
+    time.sleep(args.duracao)
+    print(json.dumps({"atualizacoes": len(atualizacoes), "atrasos": atrasos, "versao": refresher.version}))
+
+
+def run_mode(nome, cache, args, stub):
+    env = dict(os.environ, ENCHENTES_SNAPSHOT_CACHE=cache)
+    comando = [sys.executable, os.path.abspath(__file__), "--replica", "--stub", stub.base_url,
+               "--duracao", str(args.duracao), "--intervalo", str(args.intervalo), "--sincronia", str(args.sincronia)]
+    antes = stub.stats["requisicoes"]
+    processos = [subprocess.Popen(comando, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+                 for _ in range(args.replicas)]
+    saidas = [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in processos]
+    atrasos = [a for s in saidas for a in s["atrasos"]]
+    return {
+        "modo": nome,
+        "requisicoes": stub.stats["requisicoes"] - antes,
+        "atualizacoes": sum(s["atualizacoes"] for s in saidas),
+        "adocoes": len(atrasos),
+        "atraso_mediano_s": statistics.median(atrasos) if atrasos else None,
+        "atraso_max_s": max(atrasos) if atrasos else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--duracao", type=float, default=8.0, help="segundos de execução de cada réplica")
+    parser.add_argument("--intervalo", type=float, default=2.0, help="intervalo de atualização (s)")
+    parser.add_argument("--sincronia", type=float, default=0.5, help="intervalo de verificação do cache (s)")
+    parser.add_argument("--latencia", type=float, default=0.05, help="latência base das fontes (s)")
+    parser.add_argument("--json", help="grava os resultados neste arquivo")
+    parser.add_argument("--replica", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--stub", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.replica:
+        return replica(args)
+
+    stub = StubServer(latencia=args.latencia).start()
+    resp = RespServer().start()
+    try:
+        resultados = [
+            run_mode("sem cache compartilhado", "", args, stub),
+            run_mode("arquivo (mesmo host)", f"arquivo:{tempfile.mkdtemp(prefix='bench-compartilhado-')}", args, stub),
+            run_mode("redis (RESP local)", resp.url, args, stub),
+        ]
+    finally:
+        resp.stop()
+        stub.stop()
+
+    for r in resultados:
+        atraso = (f"mediana {r['atraso_mediano_s'] * 1000:6.0f} ms | máx {r['atraso_max_s'] * 1000:6.0f} ms"
+                  if r["adocoes"] else "-")
+        report(f"{args.replicas} réplicas por {args.duracao:.0f} s: {r['modo']}", [
+            ("requisições às fontes", f"{r['requisicoes']:5d}"),
+            ("atualizações (todas as réplicas)", f"{r['atualizacoes']:5d}"),
+            ("snapshots adotados", f"{r['adocoes']:5d}"),
+            ("atraso publicação -> adoção", atraso),
+        ])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
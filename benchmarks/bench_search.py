@@ -0,0 +1,109 @@
+"""Microbenchmark da busca no arquivo de notícias (índice invertido FTS5).
+
+Arquiva `--artigos` notícias sintéticas em lotes (como chegam nas atualizações;
+o arquivamento inclui o agrupamento de quase-duplicatas e leva alguns minutos
+com 100 mil notícias) e mede a latência de consultas por palavra, prefixo, frase e com filtros de
+fonte, bairro, região e data, comparando com a varredura linear do texto
+normalizado que a busca substituiria.
+
+Uso: python benchmarks/bench_search.py [--artigos 100000] [--lote 1000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from _common import load_app, report, timer
+
+FONTES = ["G1 Zona da Mata", "Estado de Minas", "Tribuna de Minas", "Defesa Civil MG", "O Tempo", "Acessa.com"]
+BAIRROS = ["Três Moinhos", "Santa Cruz", "Benfica", "São Pedro", "Centro", "Granjas Betânia", "Vila Ideal", "Linhares"]
+EVENTOS = ["deslizamento", "alagamento", "queda de barreira", "enxurrada", "transbordamento", "desabamento"]
+PALAVRAS = """chuva temporal moradores famílias equipes resgate bombeiros prefeitura abrigo escola rua avenida
+    córrego rio encosta casa imóvel interdição vistoria alerta previsão acumulado milímetros noite madrugada
+    trânsito ônibus energia água doações voluntários vítimas feridos hospital sirene evacuação risco""".split()
+CONSULTAS = [
+    ("palavra", "bombeiros", {}),
+    ("palavra sem acento", "familias", {}),
+    ("prefixo", "desliz*", {}),
+    ("frase", '"queda de barreira"', {}),
+    ("várias palavras", "encosta evacuação", {}),
+    ("relevância", "alagamento córrego", {"ordem": "relevancia"}),
+    ("bairro", "", {"bairro": "Três Moinhos"}),
+    ("palavra + fonte + região", "resgate", {"fontes": ["G1 Zona da Mata"], "regiao": "uba"}),
+    ("frase + bairro + 7 dias", '"queda de barreira"', {"bairro": "Santa Cruz", "desde": time.time() - 7 * 86400}),
+    ("sem resultados", "tsunami", {}),
+]
+
+
+def synthetic_news(total, seed=11):
+    """Notícias variadas: termos do domínio misturados a um vocabulário grande de
+    palavras sintéticas, para que o agrupamento de quase-duplicatas não junte tudo"""
+    rng = random.Random(seed)
+    silabas = ["ba", "ca", "de", "fi", "go", "la", "ma", "ne", "po", "ri", "sa", "tu", "vi", "ze", "ão", "ço"]
+    vocabulario = PALAVRAS + ["".join(rng.choices(silabas, k=rng.randint(2, 4))) for _ in range(20_000)]
+    agora = time.time()
+    for i in range(total):
+        palavras = rng.sample(PALAVRAS, 2) + rng.sample(vocabulario, 10)
+        yield {
+            "fonte": rng.choice(FONTES),
+            "titulo": f"{rng.choice(EVENTOS).capitalize()} em {rng.choice(BAIRROS)}: {' '.join(palavras[:5])} {i}",
+            "resumo": f"{' '.join(palavras[5:])} após {rng.randint(10, 200)} mm de chuva ({rng.choice(BAIRROS)})",
+            "url": f"https://exemplo/{i}",
+            "publicado_em": agora - rng.random() * 90 * 86400,
+            "regioes": [rng.choice(["juiz-de-fora", "uba", "muriae", "cataguases"])],
+        }
+
+
+def linear_scan(app, noticias, consulta):
+    """O que a busca custaria sem índice: normalizar e varrer todo o arquivo"""
+    termos = app.textos.fold_text(consulta.replace("*", "").replace('"', "")).split()
+    return sum(all(t in app.textos.fold_text(f"{n['titulo']} {n['resumo']}") for t in termos) for n in noticias)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artigos", type=int, default=100_000)
+    parser.add_argument("--lote", type=int, default=1000, help="notícias por atualização")
+    args = parser.parse_args()
+
+    app = load_app()
+    store = app.arquivo.NewsStore(os.path.join(tempfile.mkdtemp(prefix="bench-busca-"), "noticias.sqlite3"))
+    noticias = list(synthetic_news(args.artigos))
+    tempos = {}
+
+    with timer(tempos, "arquivar"):
+        for i in range(0, len(noticias), args.lote):
+            store.add(noticias[i:i + args.lote])
+    # Custo do índice por lote: a mesma inserção em um arquivo já cheio
+    extras = list(synthetic_news(args.lote, seed=99))
+    with timer(tempos, "lote"):
+        store.add(extras)
+
+    # Custo só do índice invertido: reconstruí-lo sobre o arquivo inteiro
+    with timer(tempos, "reindexar"):
+        with store._connect() as conn:
+            conn.execute("INSERT INTO noticias_busca (noticias_busca) VALUES ('rebuild')")
+
+    linhas = []
+    for nome, consulta, filtros in CONSULTAS:
+        store.search(consulta, **filtros)
+        with timer(tempos, nome):
+            for _ in range(20):
+                pagina, mais = store.search(consulta, **filtros)
+        linhas.append((nome, f"{tempos[nome] / 20 * 1000:7.2f} ms  ({len(pagina)} na página{', há mais' if mais else ''})"))
+
+    with timer(tempos, "varredura"):
+        linear_scan(app, noticias, "encosta evacuação")
+
+    report(f"Busca no arquivo ({args.artigos:,} notícias)", [
+        ("arquivar (total, com índice)", f"{tempos['arquivar']:7.2f} s"),
+        (f"lote de {args.lote} no arquivo cheio", f"{tempos['lote'] * 1000:7.1f} ms"),
+        ("reconstruir o índice de busca", f"{tempos['reindexar'] * 1000:7.1f} ms"),
+        *linhas,
+        ("varredura linear (várias palavras)", f"{tempos['varredura'] * 1000:7.1f} ms"),
+    ])
+
+
+if __name__ == "__main__":
+    main()
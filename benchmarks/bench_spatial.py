@@ -0,0 +1,74 @@
+"""Microbenchmark da camada espacial de ocorrências.
+
+Gera ocorrências sintéticas em torno dos bairros cadastrados, em vários tamanhos
+de camada (`--pontos`), e mede o que cada rerun do mapa paga: montar a camada,
+recortar o enquadramento, achar os vizinhos mais próximos e agrupar por zoom.
+Os vizinhos são conferidos contra a ordenação completa das distâncias.
+
+Uso: python benchmarks/bench_spatial.py [--pontos 1000 10000 100000] [--consultas 500]
+"""
+import argparse
+
+import numpy as np
+
+from _common import load_app, report, timer
+
+
+def synthetic_points(app, total, seed=11):
+    """Pontos espalhados (~300 m) em volta dos centroides dos bairros"""
+    rng = np.random.default_rng(seed)
+    bairros = app.risco.load_bairros()
+    escolha = rng.integers(0, len(bairros), total)
+    lat = bairros["latitude"].to_numpy()[escolha] + rng.normal(0, 0.003, total)
+    lon = bairros["longitude"].to_numpy()[escolha] + rng.normal(0, 0.003, total)
+    return lat, lon
+
+
+def measure(app, total, consultas, zoom):
+    lat, lon = synthetic_points(app, total)
+    registros = [{"latitude": a, "longitude": o, "bairro": str(i)} for i, (a, o) in enumerate(zip(lat.tolist(), lon.tolist()))]
+    rng = np.random.default_rng(5)
+    centros = np.stack([rng.uniform(lat.min(), lat.max(), consultas),
+                        rng.uniform(lon.min(), lon.max(), consultas)], axis=1)
+    tempos = {}
+
+    with timer(tempos, "construcao"):
+        camada = app.ocorrencias.OccurrenceLayer(registros)
+    caixas = [app.ocorrencias.viewport(c_lat, c_lon, zoom) for c_lat, c_lon in centros]
+    with timer(tempos, "retangulo"):
+        visiveis = [camada.visible(*caixa) for caixa in caixas]
+    with timer(tempos, "vizinhos"):
+        vizinhos = [camada.nearest(c_lat, c_lon, 5) for c_lat, c_lon in centros]
+    with timer(tempos, "agrupamento"):
+        grupos = [app.ocorrencias.cluster_points(v_lat, v_lon, zoom) for v_lat, v_lon in visiveis]
+
+    escala = np.cos(np.radians(centros[:, 0]))
+    esperados = [np.argsort(np.hypot(lat - c_lat, (lon - c_lon) * e))[:5] for (c_lat, c_lon), e in zip(centros, escala)]
+    iguais = all({int(v["bairro"]) for v in achados} == set(e.tolist()) for achados, e in zip(vizinhos, esperados))
+    por = lambda chave: tempos[chave] / consultas * 1e3
+    return [
+        ("montar a camada", f"{tempos['construcao'] * 1000:8.1f} ms"),
+        ("retângulo (máscara)", f"{por('retangulo'):8.3f} ms/consulta"),
+        ("vizinhos (k=5)", f"{por('vizinhos'):8.3f} ms/consulta"),
+        ("agrupamento por zoom", f"{por('agrupamento'):8.3f} ms/consulta"),
+        ("linhas enviadas ao mapa", f"{np.mean([len(g) for g in grupos]):8.0f} grupos "
+                                    f"(de {np.mean([len(v[0]) for v in visiveis]):.0f} visíveis)"),
+        ("vizinhos iguais à ordenação completa", "sim" if iguais else "não"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pontos", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--consultas", type=int, default=500)
+    parser.add_argument("--zoom", type=int, default=15)
+    args = parser.parse_args()
+
+    app = load_app()
+    for total in args.pontos:
+        report(f"Camada espacial ({total:,} pontos, {args.consultas} consultas, zoom {args.zoom})",
+               measure(app, total, args.consultas, args.zoom))
+
+
+if __name__ == "__main__":
+    main()
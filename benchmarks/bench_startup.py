@@ -0,0 +1,131 @@
+"""Benchmark da partida a frio de uma réplica: imports e primeiro render da página.
+
+Cada medição roda em um interpretador novo (como um contêiner recém-criado),
+sobre uma cópia de um DATA_DIR com `--artigos` notícias já arquivadas (como o de
+uma réplica em produção):
+  - importar o Streamlit (custo fixo do servidor, para referência);
+  - executar o módulo da página em modo "bare", com o Streamlit já carregado,
+    e quais módulos pesados ela puxa nesse momento;
+  - primeiro render completo de `main()` (AppTest), até o primeiro snapshot base;
+  - os imports mais caros feitos pela página (python -X importtime).
+
+Uso: python benchmarks/bench_startup.py [--repeticoes 5] [--artigos 20000]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from _common import PAGES_DIR, load_app, report, timer
+from bench_search import synthetic_news
+
+PAGINA = os.path.join(PAGES_DIR, "enchentes.py")
+PESADOS = ("requests", "feedparser", "PIL.Image", "pyarrow", "pandas", "numpy")
+
+IMPORTAR_STREAMLIT = """
+import time
+inicio = time.perf_counter()
+import streamlit
+print(time.perf_counter() - inicio)
+"""
+
+EXECUTAR_PAGINA = """
+import sys, time
+import streamlit
+antes = set(sys.modules)
+sys.path.insert(0, {pages!r})
+inicio = time.perf_counter()
+import enchentes
+print(time.perf_counter() - inicio)
+print(",".join(m for m in {pesados!r} if m in sys.modules and m not in antes))
+"""
+
+PRIMEIRO_RENDER = """
+import time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({pagina!r}, default_timeout=60)
+inicio = time.perf_counter()
+app.run()
+print(time.perf_counter() - inicio)
+print(len(app.exception))
+"""
+
+
+def seed_archive(artigos, lote=1000):
+    """DATA_DIR modelo com `artigos` notícias sintéticas, arquivadas em lotes como nas atualizações"""
+    app = load_app(tempfile.mkdtemp(prefix="enchentes-startup-modelo-"))
+    os.makedirs(app.arquivo.DATA_DIR, exist_ok=True)
+    noticias = list(synthetic_news(artigos))
+    for i in range(0, len(noticias), lote):
+        app.servicos.news_store.add(noticias[i:i + lote])
+    return app.arquivo.DATA_DIR
+
+
+def run_python(codigo, modelo, *opcoes):
+    """Roda `codigo` em um interpretador novo, sobre uma cópia do DATA_DIR `modelo`; devolve (stdout, stderr)"""
+    data_dir = os.path.join(tempfile.mkdtemp(prefix="enchentes-startup-"), "data")
+    shutil.copytree(modelo, data_dir)
+    env = dict(os.environ, ENCHENTES_DATA_DIR=data_dir, STREAMLIT_LOGGER_LEVEL="error")
+    try:
+        proc = subprocess.run([sys.executable, *opcoes, "-c", codigo], capture_output=True, text=True, env=env, check=True)
+    finally:
+        shutil.rmtree(os.path.dirname(data_dir), ignore_errors=True)
+    return proc.stdout.split("\n"), proc.stderr
+
+
+def page_imports(modelo, top=8):
+    """Imports feitos pela página além dos que o Streamlit já carregou, pelo tempo acumulado"""
+    _, saida = run_python(EXECUTAR_PAGINA.format(pages=PAGES_DIR, pesados=PESADOS), modelo, "-X", "importtime")
+    entradas, depois_do_streamlit = [], False
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        _, acumulado, nome = linha[len("import time:"):].split("|")
+        if not acumulado.strip().isdigit():
+            continue  # cabeçalho
+        if nome.strip() == "streamlit":
+            depois_do_streamlit = True
+        elif depois_do_streamlit and len(nome) - len(nome.lstrip()) <= 3:
+            # Nível 0 (a própria página) e 1 (o que ela importa diretamente)
+            entradas.append((int(acumulado) / 1000, nome.strip()))
+    return sorted(entradas, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--artigos", type=int, default=20_000, help="notícias no arquivo de cada réplica")
+    args = parser.parse_args()
+
+    tempos = {}
+    with timer(tempos, "arquivo"):
+        modelo = seed_archive(args.artigos)
+
+    streamlit_s, pagina_s, render_s = [], [], []
+    carregados = excecoes = None
+    for _ in range(args.repeticoes):
+        saida, _ = run_python(IMPORTAR_STREAMLIT, modelo)
+        streamlit_s.append(float(saida[0]))
+        saida, _ = run_python(EXECUTAR_PAGINA.format(pages=PAGES_DIR, pesados=PESADOS), modelo)
+        pagina_s.append(float(saida[0]))
+        carregados = saida[1] or "nenhum"
+        saida, _ = run_python(PRIMEIRO_RENDER.format(pagina=PAGINA), modelo)
+        render_s.append(float(saida[0]))
+        excecoes = int(saida[1])
+
+    report(f"Partida a frio (mediana de {args.repeticoes} interpretadores novos, {args.artigos} notícias arquivadas)", [
+        ("importar o Streamlit", f"{statistics.median(streamlit_s) * 1000:8.1f} ms"),
+        ("executar a página (bare)", f"{statistics.median(pagina_s) * 1000:8.1f} ms"),
+        ("  módulos pesados puxados pela página", carregados),
+        ("primeiro render de main()", f"{statistics.median(render_s) * 1000:8.1f} ms ({excecoes} exceções)"),
+    ])
+    report("Imports mais caros da página (acumulado)", [(nome, f"{ms:8.1f} ms") for ms, nome in page_imports(modelo)])
+    print(f"\n(arquivo modelo montado em {tempos['arquivo']:.1f} s)")
+    shutil.rmtree(modelo, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Microbenchmark do histórico de métricas: anexação e leitura dos gráficos de evolução.
+
+Grava `--dias` de leituras a cada `--intervalo` segundos (uma região), lendo o
+período pelas agregações pré-calculadas e comparando com a reamostragem em
+pandas do histórico bruto a cada leitura.
+
+Uso: python benchmarks/bench_timeline.py [--dias 28] [--intervalo 60]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from _common import load_app, report, timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dias", type=int, default=28)
+    parser.add_argument("--intervalo", type=int, default=60, help="segundos entre leituras")
+    args = parser.parse_args()
+
+    app = load_app()
+    diretorio = tempfile.mkdtemp(prefix="bench-historico-")
+    timeline = app.historico.MetricsTimeline(diretorio)
+    inicio = int(time.time()) - args.dias * 86400
+    instantes = np.arange(inicio, int(time.time()), args.intervalo)
+    rng = np.random.default_rng(1)
+    mortes = np.cumsum(rng.random(len(instantes)) < 0.001)
+    chuva = np.abs(np.cumsum(rng.normal(0, 0.5, len(instantes))))
+    tempos = {}
+
+    with timer(tempos, "anexar"):
+        for ts, m, c in zip(instantes.tolist(), mortes.tolist(), chuva.tolist()):
+            timeline.append("bench", ts, {"mortes": m, "desaparecidos": 20 - m // 2, "chuva_24h": c, "chuva_72h": 2 * c})
+    bytes_bruto = os.path.getsize(os.path.join(diretorio, "bench", "bruto.bin"))
+
+    linhas = []
+    for periodo, segundos in (("24 horas", 86400), ("7 dias", 7 * 86400), (f"{args.dias} dias", args.dias * 86400)):
+        nivel = timeline.resolution_for(segundos)
+        desde = time.time() - segundos
+        with timer(tempos, periodo):
+            for _ in range(20):
+                df = timeline.read("bench", nivel, desde=desde)
+        with timer(tempos, f"{periodo} (pandas)"):
+            for _ in range(20):
+                bruto = timeline.read("bench", "bruto", desde=desde)
+                bruto[["mortes", "chuva_24h"]].resample(f"{app.historico.TIMELINE_RESOLUCOES[nivel]}s").last()
+        linhas.append((f"{periodo}: agregação {nivel}",
+                       f"{tempos[periodo] / 20 * 1000:8.2f} ms ({len(df)} pontos) | "
+                       f"reamostrar o bruto {tempos[f'{periodo} (pandas)'] / 20 * 1000:8.2f} ms"))
+
+    report(f"Histórico ({len(instantes):,} leituras, {args.dias} dias a cada {args.intervalo} s)", [
+        ("anexar (por leitura)", f"{tempos['anexar'] / len(instantes) * 1e6:8.1f} µs"),
+        ("arquivo bruto", f"{bytes_bruto / 2 ** 20:8.2f} MB ({app.historico.TIMELINE_DTYPE.itemsize} bytes por registro)"),
+        *linhas,
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Servidor local com o subconjunto do protocolo Redis (RESP) usado pelo cache de snapshots.
+
+Substitui um Redis de verdade nos benchmarks e em testes manuais de várias réplicas:
+
+    python benchmarks/resp_server.py --porta 6390
+    ENCHENTES_SNAPSHOT_CACHE=redis://127.0.0.1:6390/0 streamlit run app/pages/enchentes.py
+
+Comandos: PING, AUTH, SELECT, GET, SET (NX/XX, EX/PX), MGET, MSET, DEL, FLUSHALL e
+EVAL apenas dos scripts que o dashboard usa (`SCRIPTS`: não há interpretador Lua).
+Também pode ser usado como biblioteca (`RespServer`), como faz `bench_replicas.py`.
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+
+def _release_lock(servidor, chaves, args):
+    """RESP_LIBERAR_TRAVA: compara o token e apaga a trava numa única operação"""
+    if servidor._get(chaves[0]) == args[0]:
+        del servidor.dados[chaves[0]]
+        return 1
+    return 0
+
+
+# Texto idêntico ao de RESP_LIBERAR_TRAVA em enchentes.py (o EVAL é reconhecido pelo script)
+SCRIPTS = {
+    'if redis.call("GET", KEYS[1]) == ARGV[1] then return redis.call("DEL", KEYS[1]) else return 0 end': _release_lock,
+}
+
+
+class RespServer:
+    """Chaves em memória com expiração; conta comandos recebidos por nome"""
+
+    def __init__(self, porta=0):
+        self.dados = {}       # chave -> (valor, expira_em ou None)
+        self.stats = {}
+        self._lock = threading.Lock()
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", porta), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server.server_address[1]}/0"
+
+    def _get(self, chave):
+        valor, expira_em = self.dados.get(chave, (None, None))
+        if expira_em is not None and expira_em <= time.monotonic():
+            del self.dados[chave]
+            return None
+        return valor
+
+    def execute(self, comando, args):
+        nome = comando.upper()
+        with self._lock:
+            self.stats[nome] = self.stats.get(nome, 0) + 1
+            if nome == "PING":
+                return "+PONG"
+            if nome in ("AUTH", "SELECT"):
+                return "+OK"
+            if nome == "GET":
+                return self._get(args[0])
+            if nome == "MGET":
+                return [self._get(chave) for chave in args]
+            if nome == "MSET":
+                for chave, valor in zip(args[::2], args[1::2]):
+                    self.dados[chave] = (valor, None)
+                return "+OK"
+            if nome == "DEL":
+                removidas = sum(self._get(chave) is not None for chave in args)
+                for chave in args:
+                    self.dados.pop(chave, None)
+                return removidas
+            if nome == "EVAL":
+                script = SCRIPTS.get(args[0].decode())
+                if script is None:
+                    return "-ERR script nao suportado pelo servidor local"
+                n = int(args[1])
+                return script(self, args[2:2 + n], args[2 + n:])
+            if nome == "FLUSHALL":
+                self.dados.clear()
+                return "+OK"
+            if nome == "SET":
+                chave, valor, opcoes = args[0], args[1], [a.upper() for a in args[2:]]
+                existe = self._get(chave) is not None
+                if (b"NX" in opcoes and existe) or (b"XX" in opcoes and not existe):
+                    return None
+                expira_em = None
+                for unidade, escala in ((b"PX", 1000), (b"EX", 1)):
+                    if unidade in opcoes:
+                        expira_em = time.monotonic() + int(args[2 + opcoes.index(unidade) + 1]) / escala
+                self.dados[chave] = (valor, expira_em)
+                return "+OK"
+        return f"-ERR comando nao suportado '{comando}'"
+
+    def _handler(self):
+        servidor = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    linha = self.rfile.readline()
+                    if not linha:
+                        return
+                    partes = []
+                    for _ in range(int(linha[1:])):
+                        tamanho = int(self.rfile.readline()[1:])
+                        partes.append(self.rfile.read(tamanho + 2)[:-2])
+                    resposta = servidor.execute(partes[0].decode(), partes[1:])
+                    self.wfile.write(encode(resposta))
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="resp-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def encode(valor):
+    if valor is None:
+        return b"$-1\r\n"
+    if isinstance(valor, str):
+        return (valor + "\r\n").encode()  # "+OK", "-ERR ..."
+    if isinstance(valor, int):
+        return b":%d\r\n" % valor
+    if isinstance(valor, list):
+        return b"*%d\r\n" % len(valor) + b"".join(encode(v) for v in valor)
+    return b"$%d\r\n%s\r\n" % (len(valor), valor)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--porta", type=int, default=6390)
+    args = parser.parse_args()
+
+    servidor = RespServer(args.porta).start()
+    print(f"Servidor RESP em {servidor.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.stop()
+
+
+if __name__ == "__main__":
+    main()
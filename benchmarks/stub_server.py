@@ -0,0 +1,182 @@
+"""Servidor HTTP local que imita as fontes do dashboard a partir de fixtures gravadas.
+
+Cada rota serve um arquivo de `fixtures/` com ETag, Last-Modified e gzip, e aceita
+injeção de latência e de falhas para simular fontes lentas ou fora do ar:
+
+    python benchmarks/stub_server.py --porta 8765 --latencia 0.2 --falhas 0.1
+
+Também pode ser usado como biblioteca (`StubServer`), como faz `bench_refresh.py`.
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# rota -> (arquivo, content-type)
+ROUTES = {
+    "/defesacivil-mg/": ("defesacivil_mg.html", "text/html; charset=utf-8"),
+    "/pjf/defesa_civil/noticias.php": ("pjf_defesa_civil.html", "text/html; charset=utf-8"),
+    "/rss/g1/zona-da-mata/": ("g1_zona_da_mata.xml", "application/rss+xml; charset=utf-8"),
+    "/rss/em/gerais.xml": ("em_gerais.xml", "application/rss+xml; charset=utf-8"),
+    "/newsapi/v2/everything": ("newsapi.json", "application/json"),
+    "/open-meteo/v1/forecast": ("open_meteo.json", "application/json"),
+}
+
+
+class Fixture:
+    def __init__(self, path, content_type):
+        with open(path, "rb") as f:
+            self.update(f.read())
+        self.content_type = content_type
+        self.last_modified = formatdate(os.path.getmtime(path), usegmt=True)
+
+    def update(self, body):
+        """Troca o conteúdo servido (ex.: feed com uma entrada nova)"""
+        self.body = body
+        self.gzipped = gzip.compress(body)
+        self.etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+
+
+class StubServer:
+    """Servidor de fixtures com latência (segundos) e taxa de falhas (0-1) configuráveis.
+
+    `latencia_rota` e `falhas_rota` sobrescrevem os valores globais para rotas específicas.
+    Falhas respondem 503 com Retry-After; `timeout_rota` faz a rota não responder a tempo.
+    Com `validadores=False` as respostas vêm sem ETag/Last-Modified (sempre 200).
+    """
+
+    def __init__(self, porta=0, latencia=0.0, falhas=0.0, latencia_rota=None, falhas_rota=None,
+                 timeout_rota=(), seed=0, validadores=True):
+        self.fixtures = {rota: Fixture(os.path.join(FIXTURES_DIR, arquivo), tipo)
+                         for rota, (arquivo, tipo) in ROUTES.items()}
+        self.latencia = latencia
+        self.falhas = falhas
+        self.latencia_rota = dict(latencia_rota or {})
+        self.falhas_rota = dict(falhas_rota or {})
+        self.timeout_rota = set(timeout_rota)
+        self.validadores = validadores
+        self.random = random.Random(seed)
+        self.stats = {"requisicoes": 0, "respostas_304": 0, "falhas": 0, "bytes": 0}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", porta), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def url(self, rota):
+        return self.base_url + rota
+
+    def _count(self, **kwargs):
+        with self._lock:
+            for chave, valor in kwargs.items():
+                self.stats[chave] += valor
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Cabeçalhos e corpo saem em escritas separadas: sem isto, cada resposta
+            # numa conexão reaproveitada espera o ACK atrasado do cliente (~40 ms)
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                rota = urlsplit(self.path).path
+                fixture = stub.fixtures.get(rota)
+                stub._count(requisicoes=1)
+                if fixture is None:
+                    return self._send(404, b"not found", "text/plain")
+
+                time.sleep(stub.latencia_rota.get(rota, stub.latencia))
+                if rota in stub.timeout_rota:
+                    time.sleep(60)
+                if stub.random.random() < stub.falhas_rota.get(rota, stub.falhas):
+                    stub._count(falhas=1)
+                    return self._send(503, b"unavailable", "text/plain", {"Retry-After": "30"})
+
+                if not stub.validadores:
+                    headers = {}
+                elif self.headers.get("If-None-Match") == fixture.etag:
+                    stub._count(respostas_304=1)
+                    return self._send(304, b"", None, {"ETag": fixture.etag})
+                else:
+                    headers = {"ETag": fixture.etag, "Last-Modified": fixture.last_modified}
+                body = fixture.body
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = fixture.gzipped
+                    headers["Content-Encoding"] = "gzip"
+                self._send(200, body, fixture.content_type, headers)
+
+            def _send(self, status, body, content_type, headers=None):
+                try:
+                    self.send_response(status)
+                    if content_type:
+                        self.send_header("Content-Type", content_type)
+                    for nome, valor in (headers or {}).items():
+                        self.send_header(nome, valor)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    if body:
+                        self.wfile.write(body)
+                    stub._count(bytes=len(body))
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Cliente parou de ler (scraping com parada antecipada)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def point_app_at(app, stub):
+    """Redireciona as fontes do dashboard para o servidor local"""
+    rotas_scraping = {"Defesa Civil MG": "/defesacivil-mg/", "Defesa Civil JF": "/pjf/defesa_civil/noticias.php"}
+    rotas_rss = {"G1 Zona da Mata (RSS)": "/rss/g1/zona-da-mata/", "Estado de Minas (RSS)": "/rss/em/gerais.xml"}
+    # Mantém os demais campos do registro (ex.: regiões cobertas), trocando só a URL
+    app.fontes.FONTES_SCRAPING[:] = [dict(f, url=stub.url(rotas_scraping[f["nome"]])) for f in app.fontes.FONTES_SCRAPING]
+    app.fontes.FEEDS_RSS[:] = [dict(f, url=stub.url(rotas_rss[f["nome"]])) for f in app.fontes.FEEDS_RSS]
+    app.fontes.NEWS_API_URL = stub.url("/newsapi/v2/everything")
+    app.fontes.OPEN_METEO_URL = stub.url("/open-meteo/v1/forecast")
+    os.environ.setdefault("NEWS_API_KEY", "benchmark")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.0, help="segundos por resposta")
+    parser.add_argument("--falhas", type=float, default=0.0, help="fração de respostas 503")
+    args = parser.parse_args()
+
+    stub = StubServer(args.porta, args.latencia, args.falhas).start()
+    print(f"Servindo fixtures em {stub.base_url}")
+    for rota in ROUTES:
+        print(f"  {stub.url(rota)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""Configuração comum dos testes: o pacote `enchentes_jf` grava em um DATA_DIR temporário."""
+import os
+import tempfile
+
+# Antes de qualquer import do pacote: DATA_DIR é lido uma vez, ao importar `arquivo`
+os.environ["ENCHENTES_DATA_DIR"] = tempfile.mkdtemp(prefix="enchentes-testes-")
@@ -0,0 +1,119 @@
+import http.client
+import json
+
+import pytest
+
+from enchentes_jf.api import API_LIMIT_MAX, ApiError, _int_param, _time_param, api_response, start_api_server
+from enchentes_jf.atualizacao import BackgroundRefresher
+from enchentes_jf.regioes import REGIAO_PADRAO
+
+REGIAO = f"/api/v1/regioes/{REGIAO_PADRAO}"
+
+
+@pytest.fixture(scope="module")
+def refresher():
+    # Sem start(): só o snapshot base, sem tocar na rede
+    return BackgroundRefresher(interval=3600)
+
+
+@pytest.fixture(scope="module")
+def servidor(refresher):
+    servidor = start_api_server(0, refresher)
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def get(servidor, caminho, **headers):
+    conexao = http.client.HTTPConnection("127.0.0.1", servidor.server_port, timeout=10)
+    try:
+        conexao.request("GET", caminho, headers=headers)
+        resposta = conexao.getresponse()
+        return resposta.status, dict(resposta.getheaders()), resposta.read()
+    finally:
+        conexao.close()
+
+
+def test_int_param():
+    assert _int_param({}, "limit", 50, 200) == 50
+    assert _int_param({"limit": "500"}, "limit", 50, 200) == 200
+    for valor in ("abc", "-1", "1.5"):
+        with pytest.raises(ApiError) as erro:
+            _int_param({"limit": valor}, "limit", 50, 200)
+        assert erro.value.status == 400
+
+
+def test_time_param():
+    assert _time_param({}, "desde") is None
+    assert _time_param({"desde": "1772000000"}, "desde") == 1772000000
+    assert _time_param({"desde": "2026-02-25T10:00:00-03:00"}, "desde") == 1772024400
+    assert _time_param({"desde": "2026-02-25T10:00"}, "desde") == 1772024400  # horário local
+    for valor in ("ontem", "nan", "1e30"):
+        with pytest.raises(ApiError) as erro:
+            _time_param({"desde": valor}, "desde")
+        assert erro.value.status == 400
+
+
+def test_routes_and_errors(refresher):
+    snapshot = refresher.latest()
+    assert api_response(snapshot, "/api/v1", {}).status == 200
+    with pytest.raises(ApiError) as erro:
+        api_response(snapshot, "/api/v1/nada", {})
+    assert erro.value.status == 404
+    with pytest.raises(ApiError) as erro:
+        api_response(snapshot, "/api/v1/regioes/atlantida", {})
+    assert erro.value.status == 404
+    with pytest.raises(ApiError) as erro:
+        api_response(snapshot, f"{REGIAO}.csv", {})  # resumo não é tabela
+    assert erro.value.status == 400
+    with pytest.raises(ApiError) as erro:
+        api_response(snapshot, f"{REGIAO}/bairros", {"formato": "xml"})
+    assert erro.value.status == 400
+
+
+def test_table_pagination(refresher):
+    snapshot = refresher.latest()
+    documento = json.loads(api_response(snapshot, f"{REGIAO}/bairros", {"limit": "5"}).body)
+    assert len(documento["itens"]) == 5 and documento["total"] > 5
+    assert documento["proximo"] == f"{REGIAO}/bairros?limit=5&offset=5"
+    documento = json.loads(api_response(snapshot, f"{REGIAO}/bairros", {"limit": "9999"}).body)
+    assert documento["limit"] == API_LIMIT_MAX
+
+
+def test_csv_by_extension(refresher):
+    resposta = api_response(refresher.latest(), f"{REGIAO}/bairros.csv", {})
+    assert resposta.tipo.startswith("text/csv")
+    assert dict(resposta.headers)["Content-Disposition"] == f'attachment; filename="{REGIAO_PADRAO}-bairros.csv"'
+
+
+def test_etag_is_stable_and_content_based(refresher):
+    snapshot = refresher.latest()
+    primeira = api_response(snapshot, f"{REGIAO}/bairros", {})
+    assert api_response(snapshot, f"{REGIAO}/bairros", {}).etag == primeira.etag
+    assert api_response(snapshot, f"{REGIAO}/bairros", {"limit": "5"}).etag != primeira.etag
+
+
+def test_if_none_match_returns_304(servidor):
+    status, headers, corpo = get(servidor, REGIAO)
+    assert status == 200 and json.loads(corpo)["regiao"] == REGIAO_PADRAO
+    etag = headers["ETag"]
+    assert etag.startswith('W/"')
+
+    status, headers, corpo = get(servidor, REGIAO, **{"If-None-Match": etag})
+    assert (status, corpo, headers["ETag"]) == (304, b"", etag)
+    assert get(servidor, REGIAO, **{"If-None-Match": f'W/"outro", {etag}'})[0] == 304
+    assert get(servidor, REGIAO, **{"If-None-Match": "*"})[0] == 304
+    assert get(servidor, REGIAO, **{"If-None-Match": 'W/"outro"'})[0] == 200
+
+
+def test_errors_are_json_and_not_revalidated(servidor):
+    status, headers, corpo = get(servidor, "/api/v1/noticias?limit=x", **{"If-None-Match": "*"})
+    assert status == 400
+    assert "limit" in json.loads(corpo)["erro"]
+
+
+def test_gzip_when_accepted(servidor):
+    status, headers, _ = get(servidor, f"{REGIAO}/bairros", **{"Accept-Encoding": "gzip"})
+    assert status == 200 and headers.get("Content-Encoding") == "gzip"
+    status, headers, _ = get(servidor, f"{REGIAO}/bairros")
+    assert "Content-Encoding" not in headers
@@ -0,0 +1,94 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from enchentes_jf.arquivo import NewsStore, search_expression
+from enchentes_jf.datas import TZ_LOCAL
+
+AGORA = time.time()
+
+
+def noticia(titulo, resumo="", fonte="G1", horas_atras=0, regioes=("juiz-de-fora",)):
+    return {"titulo": titulo, "resumo": resumo, "fonte": fonte, "url": f"https://exemplo.com/{abs(hash(titulo))}",
+            "publicado_em": datetime.fromtimestamp(AGORA - horas_atras * 3600, TZ_LOCAL).isoformat(), "regioes": list(regioes)}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = NewsStore(os.path.join(tmp_path, "noticias.sqlite3"))
+    store.add([
+        noticia("Deslizamento no bairro Santa Luzia interdita casas", "Defesa Civil avalia encosta", horas_atras=1),
+        noticia("Alagamento fecha a avenida Brasil", "Rio Paraibuna sobe após chuva", fonte="Tribuna", horas_atras=2),
+        noticia("Chuva forte provoca alagamentos em Ubá", "Ruas do centro ficaram alagadas", horas_atras=3,
+                regioes=("uba",)),
+        noticia("Evacuação preventiva no Santa Luzia", "Moradores deixam as casas", fonte="PJF", horas_atras=30),
+    ])
+    return store
+
+
+def titulos(resultado):
+    pagina, _ = resultado
+    return [n["titulo"] for n in pagina]
+
+
+def test_search_expression_is_safe_fts5():
+    assert search_expression('desliz* "santa luzia" OR (') == '"desliz"* "santa luzia" "OR"'
+    assert search_expression("  ") == ""
+
+
+def test_words_accents_and_prefixes(store):
+    assert titulos(store.search("evacuacao")) == ["Evacuação preventiva no Santa Luzia"]
+    assert titulos(store.search("alaga*")) == ["Alagamento fecha a avenida Brasil", "Chuva forte provoca alagamentos em Ubá"]
+
+
+def test_phrase_and_bairro(store):
+    assert titulos(store.search('"santa luzia"')) == [
+        "Deslizamento no bairro Santa Luzia interdita casas", "Evacuação preventiva no Santa Luzia",
+    ]
+    assert titulos(store.search("casas", bairro="Santa Luzia")) == titulos(store.search('"santa luzia"'))
+
+
+def test_filters(store):
+    assert titulos(store.search(fontes=("Tribuna",))) == ["Alagamento fecha a avenida Brasil"]
+    assert titulos(store.search("alaga*", regiao="uba")) == ["Chuva forte provoca alagamentos em Ubá"]
+    assert titulos(store.search(desde=AGORA - 24 * 3600, ate=AGORA - 1.5 * 3600)) == [
+        "Alagamento fecha a avenida Brasil", "Chuva forte provoca alagamentos em Ubá",
+    ]
+
+
+def test_pagination(store):
+    pagina, mais = store.search(limit=3)
+    assert len(pagina) == 3 and mais
+    pagina, mais = store.search(limit=3, offset=3)
+    assert titulos((pagina, mais)) == ["Evacuação preventiva no Santa Luzia"] and not mais
+
+
+def test_relevance_order(store):
+    # As duas citam os três termos: por data vence a mais nova, por BM25 a mais curta
+    assert titulos(store.search("santa luzia casas"))[0] == "Deslizamento no bairro Santa Luzia interdita casas"
+    assert titulos(store.search("santa luzia casas", ordem="relevancia"))[0] == "Evacuação preventiva no Santa Luzia"
+
+
+def test_no_results(store):
+    assert store.search("granizo") == ([], False)
+
+
+def test_signatures_without_the_mark_are_regrouped(tmp_path):
+    caminho = os.path.join(tmp_path, "noticias.sqlite3")
+    NewsStore(caminho).add([noticia("Chuva em Ubá deixa 5 mortos"), noticia("Chuva em Juiz de Fora deixa 5 mortos")])
+    with NewsStore(caminho)._connect() as conn:
+        # Como gravava a versão anterior: só o MinHash, e as duas no mesmo grupo
+        primeiro = conn.execute("SELECT id FROM noticias ORDER BY rowid LIMIT 1").fetchone()[0]
+        for id_, assinatura in conn.execute("SELECT id, assinatura FROM noticias").fetchall():
+            conn.execute("UPDATE noticias SET cluster_id = ?, assinatura = ? WHERE id = ?",
+                         (primeiro, assinatura[:-4], id_))
+
+    store = NewsStore(caminho)
+    store.warm()
+    with store._connect() as conn:
+        grupos = {r[0] for r in conn.execute("SELECT cluster_id FROM noticias")}
+        tamanhos = {len(r[0]) for r in conn.execute("SELECT assinatura FROM noticias")}
+    assert len(grupos) == 2
+    assert tamanhos == {4 * (len(store.dedup._a) + 1)}
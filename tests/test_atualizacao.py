@@ -0,0 +1,30 @@
+import logging
+import time
+
+from enchentes_jf import servicos
+from enchentes_jf.atualizacao import BackgroundRefresher
+from enchentes_jf.instrumentacao import PipelineMetrics
+
+
+def test_background_failures_are_logged_counted_and_kept(monkeypatch, caplog):
+    monkeypatch.setattr(servicos, "pipeline_metrics", PipelineMetrics())
+    refresher = BackgroundRefresher(interval=3600)
+    anterior = refresher.latest()
+
+    def falhar(pedido):
+        raise RuntimeError("fonte fora do ar")
+
+    refresher._cycle = falhar
+    with caplog.at_level(logging.ERROR, logger="enchentes_jf.atualizacao"):
+        refresher.start()
+        limite = time.time() + 10
+        while refresher.last_error is None and time.time() < limite:
+            time.sleep(0.01)
+
+    quando, erro = refresher.last_error
+    assert erro == "RuntimeError: fonte fora do ar" and quando <= time.time()
+    assert refresher.latest() is anterior
+    assert "mantido o snapshot 0" in caplog.text and "fonte fora do ar" in caplog.text
+    assert servicos.pipeline_metrics.to_dict()["enchentes_atualizacao_erros_total"] == [
+        {"etapa": "ciclo", "tipo": "RuntimeError", "valor": 1},
+    ]
@@ -0,0 +1,45 @@
+import time
+from datetime import datetime, timezone
+
+from enchentes_jf.datas import TZ_LOCAL, parse_timestamp
+
+AGORA = datetime(2026, 2, 25, 12, 0, tzinfo=TZ_LOCAL)
+
+
+def test_day_month_without_year_uses_current_year():
+    assert parse_timestamp("25/02 10:30", now=AGORA) == datetime(2026, 2, 25, 10, 30, tzinfo=TZ_LOCAL)
+
+
+def test_day_month_in_the_future_is_last_year():
+    assert parse_timestamp("30/12 08:00", now=AGORA) == datetime(2025, 12, 30, 8, 0, tzinfo=TZ_LOCAL)
+
+
+def test_explicit_year_is_kept():
+    assert parse_timestamp("30/12/2026 08:00", now=AGORA).year == 2026
+
+
+def test_invalid_day_month():
+    assert parse_timestamp("31/02 10:00", now=AGORA) is None
+
+
+def test_iso_with_z_is_converted_to_local_time():
+    assert parse_timestamp("2026-02-25T13:00:00Z") == datetime(2026, 2, 25, 10, 0, tzinfo=TZ_LOCAL)
+
+
+def test_rfc822():
+    assert parse_timestamp("Tue, 24 Feb 2026 10:00:00 -0300") == datetime(2026, 2, 24, 10, 0, tzinfo=TZ_LOCAL)
+
+
+def test_naive_values_are_local_time():
+    assert parse_timestamp("2026-02-25T10:00:00").tzinfo == TZ_LOCAL
+    assert parse_timestamp(datetime(2026, 2, 25, 10, 0)) == datetime(2026, 2, 25, 10, 0, tzinfo=TZ_LOCAL)
+
+
+def test_struct_time_is_utc():
+    valor = time.struct_time((2026, 2, 25, 13, 0, 0, 2, 56, 0))
+    assert parse_timestamp(valor) == datetime(2026, 2, 25, 13, 0, tzinfo=timezone.utc)
+
+
+def test_unrecognized_values():
+    for valor in (None, "", "ontem à tarde", "25/02"):
+        assert parse_timestamp(valor, now=AGORA) is None
@@ -0,0 +1,54 @@
+from enchentes_jf.deduplicacao import RESUMO_SCRAPING, NearDuplicateIndex
+
+
+def add(indice, doc_id, titulo, resumo=""):
+    return indice.add(doc_id, indice.signature({"titulo": titulo, "resumo": resumo}))
+
+
+def test_same_story_from_two_sources_is_grouped():
+    indice = NearDuplicateIndex()
+    primeiro = add(indice, "a", "Deslizamento de terra atinge casas no bairro Santa Luzia em Juiz de Fora",
+                   "Defesa Civil interdita imóveis após chuva forte")
+    assert add(indice, "b", "Deslizamento atinge casas no bairro Santa Luzia, em Juiz de Fora",
+               "Defesa Civil interdita imóveis após a chuva forte") == primeiro
+
+
+def test_different_stories_stay_apart():
+    indice = NearDuplicateIndex()
+    add(indice, "a", "Deslizamento de terra atinge casas no bairro Santa Luzia em Juiz de Fora")
+    assert add(indice, "b", "Prefeitura abre inscrições para cursos gratuitos de informática") == "b"
+
+
+def test_adding_again_returns_the_known_group():
+    indice = NearDuplicateIndex()
+    add(indice, "a", "Rio Paraibuna transborda e alaga avenida Brasil")
+    add(indice, "b", "Rio Paraibuna transborda e alaga a avenida Brasil")
+    assert add(indice, "b", "qualquer outro texto") == "a"
+    assert len(indice) == 2
+
+
+def test_generic_scraping_summary_is_ignored():
+    indice = NearDuplicateIndex()
+    resumo = f"{RESUMO_SCRAPING} Defesa Civil"
+    assert indice.signature({"titulo": "", "resumo": resumo}) is None
+    assert (indice.signature({"titulo": "Alerta de chuva", "resumo": resumo}) ==
+            indice.signature({"titulo": "Alerta de chuva"})).all()
+
+
+def test_news_without_tokens_is_its_own_group():
+    indice = NearDuplicateIndex()
+    assert indice.add("a", None) == "a"
+    assert indice.add("b", None, cluster_id="a") == "a"
+
+
+def test_same_text_about_another_region_is_another_story():
+    indice = NearDuplicateIndex()
+    add(indice, "uba", "Chuva em Ubá deixa 5 mortos")
+    assert add(indice, "jf", "Chuva em Juiz de Fora deixa 5 mortos") == "jf"
+
+
+def test_same_text_with_other_numbers_is_another_story():
+    indice = NearDuplicateIndex()
+    add(indice, "a", "Chuva em Juiz de Fora deixa 5 mortos e 3 desaparecidos")
+    assert add(indice, "b", "Chuva em Juiz de Fora deixa 7 mortos e 3 desaparecidos") == "b"
+    assert add(indice, "c", "Chuva em Juiz de Fora deixa 5 mortos e 3 desaparecidos.") == "a"
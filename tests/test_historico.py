@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from enchentes_jf.historico import TIMELINE_MAX_PONTOS, TIMELINE_RESOLUCOES, MetricsTimeline
+
+INICIO = 1_772_000_000 // 86400 * 86400  # meia-noite UTC, início de todos os intervalos
+
+
+@pytest.fixture
+def timeline(tmp_path):
+    return MetricsTimeline(str(tmp_path))
+
+
+def test_raw_readings_are_kept_in_order(timeline):
+    for i in range(5):
+        assert timeline.append("jf", INICIO + i * 60, {"mortes": i, "chuva_24h": 1.5 * i})
+    df = timeline.read("jf", "bruto")
+    assert df["mortes"].tolist() == [0, 1, 2, 3, 4]
+    assert df["chuva_24h"].tolist() == [0, 1.5, 3, 4.5, 6]
+    assert np.isnan(df["desaparecidos"]).all()
+
+
+def test_out_of_order_reading_is_rejected(timeline):
+    assert timeline.append("jf", INICIO + 60, {"mortes": 1})
+    assert not timeline.append("jf", INICIO + 60, {"mortes": 2})
+    assert not timeline.append("jf", INICIO, {"mortes": 3})
+    assert timeline.read("jf", "bruto")["mortes"].tolist() == [1]
+
+
+def test_aggregates_keep_the_last_value_of_each_interval(timeline):
+    # Três leituras por intervalo de 5 min; a última não tem chuva (NaN não apaga o valor anterior)
+    for i in range(9):
+        timeline.append("jf", INICIO + i * 100, {"mortes": i, "chuva_24h": None if i == 8 else float(i)})
+    df = timeline.read("jf", "5min")
+    assert df["mortes"].tolist() == [2, 5, 8]
+    assert df["chuva_24h"].tolist() == [2, 5, 7]
+    assert df["amostras"].tolist() == [3, 3, 3]
+    assert df.index[1].timestamp() == INICIO + TIMELINE_RESOLUCOES["5min"]
+
+
+def test_read_since(timeline):
+    for i in range(10):
+        timeline.append("jf", INICIO + i * 3600, {"mortes": i})
+    assert timeline.read("jf", "bruto", desde=INICIO + 7 * 3600)["mortes"].tolist() == [7, 8, 9]
+    assert timeline.read("jf", "hora", desde=INICIO + 8 * 3600)["mortes"].tolist() == [8, 9]
+
+
+def test_state_is_recovered_by_another_instance(timeline, tmp_path):
+    for i in range(4):
+        timeline.append("jf", INICIO + i * 200, {"mortes": i})
+    outra = MetricsTimeline(str(tmp_path))
+    assert outra.read("jf", "5min")["mortes"].tolist() == timeline.read("jf", "5min")["mortes"].tolist()
+    outra.append("jf", INICIO + 900, {"mortes": 9})
+    assert timeline.read("jf", "5min")["mortes"].tolist() == [1, 2, 3, 9]
+
+
+def test_unknown_region_is_empty(timeline):
+    assert timeline.read("nenhuma", "dia").empty
+    assert timeline.span("nenhuma") == 0
+
+
+def test_resolution_for():
+    assert MetricsTimeline.resolution_for(86400) == "5min"
+    assert MetricsTimeline.resolution_for(7 * 86400) == "hora"
+    assert MetricsTimeline.resolution_for(TIMELINE_MAX_PONTOS * 3600 + 1) == "dia"
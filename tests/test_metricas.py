@@ -0,0 +1,56 @@
+from enchentes_jf.metricas import MetricsEngine, parse_br_number, scan_metrics
+
+
+def test_brazilian_numbers():
+    assert parse_br_number("46") == 46
+    assert parse_br_number("3.400") == 3400
+    assert parse_br_number("3,4", mil=True) == 3400
+
+
+def test_scan_metrics_finds_every_metric_in_one_pass():
+    texto = "Temporal deixa 46 óbitos, 21 desaparecidos e 3,4 mil desabrigados; 3.400 pessoas desalojadas"
+    assert list(scan_metrics(texto)) == [
+        ("mortes", 46), ("desaparecidos", 21), ("desabrigados", 3400), ("desalojados", 3400),
+    ]
+
+
+def test_scan_metrics_accepts_people_and_verbs_between_number_and_term():
+    assert list(scan_metrics("12 pessoas estão desaparecidas")) == [("desaparecidos", 12)]
+    assert list(scan_metrics("Chuva: 2 vítimas fatais")) == [("mortes", 2)]
+
+
+def test_scan_metrics_dead_in_every_gender_and_number():
+    assert list(scan_metrics("Chuva em Ubá deixa 5 mortos")) == [("mortes", 5)]
+    assert list(scan_metrics("1 morto e 2 mortas")) == [("mortes", 1), ("mortes", 2)]
+
+
+def test_scan_metrics_verb_before_number():
+    assert list(scan_metrics("morreram 10 pessoas")) == [("mortes", 10)]
+    assert list(scan_metrics("Morreu 1 pessoa no Santa Luzia")) == [("mortes", 1)]
+    assert list(scan_metrics("morreram pelo menos 12 moradores")) == [("mortes", 12)]
+    assert list(scan_metrics("desapareceram ao menos 4 pessoas")) == [("desaparecidos", 4)]
+
+
+def test_scan_metrics_verb_after_number():
+    assert list(scan_metrics("3 pessoas morreram e 2 desapareceram")) == [("mortes", 3), ("desaparecidos", 2)]
+
+
+def test_scan_metrics_year_is_not_the_count():
+    assert list(scan_metrics("em 2026 3 mortos")) == [("mortes", 3)]
+    assert list(scan_metrics("Em 2026, 3 mortos")) == [("mortes", 3)]
+    assert list(scan_metrics("em 2026 morreram 3 pessoas")) == [("mortes", 3)]
+
+
+def test_scan_metrics_ignores_text_without_numbers():
+    assert list(scan_metrics("Defesa Civil confirma mortes e desaparecidos")) == []
+
+
+def test_engine_keeps_the_largest_value_and_its_source():
+    engine = MetricsEngine()
+    engine.ingest([
+        {"titulo": "Chuva: 5 mortes", "fonte": "G1"},
+        {"titulo": "Sobe o número de mortes", "resumo": "São 9 mortes", "fonte": "EM"},
+        {"titulo": "Balanço: 7 óbitos", "fonte": "PJF"},
+    ])
+    assert engine.values()["mortes"] == 9
+    assert engine.provenance()["mortes"]["fonte"] == "EM"
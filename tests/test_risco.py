@@ -0,0 +1,32 @@
+from enchentes_jf.chuva import CHUVA_JANELAS, CHUVA_LIMIARES
+from enchentes_jf.dados_base import DataManager
+from enchentes_jf.risco import RiskEngine
+
+CHUVA_NO_LIMIAR = {"janelas": {j: CHUVA_LIMIARES[j] for j in CHUVA_JANELAS}}
+
+
+def test_only_bulletin_bairros_are_not_estimated():
+    bairros = RiskEngine().score({"juiz-de-fora": CHUVA_NO_LIMIAR})["juiz-de-fora"]
+    confirmados = {b["bairro"] for b in bairros if not b["estimado"]}
+    assert confirmados == set(DataManager().bairros_base["juiz-de-fora"])
+    assert len(bairros) > len(confirmados)
+
+
+def test_score_is_sorted_by_risk():
+    bairros = RiskEngine().score({"juiz-de-fora": CHUVA_NO_LIMIAR})["juiz-de-fora"]
+    escores = [b["escore"] for b in bairros]
+    assert escores == sorted(escores, reverse=True)
+    assert all(0 <= e <= 100 for e in escores)
+
+
+def test_registry_without_the_column_is_all_estimated(tmp_path):
+    caminho = tmp_path / "bairros.csv"
+    caminho.write_text(
+        "regiao,bairro,tipo,suscetibilidade,ocorrencias,latitude,longitude\n"
+        "jf,A,Alagamento,alta,3,-21.7,-43.3\n"
+        "jf,B,Deslizamento,baixa,0,-21.8,-43.4\n",
+        encoding="utf-8",
+    )
+    bairros = RiskEngine(str(caminho)).score({"jf": None})["jf"]
+    assert [b["bairro"] for b in bairros] == ["A", "B"]
+    assert all(b["estimado"] for b in bairros)